@@ -0,0 +1,113 @@
+# loadgen.py
+# Load generator untuk daemon (python main.py --serve): banyak koneksi paralel, tiap koneksi
+# mengirim request secara pipelined dengan jendela tetap, lalu cetak throughput dan latensi
+# sisi klien (p50/p99) serta counter sisi server.
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import Any, Dict, List
+import numpy as np
+from modules.io import gather_image_files
+from modules.service import DEFAULT_SOCKET
+
+async def _connection(socket_path: str, items: List[Dict[str, Any]], window: int, latencies: List[float], failures: List[str]) -> None:
+    # Satu koneksi: jaga paling banyak `window` request belum terjawab
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=1 << 24)
+    sent_at: Dict[int, float] = {}
+    it = iter(items)
+    done = 0
+
+    def send_next() -> bool:
+        req = next(it, None)
+        if req is None:
+            return False
+        sent_at[req["id"]] = time.perf_counter()
+        writer.write((json.dumps(req) + "\n").encode())
+        return True
+
+    for _ in range(window):
+        if not send_next():
+            break
+    await writer.drain()
+    while done < len(items):
+        resp = json.loads(await reader.readline())
+        latencies.append((time.perf_counter() - sent_at.pop(resp["id"])) * 1000.0)
+        if resp.get("error"):
+            failures.append(resp["error"])
+        done += 1
+        if send_next():
+            await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+async def _server_stats(socket_path: str) -> Dict[str, Any]:
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(b'{"op": "stats"}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())["stats"]
+    writer.close()
+    await writer.wait_closed()
+    return stats
+
+async def run_load(socket_path: str, paths: List[str], total: int, connections: int, window: int, send_bytes: bool) -> Dict[str, Any]:
+    # Bagi `total` request rata ke semua koneksi (path diulang bila kurang)
+    blobs = {}
+    if send_bytes:
+        for p in paths:
+            with open(p, "rb") as f:
+                blobs[p] = base64.b64encode(f.read()).decode()
+    reqs = []
+    for i in range(total):
+        p = paths[i % len(paths)]
+        reqs.append({"id": i, "name": os.path.basename(p), "data": blobs[p]} if send_bytes else {"id": i, "path": os.path.abspath(p)})
+    latencies: List[float] = []
+    failures: List[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(*[_connection(socket_path, reqs[c::connections], window, latencies, failures) for c in range(connections)])
+    elapsed = time.perf_counter() - start
+    lat = np.asarray(latencies)
+    return {
+        "requests": total,
+        "connections": connections,
+        "window": window,
+        "bytes": send_bytes,
+        "elapsed_s": elapsed,
+        "throughput": total / elapsed if elapsed > 0 else 0.0,
+        "failed": len(failures),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "max_ms": float(lat.max()),
+        "server": await _server_stats(socket_path)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load generator untuk daemon Parallel Image Processor")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Path Unix socket daemon")
+    parser.add_argument("--folder", default="data", help="Folder gambar sumber request")
+    parser.add_argument("--requests", type=int, default=1000, help="Jumlah total request")
+    parser.add_argument("--connections", type=int, default=8, help="Jumlah koneksi paralel")
+    parser.add_argument("--window", type=int, default=4, help="Request belum terjawab maksimum per koneksi")
+    parser.add_argument("--bytes", action="store_true", help="Kirim isi file (base64) alih-alih path")
+    parser.add_argument("--out", default=None, help="Simpan hasil ke JSON ini")
+    args = parser.parse_args()
+
+    paths = gather_image_files(args.folder, args.requests)
+    if not paths:
+        print(f"[ERROR] Folder '{args.folder}' kosong.")
+        return
+    res = asyncio.run(run_load(args.socket, paths, args.requests, max(1, args.connections), max(1, args.window), args.bytes))
+    srv = res["server"]
+    print(f"[LOAD] {res['requests']} requests, {res['connections']} connections x window {res['window']}: {res['elapsed_s']:.3f} s, {res['throughput']:.1f} req/s, failed {res['failed']}")
+    print(f"  Client latency: p50 {res['p50_ms']:.2f} ms, p99 {res['p99_ms']:.2f} ms, max {res['max_ms']:.2f} ms")
+    print(f"  Server: p50 {srv['p50_ms']:.2f} ms, p99 {srv['p99_ms']:.2f} ms, batches {srv['batches']} (avg {srv['avg_batch']:.1f}), queue depth max {srv['queue_depth_max']}")
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"[OK] Saved to {args.out}")
+
+if __name__ == "__main__":
+    main()
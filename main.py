@@ -1,11 +1,36 @@
 # main.py
 # Titik masuk utama untuk pemrosesan gambar paralel
 import argparse
+import asyncio
+import contextlib
+import math
 import os
 import random
-from modules.utils import parse_nim, save_csv, save_json, plot_results, compute_global_avg, audit_color_variation, plot_experiments, save_experiments_csv, save_experiments_json, print_experiments_table, color_name_from_rgb
-from modules.io import gather_image_files
-from modules.pipeline import run_serial, run_configuration, run_experiments
+import subprocess
+import sys
+import time
+from typing import Optional
+# Batasi thread BLAS/OpenMP sebelum NumPy dimuat (berlaku juga untuk worker pool)
+from modules.placement import cap_native_threads, cpu_info
+cap_native_threads()
+from modules.utils import ImageResultWriter, parse_nim, save_csv, save_json, plot_results, compute_global_avg, audit_color_variation, plot_experiments, save_experiments_csv, save_experiments_json, print_experiments_table, color_name_from_rgb
+from modules.io import gather_image_files, iter_image_files, load_image_thumbnail
+from modules.schedule import SCHEDULES
+from modules.aggregate import ColorStats
+from modules.results import ResultTable
+from modules.pipeline import run_serial, run_configuration, run_experiments, iter_process, fill_cache, WorkerPool, DEFAULT_MAX_RETRIES, DEFAULT_SPECULATE_PCT, START_METHODS, runtime_info
+from modules.autotune import run_autotuned
+from modules import instrument, profiler
+from modules.benchmark import load_baseline, compare_results, PAGE_CACHE_MODES, DEFAULT_REGRESSION_THRESHOLD
+from modules.processing import verify_fast_decode, benchmark_batch_compute, cache_variant, FAST_DECODE_EPSILON
+from modules.manifest import Manifest, DEFAULT_MANIFEST_PATH
+from modules.shards import list_shards, iter_shards, write_shards
+from modules.startup import run_startup_benchmark
+from modules.service import serve, DEFAULT_SOCKET, DEFAULT_MAX_BATCH, DEFAULT_BATCH_WAIT_MS, DEFAULT_MAX_QUEUE
+from modules.distributed import Coordinator, run_worker, start_local_workers, parse_address, is_loopback, DEFAULT_LEASE_SIZE, DEFAULT_LEASE_TTL, TOKEN_ENV
+from modules.thumbstore import create_store, save_index
+from modules.ops import plan_ops, describe, HEAVY_SPEC, DEFAULT_SPEC
+from modules.cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_ENTRIES, KEY_MODES
 import json
 import numpy as np
 
@@ -33,6 +58,249 @@ def print_boxed_summary(name: str, nim: str, threads: int, processes: int, data:
         print(f"| {line3:<{width-4}} |")
         print("+" + "-" * (width - 2) + "+")
 
+def collect_trace(label: str, traces: dict) -> None:
+    # Pindahkan event instrumentasi run terakhir ke traces[label] (no-op jika --trace mati)
+    if instrument.ENABLED:
+        traces[label] = instrument.drain()
+
+def finish_profile(args) -> Optional[dict]:
+    # Gabungkan profil parent + worker (setelah semua pool ditutup) dan cetak fungsi terpanas
+    summary = profiler.finish(args.profile, args.profile_top)
+    if summary is None:
+        return None
+    origins = ", ".join(f"{k} {v:.2f}s" for k, v in summary["by_origin_s"].items())
+    print(f"[PROFILE] {summary['file']}: {summary['worker_dumps']} worker dumps + {summary['parent_threads']} parent threads; self time by origin: {origins}")
+    for row in summary["top"][:10]:
+        print(f"  {row['tottime_s']:8.3f}s self {row['cumtime_s']:8.3f}s cum {row['calls']:>8} calls  [{row['origin']}] {row['function']}")
+    return summary
+
+def save_trace(traces: dict, out_json: str) -> dict:
+    # Simpan Chrome trace gabungan dan kembalikan ringkasan persentil per konfigurasi
+    events = []
+    for label, evs in traces.items():
+        events.extend(instrument.to_chrome_trace(evs, label))
+    instrument.save_chrome_trace(events, out_json)
+    print(f"[OK] Chrome trace saved to {out_json} ({len(events)} spans)")
+    return {label: instrument.summarize(evs) for label, evs in traces.items()}
+
+def print_fault(fault) -> None:
+    # Ringkasan fault tolerance satu run (hanya jika ada kejadian)
+    if fault and any(fault.values()):
+        print("  Fault: " + ", ".join(f"{k} {v}" for k, v in fault.items()))
+
+def print_schedule(sched) -> None:
+    # Makespan stage compute dibanding pembagian beban ideal antar worker
+    if sched and sched.get("workers"):
+        print(f"  Schedule {sched['policy']}: busiest worker {sched['max_busy_s']:.3f} s vs ideal {sched['ideal_s']:.3f} s (imbalance x{sched['imbalance']:.2f}), makespan {sched['makespan_s']:.3f} s, starved {sched['starved_s']:.3f} s, tail idle {sched['tail_idle_s']:.3f} s, estimate {sched['estimate_s']:.3f} s")
+
+def run_stream(image_folder: str, images_csv: str, num_threads: int, num_processes: int, args, cache) -> None:
+    # Proses seluruh folder lewat iter_process; memori konstan terhadap jumlah file.
+    # Statistik global dari ColorStats berjalan; dengan --aggregate-only worker hanya
+    # mengirim state statistik parsial dan tidak ada output per gambar
+    images_json = os.path.splitext(images_csv)[0] + ".json"
+    print(f"[RUN] Streaming '{image_folder}': engine={args.engine}, threads={num_threads}, processes={num_processes}")
+    start = time.perf_counter()
+    stats = {}
+    # Engine threads tidak memakai proses worker sama sekali
+    with (WorkerPool(num_processes, start_method=args.start_method, pin=args.pin_workers) if args.engine != "threads" else contextlib.nullcontext()) as pool:
+        results = iter_process(iter_image_files(image_folder), num_threads, num_processes, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, engine=args.engine, pool=pool, cache=cache, transport=args.transport, batch_size=args.batch_size, stats=stats,
+                               task_timeout=args.task_timeout, max_retries=args.max_retries, speculate_pct=args.speculate_pct, aggregate_only=args.aggregate_only)
+        if args.aggregate_only:
+            for _ in results:
+                pass
+        else:
+            with ImageResultWriter(images_csv, images_json) as writer:
+                for idx, result in results:
+                    writer.write(result, stats["errors"].get(idx))
+                    if args.verbose and writer.count % 100 == 0:
+                        print(f"[INFO] Streamed {writer.count} images")
+    elapsed = time.perf_counter() - start
+    agg = stats["aggregate"]
+    count = agg.n + agg.failed
+    if count == 0:
+        print(f"[ERROR] Folder '{image_folder}' kosong.")
+        return
+    avg, std = agg.avg_rgb(), agg.std_rgb()
+    color_name, rgb_int = color_name_from_rgb(avg)
+    print(f"  Time: {elapsed:.6f} s, throughput: {count / elapsed:.6f} img/s, failed: {agg.failed}")
+    print_fault(stats.get("fault"))
+    if cache is not None:
+        print(f"  Cache: hits {cache.hits}, misses {cache.misses}")
+    print(f"Global avg color: ({avg[0]:.1f}, {avg[1]:.1f}, {avg[2]:.1f}) -> rgb({rgb_int[0]},{rgb_int[1]},{rgb_int[2]}) ({color_name}), stddev R: {std[0]:.2f}, G: {std[1]:.2f}, B: {std[2]:.2f}")
+    if args.aggregate_only:
+        summary_json = os.path.splitext(images_csv)[0] + "_aggregate.json"
+        save_json({"folder": image_folder, "elapsed_s": elapsed, "aggregate": agg.to_dict(),
+                   "failures": [{"index": i, "error": e} for i, e in sorted(stats["errors"].items())]}, summary_json)
+        print(f"[OK] Aggregate statistics saved to {summary_json}")
+    else:
+        print(f"[OK] Per-image results streamed to {images_csv} and {images_json}")
+    if args.profile:
+        save_json({"profile": finish_profile(args)}, os.path.splitext(images_csv)[0] + "_profile_summary.json")
+    if args.trace:
+        traces = {}
+        collect_trace("stream", traces)
+        summary = save_trace(traces, args.trace)
+        save_json({"trace": summary}, os.path.splitext(images_csv)[0] + "_trace_summary.json")
+
+def run_shards(spec: str, images_csv: str, num_processes: int, args) -> None:
+    # Proses member gambar langsung dari shard tar/zip; satu shard per task worker
+    shards = list_shards(spec)
+    if not shards:
+        print(f"[ERROR] Tidak ada shard tar/zip di '{spec}'.")
+        return
+    images_json = os.path.splitext(images_csv)[0] + ".json"
+    agg = ColorStats()
+    procs = min(num_processes, len(shards))
+    print(f"[RUN] Shards '{spec}': {len(shards)} shards, processes={procs}")
+    stats = {}
+    start = time.perf_counter()
+    with ImageResultWriter(images_csv, images_json) as writer, WorkerPool(procs, start_method=args.start_method, pin=args.pin_workers) as pool:
+        for shard, results in iter_shards(shards, pool, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, task_timeout=args.task_timeout, max_retries=args.max_retries, stats=stats):
+            for result, error in results:
+                writer.write(result, error)
+            agg.add_batch([r[1:4] for r, _ in results])
+            if args.verbose:
+                print(f"[INFO] {os.path.basename(shard)}: {len(results)} images")
+        count = writer.count
+    elapsed = time.perf_counter() - start
+    avg = agg.avg_rgb()
+    color_name, rgb_int = color_name_from_rgb(avg)
+    print(f"  Time: {elapsed:.6f} s, images: {count}, throughput: {count / elapsed if elapsed > 0 else 0.0:.6f} img/s, failed: {agg.failed}")
+    print_fault(stats.get("fault"))
+    print(f"Global avg color: ({avg[0]:.1f}, {avg[1]:.1f}, {avg[2]:.1f}) -> rgb({rgb_int[0]},{rgb_int[1]},{rgb_int[2]}) ({color_name})")
+    print(f"[OK] Per-image results saved to {images_csv} and {images_json}")
+
+def run_distributed(image_folder: str, images_csv: str, args) -> None:
+    # Coordinator: seluruh file folder dibagi menjadi lease untuk worker yang terhubung lewat TCP
+    # (--local-workers memulai worker di mesin ini); hasil ditulis ke CSV/JSON per gambar yang sama
+    files = gather_image_files(image_folder, sys.maxsize)
+    if not files:
+        print(f"[ERROR] Folder '{image_folder}' kosong.")
+        return
+    host, port = parse_address(args.coordinator)
+    if not is_loopback(host) and args.token is None:
+        print(f"[WARN] Coordinator listen di {host} tanpa token: siapa pun yang bisa menjangkau port ini dapat mengambil dan mengirim hasil (set --token atau {TOKEN_ENV})")
+    images_json = os.path.splitext(images_csv)[0] + ".json"
+    agg = ColorStats()
+    errors = {}
+    workers = []
+    table = ResultTable(len(files))
+    start = time.perf_counter()
+    with ImageResultWriter(images_csv, images_json) as writer:
+        def sink(idx, result, error):
+            writer.write(result, error)
+            table.set(idx, result, error)
+            agg.add(result[1:4])
+            if error is not None:
+                errors[idx] = error
+
+        coord = Coordinator(files, sink, lease_size=args.lease_size, lease_ttl=args.lease_ttl, token=args.token)
+
+        def on_ready(bound_port):
+            print(f"[COORD] {len(files)} files, lease {coord.lease_size}, TTL {coord.lease_ttl:g} s, listening on {host}:{bound_port}", flush=True)
+            if args.local_workers:
+                local_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+                workers.extend(start_local_workers(local_host, bound_port, args.local_workers, processes=args.worker_processes, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, token=args.token))
+
+        try:
+            asyncio.run(coord.run(host, port, on_ready))
+        finally:
+            for proc in workers:
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+    elapsed = time.perf_counter() - start
+    avg, std = agg.avg_rgb(), agg.std_rgb()
+    color_name, rgb_int = color_name_from_rgb(avg)
+    counters = coord.counters
+    print(f"  Time: {elapsed:.6f} s, images: {writer.count}, throughput: {writer.count / elapsed if elapsed > 0 else 0.0:.6f} img/s, failed: {agg.failed}")
+    print(f"  Leases {counters['leases']}, expired {counters['expired']} ({counters['requeued']} files re-issued), duplicate results {counters['duplicates']}")
+    for name, n in sorted(counters["workers"].items()):
+        print(f"    {name}: {n} images")
+    print(f"Global avg color: ({avg[0]:.1f}, {avg[1]:.1f}, {avg[2]:.1f}) -> rgb({rgb_int[0]},{rgb_int[1]},{rgb_int[2]}) ({color_name}), stddev R: {std[0]:.2f}, G: {std[1]:.2f}, B: {std[2]:.2f}")
+    summary_json = os.path.splitext(images_csv)[0] + "_distributed.json"
+    save_json({"folder": image_folder, "elapsed_s": elapsed, "lease_size": coord.lease_size, "lease_ttl": coord.lease_ttl, "coordinator": counters, "aggregate": agg.to_dict(),
+               "failures": [{"index": i, "file": os.path.basename(files[i]), "error": errors[i]} for i in sorted(errors)]}, summary_json)
+    print(f"[OK] Per-image results saved to {images_csv} and {images_json}, summary {summary_json}")
+    if args.table_out:
+        print(f"[OK] Result table saved to {table.save(args.table_out)}")
+
+# Mode watch: file yang mtime-nya lebih baru dari ini dianggap masih ditulis
+WATCH_SETTLE_S = 0.5
+# Scan penuh berkala untuk menangkap file yang ditimpa di tempat (mtime folder tidak berubah)
+WATCH_RESCAN_EVERY = 30
+
+def process_changed(manifest: Manifest, changed: list, pool: WorkerPool, num_threads: int, num_processes: int, args, cache, chunksize=None) -> int:
+    # Proses file baru/berubah lewat pool warm dan simpan hasilnya ke manifest
+    failed = 0
+    stats = {}
+    for idx, result in iter_process(changed, num_threads, num_processes, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, engine="hybrid", pool=pool, cache=cache, chunksize=chunksize, transport=args.transport, batch_size=args.batch_size, stats=stats,
+                                    task_timeout=args.task_timeout, max_retries=args.max_retries, speculate_pct=args.speculate_pct, schedule=args.schedule):
+        manifest.update(changed[idx], result)
+        if math.isnan(result[1]):
+            failed += 1
+            if args.verbose:
+                print(f"[WARN] {changed[idx]}: {stats['errors'].get(idx, 'gagal diproses')}")
+    manifest.commit()
+    return failed
+
+def print_aggregates(agg: dict) -> None:
+    avg, std = agg["avg_rgb"], agg["std_rgb"]
+    color_name, rgb_int = color_name_from_rgb(avg)
+    print(f"Global avg color: ({avg[0]:.1f}, {avg[1]:.1f}, {avg[2]:.1f}) -> rgb({rgb_int[0]},{rgb_int[1]},{rgb_int[2]}) ({color_name}), images {agg['ok']}, failed {agg['failed']}")
+    print(f"Color variation: stddev R: {std[0]:.2f}, G: {std[1]:.2f}, B: {std[2]:.2f}")
+
+def run_incremental(image_folder: str, num_threads: int, num_processes: int, args, cache) -> None:
+    # Proses hanya file baru/berubah sejak run sebelumnya (berdasarkan manifest),
+    # lalu opsional pantau folder (--watch) dan proses file baru begitu muncul
+    variant = cache_variant(args.heavy, args.fast_decode, vector=bool(args.batch_size), ops=args.ops)
+    with Manifest(args.manifest, variant) as manifest, WorkerPool(num_processes, start_method=args.start_method, pin=args.pin_workers) as pool:
+        start = time.perf_counter()
+        scan = manifest.scan(image_folder)
+        scan_time = time.perf_counter() - start
+        changed = scan["changed"]
+        print(f"[RUN] Incremental '{image_folder}': {scan['seen']} files, {len(changed)} new/changed, {scan['unchanged']} unchanged, {len(scan['removed'])} removed (scan {scan_time:.3f} s)")
+        failed = process_changed(manifest, changed, pool, num_threads, num_processes, args, cache) if changed else 0
+        elapsed = time.perf_counter() - start
+        agg = manifest.aggregates()
+        print(f"  Time: {elapsed:.6f} s, processed: {len(changed)}, failed: {failed}")
+        print_aggregates(agg)
+        save_json({"folder": image_folder, "manifest": args.manifest, "variant": variant, "seen": scan["seen"], "processed": len(changed), "failed": failed,
+                   "unchanged": scan["unchanged"], "removed": len(scan["removed"]), "scan_time_s": scan_time, "elapsed_s": elapsed, "aggregates": agg}, "results/incremental.json")
+        if args.images_out:
+            with ImageResultWriter(args.images_out, os.path.splitext(args.images_out)[0] + ".json") as writer:
+                for result in manifest.iter_results(image_folder):
+                    writer.write(result)
+            print(f"[OK] Per-image results ({writer.count}) exported to {args.images_out}")
+        if not args.watch:
+            return
+
+        # Mode watch: polling murah pada mtime folder (berubah saat file ditambah/dihapus/di-rename);
+        # scan stat per file hanya bila ada perubahan, file belum stabil, atau tiap WATCH_RESCAN_EVERY poll
+        print(f"[WATCH] Watching '{image_folder}' every {args.poll_interval} s (Ctrl+C untuk berhenti)")
+        stamp = os.stat(image_folder).st_mtime_ns
+        polls = 0
+        retry = False
+        try:
+            while True:
+                time.sleep(args.poll_interval)
+                polls += 1
+                current = os.stat(image_folder).st_mtime_ns
+                if current == stamp and not retry and polls % WATCH_RESCAN_EVERY:
+                    continue
+                stamp = current
+                t0 = time.perf_counter()
+                scan = manifest.scan(image_folder, settle_s=WATCH_SETTLE_S)
+                retry = scan["settling"] > 0
+                if not scan["changed"] and not scan["removed"]:
+                    continue
+                failed = process_changed(manifest, scan["changed"], pool, num_threads, num_processes, args, cache, chunksize=1) if scan["changed"] else 0
+                print(f"[WATCH] {len(scan['changed'])} new/changed, {len(scan['removed'])} removed, failed {failed} in {time.perf_counter() - t0:.3f} s")
+                print_aggregates(manifest.aggregates())
+        except KeyboardInterrupt:
+            print("[WATCH] Stopped")
+
 def main_cli():
     import argparse
     parser = argparse.ArgumentParser(
@@ -43,10 +311,30 @@ def main_cli():
     parser.add_argument("--heavy", action="store_true",
                         help="Menjalankan mode CPU berat (opsional)")
 
+    # Spec graf operasi per gambar; --heavy setara dengan spec HEAVY_SPEC
+    parser.add_argument("--ops", type=str, default=None,
+                        help=f"Spec operasi per gambar, contoh '{HEAVY_SPEC}' (default: '{DEFAULT_SPEC}')")
+
     # Menjalankan beberapa konfigurasi eksperimen
     parser.add_argument("--exp", action="store_true",
                         help="Menjalankan mode eksperimen (beberapa konfigurasi threads/process/data)")
 
+    # Pengaturan benchmark mode eksperimen
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Jumlah run warm-up per konfigurasi yang tidak dihitung (default: 1)")
+    parser.add_argument("--min-runs", type=int, default=5,
+                        help="Jumlah run minimal per konfigurasi (default: 5)")
+    parser.add_argument("--max-runs", type=int, default=30,
+                        help="Jumlah run maksimal per konfigurasi (default: 30)")
+    parser.add_argument("--ci", type=float, default=0.05,
+                        help="Target lebar relatif interval kepercayaan 95%% dari mean (default: 0.05)")
+    parser.add_argument("--page-cache", choices=list(PAGE_CACHE_MODES), default="warm",
+                        help="warm: file dibaca dulu ke page cache; cold: dibuang dari page cache sebelum tiap run")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Bandingkan dengan experiments.json baseline; exit code 1 jika ada regresi")
+    parser.add_argument("--regress-threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help=f"Penurunan throughput relatif yang dianggap regresi (default: {DEFAULT_REGRESSION_THRESHOLD})")
+
     # Melewati pembuatan grafik
     parser.add_argument("--no-plot", action="store_true",
                         help="Melewati pembuatan grafik hasil")
@@ -55,12 +343,146 @@ def main_cli():
     parser.add_argument("--out", type=str, default="results/results.csv",
                         help="Lokasi file CSV output (default: results/results.csv)")
 
+    # Transport frame terdecode dari thread I/O ke process worker
+    parser.add_argument("--transport", choices=["pickle", "shm"], default="pickle",
+                        help="Transport piksel antar stage: pickle (default) atau shm (shared memory, zero-copy)")
+
+    # Decode cepat JPEG (DCT draft) / reduce langsung ke ukuran >= 128x128
+    parser.add_argument("--fast-decode", action="store_true",
+                        help="Decode cepat via JPEG draft/reduce sebelum resample akhir")
+    parser.add_argument("--fast-eps", type=float, default=FAST_DECODE_EPSILON,
+                        help=f"Toleransi selisih avg RGB fast decode vs exact (default: {FAST_DECODE_EPSILON})")
+
+    # Cache hasil per gambar di disk (dipakai ulang antar invocation)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Nonaktifkan cache hasil per gambar (dibaca oleh --stream/--incremental; run terukur hanya mengisinya)")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR,
+                        help=f"Folder cache hasil (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-max-entries", type=int, default=DEFAULT_CACHE_MAX_ENTRIES,
+                        help=f"Batas jumlah entri cache, eviction LRU (default: {DEFAULT_CACHE_MAX_ENTRIES})")
+    parser.add_argument("--cache-key", choices=list(KEY_MODES), default="stat",
+                        help="Key cache: stat (inode+mtime+size, default) atau content (hash isi file)")
+
+    # Engine batch vektor NumPy untuk stage compute
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Proses thumbnail per batch (N,128,128,3) dengan engine vektor NumPy")
+    parser.add_argument("--bench-batch", action="store_true",
+                        help="Benchmark engine batch vs jalur per gambar lalu keluar")
+
+    # Dataset thumbnail memmap (N,128,128,3) uint8 + index sidecar
+    parser.add_argument("--thumbs-out", type=str, default=None,
+                        help="Tulis semua thumbnail 128x128 run NIM ke file .npy memmap ini (+ <nama>_index.json)")
+
+    # Output per gambar (CSV + JSON) yang ditulis inkremental
+    parser.add_argument("--images-out", type=str, default=None,
+                        help="Tulis hasil per gambar ke CSV ini (+ JSON di sebelahnya) secara inkremental")
+    parser.add_argument("--table-out", type=str, default=None, metavar="PATH.npz",
+                        help="Simpan hasil per gambar (config NIM / --coordinator) sebagai tabel kolumnar .npz")
+    parser.add_argument("--stream", action="store_true",
+                        help="Mode streaming: proses seluruh folder data tanpa menampung hasil di memori")
+    parser.add_argument("--aggregate-only", action="store_true",
+                        help="Dengan --stream: worker hanya mengirim statistik parsial (tanpa output per gambar), ringkasan ke *_aggregate.json")
+
+    # Input dari shard tar/zip tanpa ekstraksi
+    parser.add_argument("--shards", type=str, default=None,
+                        help="Proses gambar langsung dari arsip tar/zip: satu arsip, folder shard, atau pola glob")
+    parser.add_argument("--pack-shards", type=str, default=None,
+                        help="Kemas gambar di folder data menjadi shard tar ke folder ini lalu keluar")
+    parser.add_argument("--shard-size", type=int, default=1000,
+                        help="Jumlah gambar per shard untuk --pack-shards (default: 1000)")
+
+    # Pemrosesan inkremental berbasis manifest + mode watch
+    parser.add_argument("--incremental", action="store_true",
+                        help="Proses hanya file baru/berubah di folder data (manifest path/size/mtime/hasil)")
+    parser.add_argument("--manifest", type=str, default=DEFAULT_MANIFEST_PATH,
+                        help=f"Lokasi manifest inkremental (default: {DEFAULT_MANIFEST_PATH})")
+    parser.add_argument("--watch", action="store_true",
+                        help="Setelah run inkremental, pantau folder data dan proses file baru begitu muncul")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Interval polling mode watch dalam detik (default: 1.0)")
+
+    # Pilih proses/thread/chunksize otomatis dari pengukuran probe
+    parser.add_argument("--autotune", action="store_true",
+                        help="Tambah run auto-tune: probe, pilih parameter, tune ulang jika throughput bergeser")
+
+    # Instrumentasi per stage (decode/convert/resize/filter/reduce/queue/IPC/result)
+    parser.add_argument("--trace", type=str, default=None,
+                        help="Aktifkan instrumentasi per stage dan simpan Chrome trace JSON ke path ini")
+
+    # Profiling cProfile parent + tiap worker, digabung menjadi satu file pstats
+    parser.add_argument("--profile", type=str, nargs="?", const="results/profile.pstats", default=None, metavar="PATH",
+                        help="Profil run dengan cProfile di parent dan tiap worker, gabungkan ke file pstats ini (default: results/profile.pstats)")
+    parser.add_argument("--profile-top", type=int, default=profiler.DEFAULT_TOP,
+                        help="Jumlah fungsi terpanas di ringkasan profil")
+
+    # Fault tolerance engine hybrid: timeout per task, retry, respawn pool, eksekusi spekulatif
+    parser.add_argument("--task-timeout", type=float, default=None,
+                        help="Batas waktu satu task worker (detik); worker yang melewatinya dimatikan dan task diulang")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Jumlah pengulangan task yang crash/timeout sebelum file ditandai gagal")
+    parser.add_argument("--speculate-pct", type=float, default=DEFAULT_SPECULATE_PCT,
+                        help="Duplikasi task di ekor run yang lebih lambat dari persentil durasi ini (0 = nonaktif)")
+
+    # Penjadwalan sadar ukuran (estimasi biaya dari header/ukuran file)
+    parser.add_argument("--schedule", choices=list(SCHEDULES), default="input",
+                        help="Urutan dispatch: input, lpt (terbesar dulu menurut piksel header) atau lpt-bytes (menurut ukuran file)")
+
+    # Engine paralel untuk konfigurasi NIM/alternatif dan --stream
+    parser.add_argument("--engine", choices=["hybrid", "processes", "threads"], default="hybrid",
+                        help="hybrid: thread decode + proses compute; processes: file utuh per proses; threads: file utuh per thread (tanpa proses)")
+
+    # Startup: start method pool proses dan benchmark time-to-first-result
+    parser.add_argument("--start-method", choices=list(START_METHODS), default=None,
+                        help="Start method pool proses (default: bawaan platform); forkserver mem-preload PIL, NumPy dan modules.processing sekali")
+    # Ukuran/penempatan worker dari mesin sebenarnya (affinity, kuota cgroup, NUMA)
+    parser.add_argument("--pin-workers", action="store_true",
+                        help="Pin tiap worker pool ke CPU berbeda (bergantian antar node NUMA)")
+    parser.add_argument("--fit-cpus", action="store_true",
+                        help="Batasi jumlah proses NIM ke paralelisme efektif (affinity + kuota cgroup)")
+    parser.add_argument("--bench-startup", action="store_true",
+                        help="Benchmark waktu sampai hasil pertama per start method (interpreter baru) lalu keluar")
+
+    # Mode daemon: Unix socket + micro-batching ke pool warm (lihat loadgen.py)
+    parser.add_argument("--serve", nargs="?", const=DEFAULT_SOCKET, default=None, metavar="SOCKET",
+                        help=f"Jalankan daemon di Unix socket ini (default {DEFAULT_SOCKET}) sampai Ctrl+C/SIGTERM")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="Ukuran micro-batch maksimum mode --serve")
+    parser.add_argument("--batch-wait-ms", type=float, default=DEFAULT_BATCH_WAIT_MS,
+                        help="Waktu tunggu maksimum request pertama sebelum micro-batch dikirim (ms)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Request maksimum di antrian mode --serve; request berikutnya ditolak (overloaded)")
+
+    # Mode multi-node: coordinator membagi file menjadi lease, worker menarik lease lewat TCP
+    parser.add_argument("--coordinator", type=str, default=None, metavar="[HOST:]PORT",
+                        help="Jalankan coordinator untuk seluruh folder data di alamat ini (host default 127.0.0.1, port 0 = acak)")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Jumlah worker lokal yang dijalankan bersama --coordinator")
+    parser.add_argument("--lease-size", type=int, default=DEFAULT_LEASE_SIZE,
+                        help="Jumlah file per lease")
+    parser.add_argument("--lease-ttl", type=float, default=DEFAULT_LEASE_TTL,
+                        help="Lease tanpa kabar selama ini (detik) diberikan ke worker lain")
+    parser.add_argument("--worker", type=str, default=None, metavar="HOST:PORT",
+                        help="Jalankan worker yang menarik lease dari coordinator ini (proses per worker: --worker-processes)")
+    parser.add_argument("--worker-processes", type=int, default=1,
+                        help="Jumlah proses pool di tiap worker --worker atau --local-workers (1 = serial)")
+    parser.add_argument("--token", type=str, default=os.environ.get(TOKEN_ENV),
+                        help=f"Token bersama coordinator/worker (default dari {TOKEN_ENV}); wajib dipakai bila coordinator listen di luar loopback")
+
     # Mode verbose untuk logging detail
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Menampilkan log proses (I/O dan CPU progress)")
 
     args = parser.parse_args()
 
+    # --ops menggantikan spec bawaan --heavy; diteruskan ke pipeline lewat argumen ops
+    if args.ops is not None:
+        try:
+            plan_ops(ops=args.ops)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.batch_size and args.engine != "hybrid":
+        parser.error("--batch-size hanya didukung --engine hybrid")
+
     # Parse NIM -> parameters
     num_threads, num_processes, num_data, _, _, _ = parse_nim(NIM)
     # Mengatur seed reproducibility berdasarkan NIM
@@ -77,11 +499,78 @@ def main_cli():
     print("Project: Parallel Image Processor (Thread + ProcessPool)")
     print("===========================================")
     print(f"Computed params -> threads: {num_threads}, processes: {num_processes}, data: {num_data}")
+    cpu = cpu_info()
+    quota = "none" if cpu["cgroup_quota"] is None else f"{cpu['cgroup_quota']:g} ({cpu['cgroup_source']})"
+    print(f"CPU: os.cpu_count {cpu['os_cpu_count']}, affinity {cpu['affinity']}, cgroup quota {quota}, NUMA nodes {len(cpu['numa_nodes'])} -> effective parallelism {cpu['effective']}")
+    if num_processes > cpu["effective"]:
+        if args.fit_cpus:
+            print(f"[INFO] --fit-cpus: processes {num_processes} -> {cpu['effective']}")
+            num_processes = cpu["effective"]
+        else:
+            print(f"[WARN] {num_processes} processes > {cpu['effective']} usable CPUs: workers will oversubscribe (see --fit-cpus)")
+    print(f"Ops plan: {describe(plan_ops(args.heavy, args.ops))}")
+    runtime = runtime_info()
+    print(f"Python {runtime['python']}: free-threaded build {'YES' if runtime['free_threaded_build'] else 'NO'}, GIL {'enabled' if runtime['gil_enabled'] else 'disabled'}, engine {args.engine}")
     print()
 
+    if args.trace and args.exp:
+        # Eksperimen mengulang run puluhan kali; trace hanya untuk run tunggal
+        print("[WARN] --trace diabaikan pada mode --exp")
+        args.trace = None
+    if args.trace:
+        instrument.enable()
+    if args.profile and args.exp:
+        # Profil hanya untuk run tunggal (config NIM atau --stream)
+        print("[WARN] --profile diabaikan pada mode --exp")
+        args.profile = None
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir, max_entries=args.cache_max_entries, key_mode=args.cache_key)
+
     # Pastikan folder data ada
     files = []
     image_folder = "data"  # Folder tetap
+
+    if args.pack_shards:
+        shard_paths = write_shards(gather_image_files(image_folder, sys.maxsize), args.pack_shards, per_shard=args.shard_size)
+        print(f"[OK] {len(shard_paths)} shards written to {args.pack_shards}")
+        return
+
+    if args.serve:
+        final = serve(args.serve, num_processes, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, max_batch=args.max_batch, batch_wait_ms=args.batch_wait_ms, max_queue=args.max_queue, start_method=args.start_method, pin=args.pin_workers)
+        p50 = "-" if final["p50_ms"] is None else f"{final['p50_ms']:.2f}"
+        p99 = "-" if final["p99_ms"] is None else f"{final['p99_ms']:.2f}"
+        print(f"[SERVE] Stopped: {final['requests']} requests, failed {final['failed']}, batches {final['batches']} (avg {final['avg_batch']:.1f}), p50 {p50} ms, p99 {p99} ms")
+        return
+
+    if args.worker:
+        host, port = parse_address(args.worker)
+        res = run_worker(host, port, args.worker_processes, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, token=args.token)
+        print(f"[WORKER {res['worker']}] leases {res['leases']}, processed {res['processed']}")
+        return
+
+    if args.coordinator:
+        run_distributed(image_folder, args.images_out or "results/images.csv", args)
+        return
+
+    if args.shards:
+        run_shards(args.shards, args.images_out or "results/images.csv", num_processes, args)
+        return
+
+    if args.incremental or args.watch:
+        run_incremental(image_folder, num_threads, num_processes, args, cache)
+        return
+
+    if args.stream:
+        # Mode streaming: semua file di folder, hasil ditulis per gambar saat selesai
+        if args.schedule != "input":
+            print(f"[WARN] --schedule {args.schedule} butuh daftar file lengkap; diabaikan pada mode --stream")
+        if args.profile:
+            profiler.start()
+        run_stream(image_folder, args.images_out or "results/images.csv", num_threads, num_processes, args, cache)
+        return
+
     if not files:
         files = gather_image_files(image_folder, num_data)
 
@@ -93,6 +582,35 @@ def main_cli():
     data_count = len(files)
     print(f"[INFO] Using {data_count} images from '{image_folder}'")
 
+    fast_check = None
+    if args.fast_decode:
+        # Cek toleransi fast decode terhadap jalur exact pada sampel gambar
+        fast_check = verify_fast_decode(files[:20], heavy=args.heavy, ops=args.ops, epsilon=args.fast_eps)
+        status = "OK" if fast_check["within_tolerance"] else "FAIL"
+        print(f"[CHECK] Fast decode tolerance: max |diff| {fast_check['max_abs_diff']:.4f} <= {fast_check['epsilon']} ({status}, {fast_check['checked']} images)")
+
+    if args.bench_startup:
+        # Interpreter baru per pengukuran: import + spawn pool + task pertama (file pertama)
+        rows = run_startup_benchmark(files[0], num_processes)
+        print("\nStartup Benchmark (time-to-first-result, median):")
+        for r in rows:
+            print(f"  {r['method']:<10} first result {r['first_result_s']:.3f} s  (import {r['import_s']:.3f} s, pool {r['pool_s']:.3f} s, first task {r['first_task_s']:.3f} s, matplotlib loaded: {r['matplotlib_loaded']})")
+        save_json({"file": os.path.basename(files[0]), "processes": num_processes, "rows": rows}, "results/startup_benchmark.json")
+        print("[OK] Benchmark saved to results/startup_benchmark.json")
+        return
+
+    if args.bench_batch:
+        # Benchmark stage compute: per gambar vs engine batch (thumbnail sudah didecode)
+        thumbs = np.stack([load_image_thumbnail(p, fast=args.fast_decode)["thumb"] for p in files])
+        sizes = [args.batch_size] if args.batch_size else [8, 32, 128]
+        rows = benchmark_batch_compute(thumbs, sizes, heavy=args.heavy, ops=args.ops)
+        print("\nBatch Engine Benchmark (compute stage):")
+        for r in rows:
+            print(f"  {r['engine']:<9} batch={r['batch_size']:<4} {r['images_per_s']:10.1f} img/s  speedup {r['speedup']:.2f}x")
+        save_json({"heavy": args.heavy, "ops": args.ops, "images": len(files), "rows": rows}, "results/batch_benchmark.json")
+        print("[OK] Benchmark saved to results/batch_benchmark.json")
+        return
+
     if args.exp:
         # Jalankan mode eksperimen
         experiment_configs = [
@@ -100,10 +618,20 @@ def main_cli():
             {"label": "nim_config", "threads": num_threads, "processes": num_processes, "data": num_data},
             {"label": "more_threads", "threads": min(max(num_threads * 2, num_threads + 1), 16), "processes": num_processes, "data": num_data},
             {"label": "more_processes", "threads": num_threads, "processes": min(num_processes + 1, 16), "data": num_data},
-            {"label": "less_data", "threads": num_threads, "processes": num_processes, "data": max(num_data // 2, 1)}
+            {"label": "less_data", "threads": num_threads, "processes": num_processes, "data": max(num_data // 2, 1)},
+            # Perbandingan engine pada data penuh: file utuh per thread vs file utuh per proses
+            {"label": "engine_threads", "engine": "threads", "threads": max(num_threads, num_processes), "processes": 1, "data": num_data},
+            {"label": "engine_processes", "engine": "processes", "threads": num_threads, "processes": num_processes, "data": num_data}
         ]
 
-        exp_result = run_experiments(experiment_configs, files, 3, args.verbose, args.heavy)
+        # Baseline dibaca sebelum run agar --compare results/experiments.json tetap aman
+        baseline = load_baseline(args.compare) if args.compare else None
+        if cache is not None:
+            # Run berulang dengan cache hanya mengukur hit cache
+            print("[INFO] Cache hasil tidak dipakai pada mode --exp (run yang diukur selalu memproses gambar)")
+        with WorkerPool(num_processes, start_method=args.start_method, pin=args.pin_workers) as exp_pool:
+            exp_result = run_experiments(experiment_configs, files, args.min_runs, args.verbose, args.heavy, pool=exp_pool, ops=args.ops, transport=args.transport, fast=args.fast_decode, batch_size=args.batch_size,
+                                         warmup=args.warmup, max_runs=args.max_runs, rel_ci=args.ci, page_cache=args.page_cache)
         exp_results = exp_result["results"]
 
         # Attach avg_rgb and color_name to each result
@@ -125,6 +653,21 @@ def main_cli():
         print("\nExperiments Results:")
         print(table)
 
+        # Interval kepercayaan dan outlier per konfigurasi
+        for r in exp_results:
+            note = "" if r["converged"] else " (CI belum tercapai)"
+            print(f"  {r['label']:<16} {r['time_s']:.6f}s  95% CI [{r['ci_low_s']:.6f}, {r['ci_high_s']:.6f}]  runs {r['runs']}  outliers {len(r['outliers'])}{note}")
+
+        comparison = None
+        if baseline is not None:
+            comparison = compare_results(exp_results, baseline, args.regress_threshold)
+            save_json(comparison, "results/experiments_compare.json")
+            print(f"\nCompare vs {args.compare} (threshold {args.regress_threshold:.1%}):")
+            for c in comparison["rows"]:
+                flag = "REGRESSION" if c["regression"] else "ok"
+                sig = "" if c["significant"] is None else (" significant" if c["significant"] else " within noise")
+                print(f"  {c['label']:<16} {c['baseline_throughput']:10.2f} -> {c['throughput']:10.2f} img/s ({c['change']:+.1%}, CI bound {c['change_bound']:+.1%}) {flag}{sig}")
+
         # Print boxed summary for best config
         best_time = min(r["time_s"] for r in exp_results)
         best_config = next(r for r in exp_results if r["time_s"] == best_time)
@@ -136,8 +679,12 @@ def main_cli():
             f.write("=" * 50 + "\n")
             f.write(f"Name: {NAME}\n")
             f.write(f"NIM: {NIM}\n")
+            f.write(f"Python: {runtime['python']} (free-threaded build: {runtime['free_threaded_build']}, GIL enabled: {runtime['gil_enabled']})\n")
             f.write(f"Serial Baseline Time: {exp_result['serial_baseline']:.6f}s\n\n")
             f.write(table + "\n\n")
+            for r in exp_results:
+                f.write(f"{r['label']}: mean {r['time_s']:.6f}s, 95% CI [{r['ci_low_s']:.6f}, {r['ci_high_s']:.6f}], runs {r['runs']} (+{r['warmup']} warm-up), outliers {len(r['outliers'])}, page cache {r['page_cache']}\n")
+            f.write("\n")
             best_time = min(r["time_s"] for r in exp_results)
             best_config = next(r for r in exp_results if r["time_s"] == best_time)
             f.write(f"Best Time Config: {best_config['label']} ({best_time:.6f}s)\n")
@@ -154,17 +701,35 @@ def main_cli():
             f.write(f"Total configs: {len(exp_results)}\n")
             f.write(f"Files created: {exp_csv}, {exp_json}, time_vs_threads.png, time_vs_processes.png, speedup_vs_config.png\n")
             f.write(f"Table printed: YES\n")
-            f.write(f"Median times used: YES\n")
+            f.write(f"Mean times with 95% CI used: YES\n")
+            f.write(f"Converged configs: {sum(1 for r in exp_results if r['converged'])}/{len(exp_results)}\n")
+            if comparison is not None:
+                f.write(f"Regressions vs {args.compare}: {', '.join(comparison['regressions']) or 'none'}\n")
             f.write("Status: SUCCESS\n")
 
+        if comparison is not None and comparison["regressions"]:
+            print(f"[FAIL] Regresi throughput: {', '.join(comparison['regressions'])}")
+            sys.exit(1)
         return
 
     results_rows = []
+    traces = {}
+
+    if args.profile:
+        # Sebelum pool dibuat: initializer worker membaca folder dump profiler
+        profiler.start()
+
+    # Run serial/NIM/alt/autotune dibandingkan satu sama lain: semuanya tanpa cache, karena
+    # baseline serial akan mengisi cache dan run paralel berikutnya hanya mengukur hit cache.
+    # Cache diisi dari hasil serial setelah semua run yang diukur selesai
+    if cache is not None:
+        print("[INFO] Cache hasil tidak dibaca pada run yang diukur; diisi setelah pengukuran untuk --stream / --incremental")
 
     # 1) Serial baseline
     print("[RUN] Serial baseline (no concurrency)...")
-    serial_res = run_serial(files, verbose=args.verbose, heavy=args.heavy)
+    serial_res = run_serial(files, verbose=args.verbose, heavy=args.heavy, ops=args.ops, fast=args.fast_decode)
     T_serial = serial_res["elapsed"]
+    collect_trace("serial", traces)
     print(f"  Serial time: {T_serial:.6f} s, throughput: {serial_res['throughput']:.6f} img/s")
     results_rows.append({
         "mode":"serial",
@@ -176,15 +741,37 @@ def main_cli():
         "speedup": 1.0,
         "efficiency_percent": 100.0
     })
-    # Gunakan serial avg_colors untuk audit
-    all_avg_colors = serial_res["avg_colors"]
-
-    # 2) NIM config
-    print(f"[RUN] Config NIM: threads={num_threads}, processes={num_processes}")
-    nim_res = run_configuration(num_threads, num_processes, files, verbose=args.verbose, heavy=args.heavy)
+    # Gunakan statistik berjalan run serial untuk audit
+    serial_stats = serial_res["aggregate"]
+
+    # Pool proses warm dipakai ulang untuk semua konfigurasi paralel
+    pool = WorkerPool(num_processes, start_method=args.start_method, pin=args.pin_workers)
+
+    # 2) NIM config (hasil per gambar ditulis inkremental jika --images-out)
+    # Efisiensi per worker engine: thread untuk engine threads, proses untuk lainnya
+    workers_of = (lambda t, p: t) if args.engine == "threads" else (lambda t, p: p)
+    print(f"[RUN] Config NIM: engine={args.engine}, threads={num_threads}, processes={num_processes}")
+    writer = ImageResultWriter(args.images_out, os.path.splitext(args.images_out)[0] + ".json") if args.images_out else None
+    if args.thumbs_out:
+        create_store(args.thumbs_out, len(files))
+    try:
+        nim_res = run_configuration(num_threads, num_processes, files, verbose=args.verbose, heavy=args.heavy, ops=args.ops, pool=pool, transport=args.transport, fast=args.fast_decode, batch_size=args.batch_size, sink=writer.write if writer else None, thumb_store=args.thumbs_out,
+                                    task_timeout=args.task_timeout, max_retries=args.max_retries, speculate_pct=args.speculate_pct, schedule=args.schedule, engine=args.engine)
+    finally:
+        if writer is not None:
+            writer.close()
+    if args.thumbs_out:
+        failed_rows = nim_res["table"].failed_rows().tolist()
+        index_file = save_index(args.thumbs_out, [os.path.basename(f) for f in files], failed_rows)
+        print(f"  Thumbnails: {args.thumbs_out} ({len(files)} rows, {len(failed_rows)} failed), index {index_file}")
+    if args.table_out:
+        table_file = nim_res["table"].save(args.table_out)
+        print(f"  Result table: {table_file} ({nim_res['table'].summary()['bytes']} B columns, {len(nim_res['table'].names)} names)")
+    nim_placement = list(pool.placement)
     T_nim = nim_res["elapsed"]
+    collect_trace("nim_config", traces)
     speedup_nim = T_serial / T_nim if T_nim > 0 else float("inf")
-    efficiency_nim = (speedup_nim / max(1, num_processes)) * 100.0
+    efficiency_nim = (speedup_nim / max(1, workers_of(num_threads, num_processes))) * 100.0
     results_rows.append({
         "mode":"nim_config",
         "num_threads": num_threads,
@@ -196,15 +783,20 @@ def main_cli():
         "efficiency_percent": f"{efficiency_nim:.2f}"
     })
     print(f"  Time: {T_nim:.6f} s, throughput: {nim_res['throughput']:.6f} img/s, speedup: {speedup_nim:.3f}, efficiency: {efficiency_nim:.2f}%")
+    print(f"  Transport {args.transport}: pickled {nim_res['bytes_pickled']} B, shared {nim_res['bytes_shared']} B")
+    print_fault(nim_res["fault"])
+    print_schedule(nim_res["schedule"])
 
     # 3) Alternative config
     alt_threads = max(2, num_threads * 2)
     alt_procs = max(1, num_processes + 1)
-    print(f"[RUN] Alternative config: threads={alt_threads}, processes={alt_procs}")
-    alt_res = run_configuration(alt_threads, alt_procs, files, verbose=args.verbose, heavy=args.heavy)
+    print(f"[RUN] Alternative config: engine={args.engine}, threads={alt_threads}, processes={alt_procs}")
+    alt_res = run_configuration(alt_threads, alt_procs, files, verbose=args.verbose, heavy=args.heavy, ops=args.ops, pool=pool, transport=args.transport, fast=args.fast_decode, batch_size=args.batch_size,
+                                task_timeout=args.task_timeout, max_retries=args.max_retries, speculate_pct=args.speculate_pct, schedule=args.schedule, engine=args.engine)
     T_alt = alt_res["elapsed"]
+    collect_trace("alt_config", traces)
     speedup_alt = T_serial / T_alt if T_alt > 0 else float("inf")
-    efficiency_alt = (speedup_alt / max(1, alt_procs)) * 100.0
+    efficiency_alt = (speedup_alt / max(1, workers_of(alt_threads, alt_procs))) * 100.0
     results_rows.append({
         "mode":"alt_config",
         "num_threads": alt_threads,
@@ -216,6 +808,46 @@ def main_cli():
         "efficiency_percent": f"{efficiency_alt:.2f}"
     })
     print(f"  Time: {T_alt:.6f} s, throughput: {alt_res['throughput']:.6f} img/s, speedup: {speedup_alt:.3f}, efficiency: {efficiency_alt:.2f}%")
+    print_fault(alt_res["fault"])
+    print_schedule(alt_res["schedule"])
+
+    # 4) Auto-tune (opsional): parameter dipilih dari probe, bukan dari NIM
+    autotune_info = None
+    if args.autotune:
+        print("[RUN] Autotune: probing...")
+        auto_res = run_autotuned(files, pool=pool, heavy=args.heavy, ops=args.ops, fast=args.fast_decode, verbose=args.verbose)
+        autotune_info = auto_res["autotune"]
+        collect_trace("autotune", traces)
+        final = autotune_info["final"]
+        T_auto = auto_res["elapsed"]
+        speedup_auto = T_serial / T_auto if T_auto > 0 else float("inf")
+        efficiency_auto = (speedup_auto / max(1, final["processes"])) * 100.0
+        results_rows.append({
+            "mode":"autotune",
+            "num_threads": final["threads"],
+            "num_processes": final["processes"],
+            "data_count": data_count,
+            "time_s": f"{T_auto:.6f}",
+            "throughput": f"{auto_res['throughput']:.6f}",
+            "speedup": f"{speedup_auto:.6f}",
+            "efficiency_percent": f"{efficiency_auto:.2f}"
+        })
+        print(f"  Chosen: engine={final['engine']}, threads={final['threads']}, processes={final['processes']}, chunksize={final['chunksize']} (retunes: {autotune_info['retunes']})")
+        print(f"  Time: {T_auto:.6f} s, throughput: {auto_res['throughput']:.6f} img/s, speedup: {speedup_auto:.3f}, efficiency: {efficiency_auto:.2f}%")
+    pool.shutdown()
+
+    if cache is not None:
+        stored = fill_cache(cache, files, serial_res["table"], heavy=args.heavy, ops=args.ops, fast=args.fast_decode)
+        cache.evict()
+        # Run terukur tidak membaca cache (hits/misses 0); hasil serial disimpan untuk
+        # --stream / --incremental berikutnya
+        cache_stats = dict(cache.stats(), stored=stored, read_by=["--stream", "--incremental"])
+        print(f"[INFO] Cache: stored {stored} results, entries {cache_stats['entries']} (dibaca oleh --stream / --incremental)")
+    else:
+        cache_stats = {"enabled": False}
+
+    trace_summary = save_trace(traces, args.trace) if args.trace else None
+    profile_summary = finish_profile(args) if args.profile else None
 
     # Simpan CSV & JSON
     save_csv(results_rows, out_csv)
@@ -223,7 +855,29 @@ def main_cli():
         "name": NAME,
         "nim": NIM,
         "params": {"threads": num_threads, "processes": num_processes, "data": num_data},
-        "results": results_rows
+        "engine": args.engine,
+        "runtime": runtime,
+        # Paralelisme efektif yang terdeteksi dan penempatan worker pool config NIM
+        "cpu": dict(cpu, processes=num_processes, pinned=args.pin_workers, placement=nim_placement),
+        "results": results_rows,
+        "transport": {
+            "mode": args.transport,
+            "nim_config": {"bytes_pickled": nim_res["bytes_pickled"], "bytes_shared": nim_res["bytes_shared"]},
+            "alt_config": {"bytes_pickled": alt_res["bytes_pickled"], "bytes_shared": alt_res["bytes_shared"]}
+        },
+        "fast_decode": {"enabled": args.fast_decode, "check": fast_check},
+        "cache": cache_stats,
+        # Kegagalan per file dan counter crash/timeout/retry/spekulasi per konfigurasi
+        "failures": {"serial": serial_res["failures"], "nim_config": nim_res["failures"], "alt_config": alt_res["failures"]},
+        "fault": {"task_timeout": args.task_timeout, "max_retries": args.max_retries, "speculate_pct": args.speculate_pct,
+                  "nim_config": nim_res["fault"], "alt_config": alt_res["fault"]},
+        "schedule": {"policy": args.schedule, "nim_config": nim_res["schedule"], "alt_config": alt_res["schedule"]},
+        # Statistik RGB global run serial: mean/stddev, min/max, histogram per channel
+        "aggregate": serial_stats.to_dict(),
+        "autotune": autotune_info,
+        "trace": trace_summary,
+        # Top-N fungsi terpanas (self time) gabungan parent + worker, lihat file pstats-nya
+        "profile": profile_summary
     }
     save_json(summary, out_json)
     print(f"[OK] Results saved to {out_csv} and {out_json}")
@@ -236,8 +890,8 @@ def main_cli():
         print("[INFO] Plot generation skipped (--no-plot).")
 
     # Audit warna dan ringkasan
-    global_avg, stds = compute_global_avg(all_avg_colors)
-    variation = audit_color_variation(all_avg_colors)
+    global_avg, stds = compute_global_avg(serial_stats)
+    variation = audit_color_variation(serial_stats)
     variation_str = "YES" if variation else "NO"
 
     # Cetak ringkasan dalam kotak untuk nim_config
@@ -247,7 +901,7 @@ def main_cli():
 
     # Cetak contoh rata-rata warna
     print("Sample avg colors (first 5):")
-    for filename, (r, g, b) in zip([os.path.basename(f) for f in files[:5]], all_avg_colors[:5]):
+    for filename, (r, g, b) in zip([os.path.basename(f) for f in files[:5]], serial_res["table"].rgb[:5].tolist()):
         color_name, rgb_int = color_name_from_rgb((r, g, b))
         print(f" - {filename}: ({r:.1f}, {g:.1f}, {b:.1f}) -> rgb({rgb_int[0]},{rgb_int[1]},{rgb_int[2]}) ({color_name})")
 
@@ -0,0 +1,117 @@
+# modules/aggregate.py
+# Statistik RGB global yang online dan bisa digabung: mean/variansi (Welford, digabung dengan
+# rumus paralel Chan), min/max dan histogram per channel atas rata-rata per gambar.
+# Memori O(1) terhadap jumlah gambar; worker bisa mengisi state parsial lalu parent menggabungkannya.
+import math
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import numpy as np
+
+# Jumlah bin histogram rata-rata per gambar per channel (rentang 0-256)
+HIST_BINS = 64
+
+class ColorStats:
+    # Hasil gagal (NaN) tidak masuk statistik, hanya dihitung di `failed`
+    def __init__(self, bins: int = HIST_BINS):
+        self.n = 0
+        self.failed = 0
+        self.mean = np.zeros(3)
+        self.m2 = np.zeros(3)
+        self.min = np.full(3, math.inf)
+        self.max = np.full(3, -math.inf)
+        self.hist = np.zeros((3, bins), dtype=np.int64)
+
+    @property
+    def bins(self) -> int:
+        return self.hist.shape[1]
+
+    def _bin(self, values: np.ndarray) -> np.ndarray:
+        return np.clip((values * (self.bins / 256.0)).astype(np.int64), 0, self.bins - 1)
+
+    def add(self, rgb: Tuple[float, float, float]) -> None:
+        # Satu rata-rata per gambar (update Welford)
+        x = np.asarray(rgb, dtype=np.float64)
+        if np.isnan(x).any():
+            self.failed += 1
+            return
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min)
+        np.maximum(self.max, x, out=self.max)
+        self.hist[(0, 1, 2), self._bin(x)] += 1
+
+    def add_batch(self, values: np.ndarray) -> None:
+        # Banyak rata-rata sekaligus (N, 3): statistik batch dihitung vektor lalu digabung
+        values = np.asarray(values, dtype=np.float64).reshape(-1, 3)
+        ok = ~np.isnan(values).any(axis=1)
+        self.failed += int((~ok).sum())
+        values = values[ok]
+        if not len(values):
+            return
+        part = ColorStats(self.bins)
+        part.n = len(values)
+        part.mean = values.mean(axis=0)
+        part.m2 = ((values - part.mean) ** 2).sum(axis=0)
+        part.min = values.min(axis=0)
+        part.max = values.max(axis=0)
+        idx = self._bin(values)
+        for c in range(3):
+            part.hist[c] = np.bincount(idx[:, c], minlength=self.bins)
+        self.merge(part)
+
+    def merge(self, other: "ColorStats") -> "ColorStats":
+        # Gabungkan state parsial lain ke state ini (urutan penggabungan tidak berpengaruh)
+        self.failed += other.failed
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean.copy(), other.m2.copy()
+        else:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * (other.n / n)
+            self.m2 = self.m2 + other.m2 + delta * delta * (self.n * other.n / n)
+            self.n = n
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        self.hist += other.hist
+        return self
+
+    @property
+    def std(self) -> np.ndarray:
+        # Stddev populasi (ddof=0, sama dengan np.std bawaan)
+        return np.sqrt(self.m2 / self.n) if self.n else np.zeros(3)
+
+    def avg_rgb(self) -> Tuple[float, float, float]:
+        return tuple(float(v) for v in self.mean) if self.n else (0.0, 0.0, 0.0)
+
+    def std_rgb(self) -> Tuple[float, float, float]:
+        return tuple(float(v) for v in self.std)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Ringkasan siap JSON
+        return {
+            "count": self.n,
+            "failed": self.failed,
+            "avg_rgb": self.avg_rgb(),
+            "std_rgb": self.std_rgb(),
+            "min_rgb": tuple(float(v) for v in self.min) if self.n else None,
+            "max_rgb": tuple(float(v) for v in self.max) if self.n else None,
+            "hist_bins": self.bins,
+            "hist": {ch: self.hist[c].tolist() for c, ch in enumerate("rgb")}
+        }
+
+    @classmethod
+    def from_values(cls, values: Iterable[Tuple[float, float, float]], bins: int = HIST_BINS) -> "ColorStats":
+        agg = cls(bins)
+        values = list(values)
+        if values:
+            agg.add_batch(np.asarray(values, dtype=np.float64))
+        return agg
+
+def reduce_call(fn: Callable, *args) -> ColorStats:
+    # Wrapper task di worker: jalankan fn (hasil per gambar) lalu lipat menjadi state parsial,
+    # sehingga hanya statistik (bukan data per gambar) yang dikirim balik ke parent
+    results: List[tuple] = fn(*args)
+    return ColorStats.from_values(r[1:4] for r in results)
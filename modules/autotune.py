@@ -0,0 +1,163 @@
+# modules/autotune.py
+# Auto-tuning: pilih proses, thread, chunksize dan serial-vs-paralel dari pengukuran langsung
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+from modules.aggregate import ColorStats
+from modules.cache import ResultCache
+from modules.io import load_image_to_bytes
+from modules.pipeline import WorkerPool, iter_process
+from modules.placement import effective_cpus
+from modules.processing import cache_variant, drain_errors, process_image_file
+from modules.results import ResultTable
+
+def _noop(x: int) -> int:
+    # Task kosong untuk mengukur overhead dispatch (submit + pickle + hasil)
+    return x
+
+def measure_dispatch_overhead(pool: WorkerPool, samples: int = 32) -> float:
+    # Rata-rata waktu bolak-balik satu task kosong di pool (detik)
+    start = time.perf_counter()
+    for fut in [pool.submit(_noop, i) for i in range(samples)]:
+        fut.result()
+    return (time.perf_counter() - start) / samples
+
+def probe_tasks(paths: List[str], heavy: bool = False, fast: bool = False, ops: Optional[str] = None) -> Dict[str, Any]:
+    # Jalankan batch probe serial: ukur waktu per task (field elapsed dari process_image_file)
+    # dan porsi decode (load_image_to_bytes) dari waktu tersebut. "results" berisi
+    # (hasil, alasan_gagal_atau_None) per path agar file probe tidak perlu diproses ulang
+    task_times = []
+    decode_times = []
+    results = []
+    for p in paths:
+        drain_errors()
+        result = process_image_file(p, heavy=heavy, ops=ops, fast=fast)
+        reasons = drain_errors()
+        results.append((result, reasons[-1][1] if reasons else None))
+        if not math.isnan(result[1]):
+            task_times.append(result[4])
+        t0 = time.perf_counter()
+        try:
+            load_image_to_bytes(p, fast=fast)
+            decode_times.append(time.perf_counter() - t0)
+        except RuntimeError:
+            pass
+    task = sum(task_times) / len(task_times) if task_times else 0.0
+    decode = sum(decode_times) / len(decode_times) if decode_times else 0.0
+    return {"samples": len(task_times), "task_s": task, "decode_s": min(decode, task), "results": results}
+
+def choose_params(task_s: float, decode_s: float, dispatch_s: float, remaining: int, max_processes: int, max_threads: int) -> Dict[str, Any]:
+    # Model sederhana: T_serial = n * t, T_paralel = n * t / p + n * d / chunk.
+    # Paralel hanya dipilih jika estimasinya lebih cepat dari serial.
+    reasons = []
+    if task_s <= 0 or remaining <= 0:
+        return {"engine": "serial", "processes": 1, "threads": 1, "chunksize": 1, "reason": "probe tidak menghasilkan waktu task yang valid"}
+    # Chunk cukup besar agar overhead dispatch <= 5% waktu compute chunk
+    chunksize = max(1, math.ceil(dispatch_s / (0.05 * task_s)))
+    best = {"processes": 1, "estimate_s": remaining * task_s}
+    for p in range(2, max_processes + 1):
+        # Jaga keseimbangan beban: minimal ~4 chunk per proses
+        chunk = max(1, min(chunksize, remaining // (p * 4) or 1))
+        estimate = remaining * task_s / p + remaining * dispatch_s / chunk
+        if estimate < best["estimate_s"]:
+            best = {"processes": p, "estimate_s": estimate, "chunksize": chunk}
+    serial_estimate = remaining * task_s
+    if best["processes"] == 1:
+        reasons.append(f"serial: estimasi {serial_estimate:.3f}s, paralel tidak lebih cepat (t_task={task_s * 1e3:.2f}ms, dispatch={dispatch_s * 1e3:.2f}ms, cpu={max_processes})")
+        return {"engine": "serial", "processes": 1, "threads": 1, "chunksize": 1, "estimate_s": serial_estimate, "reason": "; ".join(reasons)}
+    p = best["processes"]
+    # Thread decode cukup agar laju decode >= laju compute di p proses
+    compute_s = max(task_s - decode_s, 1e-6)
+    threads = max(1, min(max_threads, math.ceil(p * decode_s / compute_s)))
+    reasons.append(f"hybrid: estimasi {best['estimate_s']:.3f}s vs serial {serial_estimate:.3f}s dengan {p} proses")
+    reasons.append(f"chunksize {best['chunksize']}: overhead dispatch {dispatch_s * 1e3:.2f}ms <= 5% dari t_task {task_s * 1e3:.2f}ms")
+    reasons.append(f"threads {threads}: decode {decode_s * 1e3:.2f}ms vs compute {compute_s * 1e3:.2f}ms per gambar")
+    return {"engine": "hybrid", "processes": p, "threads": threads, "chunksize": best["chunksize"], "estimate_s": best["estimate_s"], "reason": "; ".join(reasons)}
+
+def run_autotuned(file_list: List[str], pool: Optional[WorkerPool] = None, heavy: bool = False, fast: bool = False, cache: Optional[ResultCache] = None, max_processes: Optional[int] = None, max_threads: Optional[int] = None, probe_size: Optional[int] = None, drift: float = 0.3, segment_size: Optional[int] = None, verbose: bool = False, sink: Optional[Callable[[tuple, Optional[str]], None]] = None, ops: Optional[str] = None) -> Dict[str, Any]:
+    # Jalankan file_list dengan parameter hasil auto-tune.
+    # 1) probe serial beberapa file, 2) ukur overhead dispatch, 3) pilih parameter,
+    # 4) proses sisa file per segmen dan tune ulang jika throughput menyimpang > drift.
+    # Hasil probe langsung masuk tabel/sink/cache; loop segmen mulai setelah file probe.
+    if pool is None:
+        with WorkerPool(1) as own_pool:
+            return run_autotuned(file_list, own_pool, heavy, fast, cache, max_processes, max_threads, probe_size, drift, segment_size, verbose, sink, ops)
+    # CPU yang benar-benar bisa dipakai (affinity + kuota cgroup), bukan core host
+    cpu = effective_cpus()
+    max_processes = max_processes or cpu
+    max_threads = max_threads or max(2, cpu * 2)
+    total = len(file_list)
+    probe_size = probe_size or max(4, min(32, total // 20))
+    segment_size = segment_size or max(64, total // 8)
+    table = ResultTable(total)
+    aggregate = ColorStats()
+    decisions: List[Dict[str, Any]] = []
+
+    start = time.perf_counter()
+    probe_paths = file_list[:probe_size]
+    probe = probe_tasks(probe_paths, heavy=heavy, fast=fast, ops=ops)
+    variant = cache_variant(heavy, fast, ops=ops)
+    for i, (path, (result, error)) in enumerate(zip(probe_paths, probe["results"])):
+        table.set(i, result, error)
+        aggregate.add(result[1:4])
+        if cache is not None:
+            cache.put(cache.key(path, variant), result[1:4])
+        if sink is not None:
+            sink(result, error)
+    pool.resize(min(2, max_processes) if max_processes > 1 else 1)
+    dispatch_s = measure_dispatch_overhead(pool)
+    params = choose_params(probe["task_s"], probe["decode_s"], dispatch_s, total - len(probe_paths), max_processes, max_threads)
+    params.update({"at": len(probe_paths), "task_s": probe["task_s"], "decode_s": probe["decode_s"], "dispatch_s": dispatch_s})
+    decisions.append(params)
+    if verbose:
+        print(f"[AUTOTUNE] {params['reason']}")
+
+    expected = None
+    pos = len(probe_paths)
+    while pos < total:
+        segment = file_list[pos:pos + segment_size]
+        seg_start = time.perf_counter()
+        seg_times = []
+        seg_stats: Dict[str, Any] = {}
+        for idx, result in iter_process(segment, params["threads"], params["processes"], heavy=heavy, ops=ops, fast=fast, engine=params["engine"], pool=pool, cache=cache, chunksize=params["chunksize"], stats=seg_stats):
+            error = seg_stats["errors"].get(idx)
+            table.set(pos + idx, result, error)
+            if not math.isnan(result[4]):
+                seg_times.append(result[4])
+            if sink is not None:
+                sink(result, error)
+        aggregate.merge(seg_stats["aggregate"])
+        seg_elapsed = time.perf_counter() - seg_start
+        throughput = len(segment) / seg_elapsed if seg_elapsed > 0 else float("inf")
+        pos += len(segment)
+        if expected is None:
+            expected = throughput
+        elif pos < total and abs(throughput - expected) > drift * expected:
+            # Throughput bergeser: tune ulang dengan waktu task dari segmen ini
+            task_s = sum(seg_times) / len(seg_times) if seg_times else probe["task_s"]
+            decode_s = probe["decode_s"] * (task_s / probe["task_s"]) if probe["task_s"] > 0 else 0.0
+            if pool.num_processes > 1:
+                dispatch_s = measure_dispatch_overhead(pool)
+            params = choose_params(task_s, decode_s, dispatch_s, total - pos, max_processes, max_threads)
+            params.update({"at": pos, "task_s": task_s, "decode_s": decode_s, "dispatch_s": dispatch_s,
+                           "reason": f"retune: throughput {throughput:.1f} img/s menyimpang dari {expected:.1f} img/s; " + params["reason"]})
+            decisions.append(params)
+            expected = None
+            if verbose:
+                print(f"[AUTOTUNE] {params['reason']}")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "throughput": total / elapsed if elapsed > 0 else float("inf"),
+        "table": table,
+        "count": total,
+        "aggregate": aggregate,
+        "autotune": {
+            "cpu_count": cpu,
+            "probe": {"files": len(probe_paths), "samples": probe["samples"], "task_s": probe["task_s"], "decode_s": probe["decode_s"], "dispatch_s": decisions[0]["dispatch_s"]},
+            "decisions": decisions,
+            "retunes": len(decisions) - 1,
+            "final": {k: decisions[-1][k] for k in ("engine", "processes", "threads", "chunksize")}
+        }
+    }
@@ -0,0 +1,171 @@
+# modules/benchmark.py
+# Benchmark berulang dengan warm-up, interval kepercayaan, deteksi outlier dan mode page cache
+import json
+import math
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PAGE_CACHE_MODES = ("warm", "cold")
+
+# Ambang default regresi throughput untuk --compare (5%)
+DEFAULT_REGRESSION_THRESHOLD = 0.05
+
+# Nilai kritis t dua sisi untuk df 1..30 (tabel standar); di luar tabel dipakai Cornish-Fisher
+_T_TABLE = {
+    0.90: (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+           1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+           1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697),
+    0.95: (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+           2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+           2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042),
+    0.99: (63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+           3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+           2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750)
+}
+
+def t_critical(confidence: float, df: int) -> float:
+    # Nilai kritis distribusi t dua sisi: tabel untuk confidence 0.90/0.95/0.99 dan df <= 30,
+    # selain itu ekspansi Cornish-Fisher dari kuantil normal (akurat untuk df > 30, tanpa
+    # dependensi scipy; untuk df kecil dengan confidence lain nilainya terlalu kecil)
+    if df <= 0:
+        return float("inf")
+    table = _T_TABLE.get(round(confidence, 4))
+    if table is not None and df <= len(table):
+        return table[df - 1]
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+def find_outliers(times: List[float], k: float = 1.5) -> List[Dict[str, Any]]:
+    # Outlier Tukey: di luar [Q1 - k*IQR, Q3 + k*IQR]
+    if len(times) < 4:
+        return []
+    q1, _, q3 = statistics.quantiles(times, n=4)
+    iqr = q3 - q1
+    lo, hi = q1 - k * iqr, q3 + k * iqr
+    return [{"run": i, "time_s": t, "side": "low" if t < lo else "high"} for i, t in enumerate(times) if t < lo or t > hi]
+
+def drop_page_cache(paths: List[str]) -> bool:
+    # Buang halaman file dari page cache (posix_fadvise DONTNEED, tanpa root).
+    # Best effort: halaman yang sedang di-mmap/dirty bisa tetap tinggal.
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for p in paths:
+        try:
+            fd = os.open(p, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def warm_page_cache(paths: List[str]) -> None:
+    # Baca semua file sekali agar berada di page cache
+    for p in paths:
+        try:
+            with open(p, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+        except OSError:
+            continue
+
+def summarize(times: List[float], confidence: float = 0.95) -> Dict[str, Any]:
+    # Statistik ringkas + interval kepercayaan rata-rata
+    n = len(times)
+    mean = statistics.fmean(times)
+    stdev = statistics.stdev(times) if n > 1 else 0.0
+    half = t_critical(confidence, n - 1) * stdev / math.sqrt(n) if n > 1 else float("inf")
+    return {
+        "runs": n,
+        "mean_s": mean,
+        "median_s": statistics.median(times),
+        "stdev_s": stdev,
+        "min_s": min(times),
+        "max_s": max(times),
+        "ci_low_s": mean - half,
+        "ci_high_s": mean + half,
+        "ci_rel": half / mean if mean > 0 else float("inf"),
+        "confidence": confidence
+    }
+
+def measure(fn: Callable[[], Any], paths: Optional[List[str]] = None, warmup: int = 1, min_runs: int = 5, max_runs: int = 30, rel_ci: float = 0.05, confidence: float = 0.95, page_cache: str = "warm", verbose: bool = False) -> Tuple[Dict[str, Any], Any]:
+    # Jalankan fn berulang: warm-up (tidak dihitung), lalu ulangi hingga lebar relatif
+    # interval kepercayaan <= rel_ci (minimal min_runs, maksimal max_runs).
+    # page_cache="cold" membuang file input dari page cache sebelum setiap run (di luar timing).
+    # Kembalikan (statistik, hasil fn dari run terakhir).
+    if page_cache not in PAGE_CACHE_MODES:
+        raise ValueError(f"Unknown page cache mode: {page_cache}")
+    paths = paths or []
+    cold_supported = None
+    if page_cache == "warm":
+        warm_page_cache(paths)
+    for _ in range(warmup):
+        fn()
+    times = []
+    last = None
+    while len(times) < max_runs:
+        if page_cache == "cold":
+            cold_supported = drop_page_cache(paths)
+        t0 = time.perf_counter()
+        last = fn()
+        times.append(time.perf_counter() - t0)
+        if verbose:
+            print(f"  Run {len(times)}: {times[-1]:.6f}s")
+        if len(times) >= max(2, min_runs) and summarize(times, confidence)["ci_rel"] <= rel_ci:
+            break
+    stats = summarize(times, confidence)
+    stats.update({
+        "times": times,
+        "warmup": warmup,
+        "target_ci_rel": rel_ci,
+        "converged": stats["ci_rel"] <= rel_ci,
+        "outliers": find_outliers(times),
+        "page_cache": page_cache
+    })
+    if cold_supported is not None:
+        stats["cold_supported"] = cold_supported
+    return stats, last
+
+def load_baseline(path: str) -> List[Dict[str, Any]]:
+    # Baca experiments.json sebelumnya (format save_experiments_json)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["experiments"] if isinstance(data, dict) else data
+
+def compare_results(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> Dict[str, Any]:
+    # Bandingkan throughput per label dengan baseline.
+    # "significant" jika interval kepercayaan kedua run tidak bertumpuk (jika keduanya punya CI).
+    # change_bound = perubahan paling optimis di dalam CI (run ini di batas cepat CI-nya,
+    # baseline di batas lambat). Regresi = change_bound pun turun lebih dari threshold, sehingga
+    # penurunan yang masih dalam noise tidak pernah menggagalkan --compare; tanpa CI dipakai
+    # perubahan titik (mean).
+    base_by_label = {b["label"]: b for b in baseline}
+    rows = []
+    for r in current:
+        b = base_by_label.get(r["label"])
+        if b is None or not b.get("throughput"):
+            continue
+        change = r["throughput"] / b["throughput"] - 1.0
+        significant = None
+        bound = change
+        if all(k in x for x in (r, b) for k in ("ci_low_s", "ci_high_s", "time_s")):
+            significant = r["ci_low_s"] > b["ci_high_s"] or r["ci_high_s"] < b["ci_low_s"]
+            # throughput ~ 1 / waktu: batas CI waktu -> batas throughput
+            best = r["throughput"] * r["time_s"] / r["ci_low_s"] if r["ci_low_s"] > 0 else math.inf
+            worst_base = b["throughput"] * b["time_s"] / b["ci_high_s"]
+            bound = best / worst_base - 1.0
+        rows.append({
+            "label": r["label"],
+            "baseline_throughput": b["throughput"],
+            "throughput": r["throughput"],
+            "change": change,
+            "change_bound": bound,
+            "significant": significant,
+            "regression": bound < -threshold and significant is not False
+        })
+    return {"threshold": threshold, "rows": rows, "regressions": [x["label"] for x in rows if x["regression"]]}
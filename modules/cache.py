@@ -0,0 +1,119 @@
+# modules/cache.py
+# Cache hasil per gambar di disk (SQLite), content-addressed dengan eviction LRU.
+# Dibaca oleh --stream dan --incremental; run yang diukur (serial/NIM/alt/autotune, --exp)
+# tidak membacanya agar waktu tetap mencerminkan komputasi, cache hanya diisi setelahnya.
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = ".cache"
+# Tiap entri berukuran tetap (key + r, g, b), jadi batas cache berupa jumlah entri
+DEFAULT_CACHE_MAX_ENTRIES = 500_000
+KEY_MODES = ("stat", "content")
+
+class ResultCache:
+    # Cache (r, g, b) per file.
+    # Key = (inode+mtime+size atau hash konten) + variant pemrosesan; dihitung sekali per file
+    # lewat key() lalu dipakai untuk get() dan put() (mode content membaca seluruh file).
+    # Aman dipakai banyak thread/proses: satu koneksi SQLite per thread/proses (mode WAL).
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, key_mode: str = "stat"):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown cache key mode: {key_mode}")
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, "results.sqlite")
+        self.max_entries = max(1, int(max_entries))
+        self.key_mode = key_mode
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Hanya konfigurasi yang dikirim ke worker; koneksi dibuka ulang di sana
+        return {"cache_dir": self.cache_dir, "max_entries": self.max_entries, "key_mode": self.key_mode}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # Koneksi tidak boleh dipakai lintas fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Kolom thumb dan size tidak lagi diisi; dipertahankan agar file cache lama tetap bisa dibuka
+            conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, r REAL, g REAL, b REAL, thumb BLOB, size INTEGER, atime REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_atime ON results (atime)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def make_key(self, path: str, variant: str) -> str:
+        # Key dari metadata file (stat) atau isi file (content), ditambah variant pemrosesan
+        if self.key_mode == "content":
+            h = hashlib.sha1()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            ident = h.hexdigest()
+        else:
+            st = os.stat(path)
+            ident = f"{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+        return hashlib.sha1(f"{ident}|{variant}".encode()).hexdigest()
+
+    def key(self, path: str, variant: str) -> Optional[str]:
+        # make_key, atau None bila file tidak bisa dibaca (tidak di-cache)
+        try:
+            return self.make_key(path, variant)
+        except OSError:
+            return None
+
+    def get(self, key: Optional[str]) -> Optional[Tuple[float, float, float]]:
+        # Ambil (r, g, b) dari cache; None jika miss
+        if key is None:
+            return None
+        conn = self._conn()
+        row = conn.execute("SELECT r, g, b FROM results WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        conn.execute("UPDATE results SET atime = ? WHERE key = ?", (time.time(), key))
+        return (row[0], row[1], row[2])
+
+    def put(self, key: Optional[str], rgb: Tuple[float, float, float]) -> None:
+        # Simpan hasil dengan key dari key(); hasil gagal (NaN) tidak di-cache
+        if key is None or any(math.isnan(c) for c in rgb):
+            return
+        self._conn().execute(
+            "INSERT OR REPLACE INTO results (key, r, g, b, thumb, size, atime) VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+            (key, float(rgb[0]), float(rgb[1]), float(rgb[2]), time.time()))
+        with self._lock:
+            self._puts += 1
+            evict_now = self._puts % 256 == 0
+        if evict_now:
+            self.evict()
+
+    def evict(self) -> int:
+        # Hapus entri dengan atime paling lama sampai jumlah entri <= max_entries
+        conn = self._conn()
+        excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY atime ASC LIMIT ?)", (excess,))
+        return excess
+
+    def stats(self) -> Dict[str, Any]:
+        # bytes = ukuran file SQLite di disk (termasuk WAL)
+        entries = self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        size = sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+        return {"dir": self.cache_dir, "key_mode": self.key_mode, "hits": self.hits, "misses": self.misses, "entries": entries, "max_entries": self.max_entries, "bytes": size}
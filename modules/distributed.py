@@ -0,0 +1,327 @@
+# modules/distributed.py
+# Mode multi-node: coordinator membagi daftar file menjadi lease (potongan indeks input),
+# worker di host mana pun menarik lease lewat TCP, memproses file-nya dengan iter_process,
+# dan mengirim hasil secara bertahap. Lease milik worker yang putus atau diam melewati TTL
+# dikembalikan ke antrian dan diberikan ke worker lain; hasil ganda diabaikan (yang pertama menang).
+# Path file harus bisa dibuka worker (storage bersama atau layout yang sama di tiap host).
+# Keamanan: coordinator default hanya listen di 127.0.0.1. Untuk host lain, bind ke alamat
+# jaringan dan pakai token bersama (TOKEN_ENV atau --token); tiap pesan worker membawa
+# "token" dan pesan dengan token salah dijawab {"error": "unauthorized"} lalu koneksi ditutup.
+# Protokol: satu objek JSON per baris.
+#   worker -> {"op": "lease", "worker": nama}           <- {"lease": id, "files": [[idx, path], ...], "ttl": s}
+#                                                          | {"wait": s} | {"done": true}
+#   worker -> {"op": "result", "lease": id, "results": [[idx, filename, r, g, b, elapsed, error], ...]}
+#                                                       <- {"ok": true, "accepted": n}
+#   worker -> {"op": "renew", "worker": nama, "lease": id} <- {"ok": true} | {"ok": false} (lease sudah hilang)
+# Worker mengirim renew tiap ttl/3 selama lease dipegang, terlepas dari ada hasil atau tidak,
+# sehingga file yang lama diproses tidak membuat lease kedaluwarsa.
+import asyncio
+import collections
+import hmac
+import ipaddress
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 7788
+DEFAULT_HOST = "127.0.0.1"
+# Variabel lingkungan token bersama coordinator/worker (tidak lewat argv agar tidak terlihat di ps)
+TOKEN_ENV = "PIP_DISTRIBUTED_TOKEN"
+DEFAULT_LEASE_SIZE = 16
+DEFAULT_LEASE_TTL = 30.0
+# Jeda worker saat semua lease sedang dipegang worker lain (mungkin nanti kedaluwarsa)
+_WAIT_S = 0.2
+# Worker mengirim hasil paling lambat tiap interval ini (sekaligus memperpanjang lease)
+_FLUSH_S = 0.5
+# Heartbeat lease (op "renew") dikirim tiap TTL dibagi nilai ini
+_RENEW_PER_TTL = 3
+
+# Root repo (induk folder modules) sebagai cwd worker lokal
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_address(addr: str, default_host: str = DEFAULT_HOST) -> Tuple[str, int]:
+    # "host:port", ":port" atau "port" -> (host, port)
+    host, _, port = addr.rpartition(":")
+    return host or default_host, int(port)
+
+def is_loopback(host: str) -> bool:
+    # True bila host hanya bisa dicapai dari mesin ini
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+class _Lease:
+    def __init__(self, lease_id: int, idx: List[int]):
+        self.id = lease_id
+        self.idx = idx
+        self.worker: Optional[str] = None
+        self.deadline = 0.0
+
+class Coordinator:
+    # Pegang status seluruh file: antrian indeks belum di-lease, lease aktif, dan indeks selesai.
+    # sink(idx, result, error) dipanggil sekali per indeks input begitu hasilnya diterima
+    # token: bila diberikan, pesan tanpa token yang cocok ditolak
+    def __init__(self, paths: List[str], sink: Callable[[int, tuple, Optional[str]], None], lease_size: int = DEFAULT_LEASE_SIZE, lease_ttl: float = DEFAULT_LEASE_TTL, token: Optional[str] = None):
+        self.paths = paths
+        self.token = token
+        self.sink = sink
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl
+        self._todo: Deque[int] = collections.deque(range(len(paths)))
+        self._leases: Dict[int, _Lease] = {}
+        self._done = [False] * len(paths)
+        self._remaining = len(paths)
+        self._next_id = 1
+        self._connected = 0
+        self._finished: Optional[asyncio.Event] = None
+        self.counters = {"leases": 0, "expired": 0, "requeued": 0, "duplicates": 0, "rejected": 0, "workers": {}}
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def _expire(self, lease: _Lease, reason: str) -> None:
+        # Kembalikan indeks yang belum selesai ke depan antrian (dikerjakan lebih dulu)
+        self._leases.pop(lease.id, None)
+        undone = [i for i in lease.idx if not self._done[i]]
+        if undone:
+            self.counters["expired"] += 1
+            self.counters["requeued"] += len(undone)
+            self._todo.extendleft(reversed(undone))
+            print(f"[COORD] Lease {lease.id} ({lease.worker}) {reason}: {len(undone)} file di-lease ulang", flush=True)
+
+    def _grant(self, worker: str) -> Dict[str, Any]:
+        now = time.monotonic()
+        for lease in [l for l in self._leases.values() if l.deadline < now]:
+            self._expire(lease, f"expired after {self.lease_ttl:g} s")
+        if not self._remaining:
+            return {"done": True}
+        if not self._todo:
+            return {"wait": _WAIT_S}
+        idx = [self._todo.popleft() for _ in range(min(self.lease_size, len(self._todo)))]
+        lease = _Lease(self._next_id, idx)
+        self._next_id += 1
+        lease.worker = worker
+        lease.deadline = now + self.lease_ttl
+        self._leases[lease.id] = lease
+        self.counters["leases"] += 1
+        return {"lease": lease.id, "files": [[i, self.paths[i]] for i in idx], "ttl": self.lease_ttl}
+
+    def _renew(self, worker: str, lease_id: int) -> bool:
+        # Perpanjang lease milik worker ini; False bila lease sudah kedaluwarsa/dipindahkan
+        lease = self._leases.get(lease_id)
+        if lease is None or lease.worker != worker:
+            return False
+        lease.deadline = time.monotonic() + self.lease_ttl
+        return True
+
+    def _accept(self, worker: str, lease_id: int, rows: List[list]) -> int:
+        lease = self._leases.get(lease_id)
+        if lease is not None and lease.worker == worker:
+            lease.deadline = time.monotonic() + self.lease_ttl
+        accepted = 0
+        for idx, filename, r, g, b, elapsed, error in rows:
+            if not 0 <= idx < len(self._done) or self._done[idx]:
+                self.counters["duplicates"] += 1
+                continue
+            self._done[idx] = True
+            self._remaining -= 1
+            accepted += 1
+            nan = math.nan
+            self.sink(idx, (filename, nan if r is None else r, nan if g is None else g, nan if b is None else b, nan if elapsed is None else elapsed), error)
+        per_worker = self.counters["workers"]
+        per_worker[worker] = per_worker.get(worker, 0) + accepted
+        if lease is not None and all(self._done[i] for i in lease.idx):
+            del self._leases[lease_id]
+        if not self._remaining:
+            self._finished.set()
+        return accepted
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        worker = f"{peer[0]}:{peer[1]}" if peer else "?"
+        self._connected += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                if self.token is not None and not hmac.compare_digest(str(msg.get("token", "")).encode(), self.token.encode()):
+                    # Cek sebelum nama worker dipakai: peer tanpa token tidak bisa mengaku worker lain
+                    self.counters["rejected"] += 1
+                    writer.write((json.dumps({"error": "unauthorized"}) + "\n").encode())
+                    await writer.drain()
+                    break
+                worker = msg.get("worker") or worker
+                if msg.get("op") == "lease":
+                    resp = self._grant(worker)
+                elif msg.get("op") == "result":
+                    resp = {"ok": True, "accepted": self._accept(worker, msg["lease"], msg["results"])}
+                elif msg.get("op") == "renew":
+                    resp = {"ok": self._renew(worker, msg["lease"])}
+                else:
+                    resp = {"error": f"unknown op {msg.get('op')!r}"}
+                writer.write((json.dumps(resp) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        except asyncio.CancelledError:
+            # Server ditutup saat worker yang macet masih terhubung
+            pass
+        finally:
+            self._connected -= 1
+            # Worker putus: lease-nya tidak perlu menunggu TTL
+            for lease in [l for l in self._leases.values() if l.worker == worker]:
+                self._expire(lease, "worker disconnected")
+            writer.close()
+
+    async def _reaper(self) -> None:
+        # Kedaluwarsakan lease juga saat tidak ada worker yang meminta lease baru
+        while True:
+            await asyncio.sleep(min(1.0, self.lease_ttl / 4))
+            now = time.monotonic()
+            for lease in [l for l in self._leases.values() if l.deadline < now]:
+                self._expire(lease, f"expired after {self.lease_ttl:g} s")
+
+    async def run(self, host: str, port: int, on_ready: Optional[Callable[[int], None]] = None, grace_s: float = 2.0) -> None:
+        # Layani worker sampai seluruh file selesai; lalu beri waktu worker menerima "done"
+        self._finished = asyncio.Event()
+        if not self._remaining:
+            self._finished.set()
+        server = await asyncio.start_server(self._handle, host, port, limit=16 * 1024 * 1024)
+        reaper = asyncio.create_task(self._reaper())
+        try:
+            if on_ready is not None:
+                on_ready(server.sockets[0].getsockname()[1])
+            await self._finished.wait()
+            deadline = time.monotonic() + grace_s
+            while self._connected and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            reaper.cancel()
+            server.close()
+            await server.wait_closed()
+
+def start_local_workers(host: str, port: int, count: int, processes: int = 1, heavy: bool = False, fast: bool = False, ops: Optional[str] = None, token: Optional[str] = None) -> List[subprocess.Popen]:
+    # Worker lokal sebagai proses Python terpisah (sama seperti worker di host lain);
+    # token diteruskan lewat TOKEN_ENV
+    cmd = [sys.executable, "-m", "modules.distributed", f"{host}:{port}", "--processes", str(processes)]
+    if heavy:
+        cmd.append("--heavy")
+    if ops is not None:
+        cmd += ["--ops", ops]
+    if fast:
+        cmd.append("--fast")
+    env = dict(os.environ)
+    if token is not None:
+        env[TOKEN_ENV] = token
+    return [subprocess.Popen(cmd + ["--name", f"local-{i}"], cwd=_ROOT, env=env) for i in range(count)]
+
+def run_worker(host: str, port: int, processes: int = 1, heavy: bool = False, fast: bool = False, name: Optional[str] = None, connect_timeout: float = 10.0, ops: Optional[str] = None, token: Optional[str] = None) -> Dict[str, Any]:
+    # Worker pull-based: minta lease, proses lewat iter_process (serial bila 1 proses,
+    # hybrid dengan pool warm bila lebih), kirim hasil tiap _FLUSH_S detik, ulangi sampai "done".
+    # Thread heartbeat memperpanjang lease walau belum ada hasil yang siap dikirim
+    from modules.pipeline import WorkerPool, iter_process
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            # Coordinator mungkin belum siap
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+    stream = sock.makefile("rwb")
+    # Thread utama dan heartbeat berbagi koneksi: satu request-respons dalam satu waktu
+    lock = threading.Lock()
+
+    def call(msg: Dict[str, Any]) -> Dict[str, Any]:
+        if token is not None:
+            msg = dict(msg, token=token)
+        with lock:
+            stream.write((json.dumps(msg) + "\n").encode())
+            stream.flush()
+            line = stream.readline()
+        if not line:
+            raise ConnectionError("coordinator closed the connection")
+        resp = json.loads(line)
+        if resp.get("error") == "unauthorized":
+            raise PermissionError("coordinator rejected the token (set --token or " + TOKEN_ENV + ")")
+        return resp
+
+    def heartbeat(lease_id: int, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                call({"op": "renew", "worker": name, "lease": lease_id})
+            except (OSError, ValueError):
+                # Koneksi putus: thread utama akan gagal di call berikutnya
+                return
+
+    processed = 0
+    leases = 0
+    pool = WorkerPool(processes) if processes > 1 else None
+    try:
+        while True:
+            resp = call({"op": "lease", "worker": name})
+            if resp.get("done"):
+                break
+            if "wait" in resp:
+                time.sleep(resp["wait"])
+                continue
+            leases += 1
+            lease_id = resp["lease"]
+            idx_of = [i for i, _ in resp["files"]]
+            paths = [p for _, p in resp["files"]]
+            stats: Dict[str, Any] = {}
+            rows = []
+            last = time.monotonic()
+            stop = threading.Event()
+            beat = threading.Thread(target=heartbeat, args=(lease_id, resp["ttl"] / _RENEW_PER_TTL, stop), daemon=True)
+            beat.start()
+            try:
+                for k, result in iter_process(paths, processes if pool is not None else 1, processes, heavy=heavy, ops=ops, fast=fast, pool=pool, stats=stats):
+                    rgb_e = [None if math.isnan(v) else v for v in result[1:5]]
+                    rows.append([idx_of[k], result[0]] + rgb_e + [stats["errors"].get(k)])
+                    if time.monotonic() - last >= _FLUSH_S:
+                        call({"op": "result", "worker": name, "lease": lease_id, "results": rows})
+                        processed += len(rows)
+                        rows, last = [], time.monotonic()
+            finally:
+                stop.set()
+                beat.join()
+            call({"op": "result", "worker": name, "lease": lease_id, "results": rows})
+            processed += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        stream.close()
+        sock.close()
+    return {"worker": name, "leases": leases, "processed": processed}
+
+if __name__ == "__main__":
+    # python -m modules.distributed HOST:PORT [--processes N] [--heavy] [--ops SPEC] [--fast] [--name NAMA] [--token T]
+    import argparse
+    parser = argparse.ArgumentParser(description="Worker pull-based untuk coordinator Parallel Image Processor")
+    parser.add_argument("address")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--heavy", action="store_true")
+    parser.add_argument("--ops", default=None)
+    parser.add_argument("--fast", action="store_true")
+    parser.add_argument("--name", default=None)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV))
+    args = parser.parse_args()
+    host, port = parse_address(args.address)
+    res = run_worker(host, port, args.processes, heavy=args.heavy, fast=args.fast, name=args.name, ops=args.ops, token=args.token)
+    print(f"[WORKER {res['worker']}] leases {res['leases']}, processed {res['processed']}", flush=True)
@@ -0,0 +1,78 @@
+# modules/instrument.py
+# Instrumentasi per stage (opt-in): span waktu per gambar dengan PID/thread worker,
+# ekspor Chrome trace_event JSON dan ringkasan persentil per stage.
+# Saat nonaktif, hot path hanya membaca flag ENABLED (tanpa panggilan timer tambahan).
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+# Stage yang dikenal, urutan untuk ringkasan
+STAGES = ("decode", "convert", "resize", "filter", "reduce", "queue_wait", "ipc", "ipc_return", "result")
+
+ENABLED = False
+_pid = os.getpid()
+# Event: (stage, pid, tid, t0, t1, name); t0/t1 dari perf_counter (CLOCK_MONOTONIC,
+# sama antar proses di satu mesin sehingga span worker dan parent bisa disejajarkan)
+_events: List[Tuple[str, int, int, float, float, Optional[str]]] = []
+
+def enable(on: bool = True) -> None:
+    global ENABLED, _pid
+    ENABLED = on
+    _pid = os.getpid()
+
+def record(stage: str, t0: float, t1: float, name: Optional[str] = None) -> None:
+    # Catat satu span; panggil hanya di dalam `if instrument.ENABLED`
+    _events.append((stage, _pid, threading.get_native_id(), t0, t1, name))
+
+def drain() -> List[Tuple[str, int, int, float, float, Optional[str]]]:
+    # Ambil dan kosongkan buffer event proses ini
+    global _events
+    out, _events = _events, []
+    return out
+
+def merge(events: List[tuple]) -> None:
+    # Gabungkan event yang dikirim balik dari worker ke buffer proses ini
+    _events.extend(events)
+
+def traced_call(submit_t: float, fn: Callable, *args) -> Tuple[Any, List[tuple], float]:
+    # Wrapper task di worker: aktifkan instrumentasi, catat IPC (submit -> mulai di worker,
+    # termasuk pickle/unpickle argumen), lalu kembalikan event worker bersama hasil
+    enable(True)
+    start = time.perf_counter()
+    record("ipc", submit_t, start)
+    try:
+        result = fn(*args)
+    finally:
+        enable(False)
+    return result, drain(), time.perf_counter()
+
+def summarize(events: List[tuple]) -> Dict[str, Dict[str, float]]:
+    # Persentil durasi (ms) per stage
+    by_stage: Dict[str, List[float]] = {}
+    for stage, _, _, t0, t1, _ in events:
+        by_stage.setdefault(stage, []).append((t1 - t0) * 1000.0)
+    out = {}
+    for stage in sorted(by_stage, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+        d = np.asarray(by_stage[stage])
+        p50, p90, p99 = np.percentile(d, [50, 90, 99])
+        out[stage] = {"count": int(d.size), "total_ms": float(d.sum()), "mean_ms": float(d.mean()), "p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99), "max_ms": float(d.max())}
+    return out
+
+def to_chrome_trace(events: List[tuple], label: Optional[str] = None) -> List[Dict[str, Any]]:
+    # Konversi ke event Chrome trace (ph "X", timestamp mikrodetik)
+    out = []
+    for stage, pid, tid, t0, t1, name in events:
+        ev = {"name": stage, "cat": label or "pipeline", "ph": "X", "ts": t0 * 1e6, "dur": (t1 - t0) * 1e6, "pid": pid, "tid": tid}
+        if name is not None:
+            ev["args"] = {"file": name}
+        out.append(ev)
+    return out
+
+def save_chrome_trace(trace_events: List[Dict[str, Any]], out_json: str) -> None:
+    # Simpan trace; buka di chrome://tracing atau ui.perfetto.dev
+    os.makedirs(os.path.dirname(out_json) or ".", exist_ok=True)
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
@@ -1,24 +1,67 @@
 # modules/io.py
 # Utilitas I/O untuk loading gambar dan dataset
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Tuple, Iterator, Optional
 from PIL import Image
 import numpy as np
+from modules import instrument
+
+IMAGE_EXTS = {'.jpg','.jpeg','.png','.bmp'}
 
 def gather_image_files(folder: str, max_count: int) -> List[str]:
     # Kumpulkan file gambar dari folder hingga max_count
-    exts = {'.jpg','.jpeg','.png','.bmp'}
+    exts = IMAGE_EXTS
     if not os.path.isdir(folder):
         return []
     files = [os.path.join(folder,f) for f in os.listdir(folder) if os.path.splitext(f)[1].lower() in exts]
     files = sorted(files)
     return files[:max_count]
 
-def load_image_to_bytes(path: str) -> Dict[str, Any]:
+def iter_image_files(folder: str, max_count: Optional[int] = None) -> Iterator[str]:
+    # Versi streaming gather_image_files: yield path apa adanya (urutan direktori, tanpa sort)
+    # sehingga folder berisi jutaan file tidak perlu dimuat penuh ke memori
+    if not os.path.isdir(folder):
+        return
+    count = 0
+    with os.scandir(folder) as it:
+        for entry in it:
+            if max_count is not None and count >= max_count:
+                return
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS:
+                count += 1
+                yield entry.path
+
+# Ukuran target thumbnail; fast decode tidak pernah turun di bawah ukuran ini
+THUMB_SIZE = (128, 128)
+
+def decode_rgb(im: Image.Image, fast: bool = False, name: Optional[str] = None) -> Image.Image:
+    # Decode ke RGB. Dengan fast=True, decode langsung ke ukuran terkecil >= THUMB_SIZE:
+    # JPEG memakai DCT scaling (draft), format lain memakai reduce() per sumbu
+    # Dengan instrumentasi aktif, decode piksel (load) dan konversi dicatat terpisah
+    if fast and im.format == "JPEG":
+        im.draft("RGB", THUMB_SIZE)
+    traced = instrument.ENABLED
+    if traced:
+        t0 = time.perf_counter()
+        im.load()
+        t1 = time.perf_counter()
+        instrument.record("decode", t0, t1, name)
+    im = im.convert("RGB")
+    if fast:
+        fx = max(1, im.width // THUMB_SIZE[0])
+        fy = max(1, im.height // THUMB_SIZE[1])
+        if fx > 1 or fy > 1:
+            im = im.reduce((fx, fy))
+    if traced:
+        instrument.record("convert", t1, time.perf_counter(), name)
+    return im
+
+def load_image_to_bytes(path: str, fast: bool = False) -> Dict[str, Any]:
     # Baca gambar dan kembalikan sebagai dict dengan bytes dan metadata
     try:
         with Image.open(path) as im:
-            im = im.convert("RGB")
+            im = decode_rgb(im, fast=fast, name=os.path.basename(path))
             size = im.size  # (w,h)
             data = im.tobytes()
             return {"filename": os.path.basename(path), "mode": "RGB", "size": size, "data": data}
@@ -26,6 +69,38 @@ def load_image_to_bytes(path: str) -> Dict[str, Any]:
         # Lempar exception untuk caller handle
         raise RuntimeError(f"Failed to load {path}: {e}")
 
+def read_image_header(path: str) -> Tuple[int, int]:
+    # Baca dimensi (w, h) dari header gambar tanpa decode piksel
+    try:
+        with Image.open(path) as im:
+            return im.size
+    except Exception as e:
+        raise RuntimeError(f"Failed to read header {path}: {e}")
+
+def load_image_to_array(path: str, fast: bool = False) -> Dict[str, Any]:
+    # Baca gambar dan kembalikan piksel RGB sebagai array uint8 (h, w, 3)
+    try:
+        with Image.open(path) as im:
+            im = decode_rgb(im, fast=fast, name=os.path.basename(path))
+            return {"filename": os.path.basename(path), "mode": "RGB", "size": im.size, "array": np.asarray(im)}
+    except Exception as e:
+        raise RuntimeError(f"Failed to load {path}: {e}")
+
+def load_image_thumbnail(path: str, fast: bool = False) -> Dict[str, Any]:
+    # Decode + resize LANCZOS ke THUMB_SIZE; kembalikan thumbnail uint8 (128, 128, 3)
+    try:
+        with Image.open(path) as im:
+            name = os.path.basename(path)
+            im = decode_rgb(im, fast=fast, name=name)
+            traced = instrument.ENABLED
+            t0 = time.perf_counter() if traced else 0.0
+            im = im.resize(THUMB_SIZE, resample=Image.Resampling.LANCZOS)
+            if traced:
+                instrument.record("resize", t0, time.perf_counter(), name)
+            return {"filename": name, "thumb": np.asarray(im)}
+    except Exception as e:
+        raise RuntimeError(f"Failed to load {path}: {e}")
+
 def get_kaggle_cars_folder(kaggle_path: str) -> str:
     # Cari folder 'cars' di path Kaggle dataset
     cars_path = os.path.join(kaggle_path, "cars")
@@ -0,0 +1,178 @@
+# modules/manifest.py
+# Manifest persisten isi folder input (path, size, mtime, hasil) untuk pemrosesan inkremental:
+# hanya file baru/berubah yang diproses, agregat global diperbarui secara berjalan
+import math
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from modules.io import IMAGE_EXTS
+
+DEFAULT_MANIFEST_PATH = os.path.join(".cache", "manifest.sqlite")
+
+# Jumlah path per query saat mencocokkan hasil scandir dengan manifest
+_SCAN_CHUNK = 4096
+
+class Manifest:
+    # Satu baris per file: path, size, mtime_ns, variant dan hasil (r, g, b, elapsed).
+    # Tabel agregat menyimpan jumlah dan jumlah kuadrat per channel sehingga rata-rata dan
+    # stddev global bisa diperbarui O(file berubah) tanpa membaca ulang seluruh manifest.
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH, variant: str = ""):
+        self.path = path
+        self.variant = variant
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, variant TEXT, r REAL, g REAL, b REAL, elapsed REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS aggregates (variant TEXT PRIMARY KEY, ok INTEGER, failed INTEGER, sum_r REAL, sum_g REAL, sum_b REAL, sq_r REAL, sq_g REAL, sq_b REAL)")
+        self.conn.execute("INSERT OR IGNORE INTO aggregates VALUES (?, 0, 0, 0, 0, 0, 0, 0, 0)", (variant,))
+        # Hasil scan terakhir: path -> (size, mtime_ns) untuk file yang perlu diproses
+        self.pending: Dict[str, Tuple[int, int]] = {}
+        self._tx_ops = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _iter_entries(self, folder: str) -> Iterator[Tuple[str, int, int]]:
+        # (path, size, mtime_ns) untuk setiap gambar di folder; urutan direktori, tanpa sort
+        if not os.path.isdir(folder):
+            return
+        with os.scandir(folder) as it:
+            for entry in it:
+                if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTS:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st.st_size, st.st_mtime_ns
+
+    def _diff_chunk(self, chunk: List[Tuple[str, int, int, bool]], changed: List[str]) -> Tuple[int, int, int]:
+        # Bandingkan satu chunk hasil scandir dengan manifest.
+        # Kembalikan (tidak berubah, sudah dikenal manifest, ditunda karena masih ditulis)
+        marks = ",".join("?" * len(chunk))
+        known = {row[0]: row[1:] for row in self.conn.execute(f"SELECT path, size, mtime_ns, variant FROM files WHERE path IN ({marks})", [c[0] for c in chunk])}
+        unchanged = 0
+        settling = 0
+        for path, size, mtime_ns, fresh in chunk:
+            if known.get(path) == (size, mtime_ns, self.variant):
+                unchanged += 1
+            elif fresh:
+                settling += 1
+            else:
+                changed.append(path)
+                self.pending[path] = (size, mtime_ns)
+        return unchanged, len(known), settling
+
+    def scan(self, folder: str, settle_s: float = 0.0) -> Dict[str, Any]:
+        # Cari file baru/berubah (size/mtime/variant berbeda) dan file yang sudah dihapus.
+        # Folder tanpa perubahan hanya butuh scandir + stat, tanpa decode apa pun.
+        # settle_s > 0 menunda file yang mtime-nya masih sangat baru (mungkin sedang ditulis).
+        changed: List[str] = []
+        unchanged = known = settling = seen = 0
+        now_ns = time.time_ns()
+        chunk: List[Tuple[str, int, int, bool]] = []
+        for path, size, mtime_ns in self._iter_entries(folder):
+            seen += 1
+            chunk.append((path, size, mtime_ns, settle_s > 0 and now_ns - mtime_ns < settle_s * 1e9))
+            if len(chunk) >= _SCAN_CHUNK:
+                u, k, st = self._diff_chunk(chunk, changed)
+                unchanged, known, settling = unchanged + u, known + k, settling + st
+                chunk = []
+        if chunk:
+            u, k, st = self._diff_chunk(chunk, changed)
+            unchanged, known, settling = unchanged + u, known + k, settling + st
+        # Daftar path lengkap hanya dibaca jika manifest punya baris yang tidak ditemukan scan
+        removed: List[str] = []
+        prefix = os.path.join(folder, "")
+        total = self.conn.execute("SELECT COUNT(*) FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)).fetchone()[0]
+        if total > known:
+            present = {p for p, _, _ in self._iter_entries(folder)}
+            removed = [p for (p,) in self.conn.execute("SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)) if p not in present]
+            self.remove(removed)
+        return {"seen": seen, "changed": changed, "unchanged": unchanged, "removed": removed, "settling": settling}
+
+    def _begin(self) -> None:
+        if not self._tx_ops:
+            self.conn.execute("BEGIN")
+        self._tx_ops += 1
+
+    def commit(self) -> None:
+        if self._tx_ops:
+            self.conn.execute("COMMIT")
+            self._tx_ops = 0
+
+    def _apply(self, rgb: Tuple[Any, Any, Any], sign: int, variant: str) -> None:
+        # Tambah (sign=1) atau kurangi (sign=-1) kontribusi satu hasil ke agregat variant-nya
+        if any(c is None or math.isnan(c) for c in rgb):
+            self.conn.execute("UPDATE aggregates SET failed = failed + ? WHERE variant = ?", (sign, variant))
+            return
+        r, g, b = rgb
+        self.conn.execute(
+            "UPDATE aggregates SET ok = ok + ?, sum_r = sum_r + ?, sum_g = sum_g + ?, sum_b = sum_b + ?, sq_r = sq_r + ?, sq_g = sq_g + ?, sq_b = sq_b + ? WHERE variant = ?",
+            (sign, sign * r, sign * g, sign * b, sign * r * r, sign * g * g, sign * b * b, variant))
+
+    def _retract(self, path: str) -> None:
+        # Keluarkan hasil lama path (jika ada) dari agregat variant yang menghasilkannya
+        row = self.conn.execute("SELECT r, g, b, variant FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            self._apply(row[:3], -1, row[3])
+
+    def update(self, path: str, result: tuple, commit_every: int = 500) -> None:
+        # Simpan hasil satu file (dari scan terakhir) dan perbarui agregat
+        size, mtime_ns = self.pending.pop(path, (None, None))
+        if size is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        self._begin()
+        self._retract(path)
+        rgb = tuple(None if math.isnan(c) else c for c in result[1:4])
+        self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, variant, r, g, b, elapsed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (path, size, mtime_ns, self.variant, rgb[0], rgb[1], rgb[2], result[4]))
+        self._apply(result[1:4], 1, self.variant)
+        if self._tx_ops >= commit_every:
+            self.commit()
+
+    def remove(self, paths: List[str]) -> None:
+        # Hapus file yang sudah tidak ada dari manifest dan agregat
+        self._begin()
+        for p in paths:
+            self._retract(p)
+            self.conn.execute("DELETE FROM files WHERE path = ?", (p,))
+        self.commit()
+
+    def aggregates(self) -> Dict[str, Any]:
+        # Rata-rata dan stddev (populasi) RGB global dari agregat berjalan
+        self.commit()
+        ok, failed, sr, sg, sb, qr, qg, qb = self.conn.execute(
+            "SELECT ok, failed, sum_r, sum_g, sum_b, sq_r, sq_g, sq_b FROM aggregates WHERE variant = ?", (self.variant,)).fetchone()
+        if ok <= 0:
+            return {"ok": 0, "failed": failed, "avg_rgb": (0.0, 0.0, 0.0), "std_rgb": (0.0, 0.0, 0.0)}
+        avg = (sr / ok, sg / ok, sb / ok)
+        std = tuple(math.sqrt(max(0.0, q / ok - m * m)) for q, m in zip((qr, qg, qb), avg))
+        return {"ok": ok, "failed": failed, "avg_rgb": avg, "std_rgb": std}
+
+    def iter_results(self, folder: Optional[str] = None) -> Iterator[tuple]:
+        # Hasil tersimpan sebagai tuple (filename, r, g, b, elapsed); NaN untuk file gagal
+        self.commit()
+        query = "SELECT path, r, g, b, elapsed FROM files WHERE variant = ?"
+        params: List[Any] = [self.variant]
+        if folder is not None:
+            prefix = os.path.join(folder, "")
+            query += " AND substr(path, 1, ?) = ?"
+            params += [len(prefix), prefix]
+        for path, r, g, b, elapsed in self.conn.execute(query + " ORDER BY path", params):
+            yield (os.path.basename(path), math.nan if r is None else r, math.nan if g is None else g, math.nan if b is None else b, elapsed)
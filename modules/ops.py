@@ -0,0 +1,103 @@
+# modules/ops.py
+# Graf operasi deklaratif per gambar: spec "decode,resize,blur:2,blur:1,histogram,stats".
+# Planner membuang op yang output-nya tidak dibaca siapa pun, lalu menggabungkan blur
+# berurutan menjadi satu kernel setara (sigma = sqrt(r1^2 + r2^2)). Gabungan itu hanya
+# mendekati rantai aslinya (GaussianBlur Pillow = box blur berulang dengan pembulatan uint8 per
+# langkah), jadi rencana yang digabung ditandai terpisah di key cache (lihat fused).
+import functools
+import math
+from typing import Optional, Tuple
+
+# Spec bawaan: mode normal dan mode --heavy (blur 2 lalu 1 + histogram, seperti sebelumnya;
+# histogram selalu dibuang planner karena outputnya tidak dibaca hasil per gambar)
+DEFAULT_SPEC = "decode,resize,stats"
+HEAVY_SPEC = "decode,resize,blur:2,blur:1,histogram,stats"
+
+# Nama op -> (buffer yang dibaca, buffer yang ditulis, butuh argumen)
+_OP_IO = {
+    "decode": ((), ("image",), False),
+    "resize": (("image",), ("image",), False),
+    "blur": (("image",), ("image",), True),
+    "histogram": (("image",), ("hist",), False),
+    "stats": (("image",), ("rgb",), False),
+}
+
+# Output yang dikonsumsi hasil per gambar (filename, r, g, b, elapsed)
+OUTPUTS = ("rgb",)
+
+Op = Tuple[str, Optional[float]]
+Plan = Tuple[Op, ...]
+def parse_spec(spec: str) -> Plan:
+    # Parse "nama[:arg],..." dan validasi urutan dasar (decode opsional di awal, lalu resize)
+    ops = []
+    for token in spec.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        name, _, arg = token.partition(":")
+        name = name.strip().lower()
+        if name not in _OP_IO:
+            raise ValueError(f"Unknown op '{name}' in spec '{spec}' (known: {', '.join(_OP_IO)})")
+        needs_arg = _OP_IO[name][2]
+        if needs_arg and not arg:
+            raise ValueError(f"Op '{name}' needs an argument, e.g. {name}:2")
+        if not needs_arg and arg:
+            raise ValueError(f"Op '{name}' takes no argument")
+        value = float(arg) if arg else None
+        if value is not None and value <= 0:
+            raise ValueError(f"Op '{name}' argument must be > 0")
+        ops.append((name, value))
+    if ops and ops[0][0] == "decode":
+        ops = ops[1:]
+    if not ops or ops[0][0] != "resize":
+        raise ValueError(f"Spec '{spec}' must start with resize (after optional decode)")
+    if any(name in ("decode", "resize") for name, _ in ops[1:]):
+        raise ValueError(f"decode/resize may only appear once at the start of '{spec}'")
+    if "stats" not in (name for name, _ in ops):
+        raise ValueError(f"Spec '{spec}' must include stats (rata-rata RGB per gambar)")
+    return tuple(ops)
+
+def eliminate_dead(ops: Plan, outputs: Tuple[str, ...] = OUTPUTS) -> Plan:
+    # Analisis liveness mundur: op dipertahankan hanya jika menulis buffer yang masih dibaca.
+    # resize selalu dipertahankan (outputnya adalah thumbnail).
+    live = set(outputs)
+    kept = []
+    for name, arg in reversed(ops):
+        reads, writes, _ = _OP_IO[name]
+        if name == "resize" or live.intersection(writes):
+            live.difference_update(writes)
+            live.update(reads)
+            kept.append((name, arg))
+    return tuple(reversed(kept))
+
+def fuse_blurs(ops: Plan) -> Plan:
+    # Dua Gaussian berurutan = satu Gaussian dengan sigma = sqrt(s1^2 + s2^2)
+    fused = []
+    for name, arg in ops:
+        if name == "blur" and fused and fused[-1][0] == "blur":
+            fused[-1] = ("blur", math.sqrt(fused[-1][1] ** 2 + arg ** 2))
+        else:
+            fused.append((name, arg))
+    return tuple(fused)
+
+def _live_ops(heavy: bool, ops: Optional[str]) -> Plan:
+    # String spec ops (--ops) bila diberikan, selain itu spec bawaan mode normal/heavy;
+    # op mati sudah dibuang, blur belum digabung
+    spec = ops if ops is not None else (HEAVY_SPEC if heavy else DEFAULT_SPEC)
+    return eliminate_dead(parse_spec(spec))
+
+@functools.lru_cache(maxsize=64)
+def plan_ops(heavy: bool = False, ops: Optional[str] = None) -> Plan:
+    # Rencana eksekusi
+    return fuse_blurs(_live_ops(heavy, ops))
+
+@functools.lru_cache(maxsize=64)
+def fused(heavy: bool = False, ops: Optional[str] = None) -> bool:
+    # True bila planner menggabungkan blur, sehingga hasilnya berbeda tipis dari rantai blur
+    # yang ditulis di spec
+    live = _live_ops(heavy, ops)
+    return fuse_blurs(live) != live
+
+def describe(plan: Plan) -> str:
+    # Bentuk kanonik rencana (dipakai juga sebagai bagian key cache)
+    return ",".join(name if arg is None else f"{name}:{arg:g}" for name, arg in plan)
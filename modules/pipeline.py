@@ -1,141 +1,1107 @@
 # modules/pipeline.py
 # Fungsi runner pipeline
-import statistics
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import itertools
+import multiprocessing
+import queue
+import threading
 import time
 import os
 import math
-from typing import List, Dict, Any, Optional
-from modules.processing import process_image_file
+import sys
+import sysconfig
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
+from modules.processing import process_image_file, process_image_batch, process_thumb_batch, cache_variant, drain_errors
+from modules.cache import ResultCache
+from modules.thumbstore import write_thumbs
+from modules.io import load_image_to_bytes, load_image_to_array, load_image_thumbnail, read_image_header
+from modules.transport import SlabRing
+from modules.benchmark import measure
+from modules.schedule import SCHEDULES, estimate_costs, lpt_order, makespan_report
+from modules.aggregate import ColorStats, reduce_call
+from modules.results import STATUS_OK, ResultTable, chunk_call
+from modules import instrument, placement, profiler
 
-def run_serial(file_list: List[str], verbose: bool = False, heavy: bool = False) -> Dict[str, Any]:
-    # Jalankan baseline serial untuk perbandingan
+TRANSPORTS = ("pickle", "shm")
+# serial: satu file per iterasi di thread pemanggil; threads: file utuh (decode + compute) per
+# thread di satu proses (Pillow melepas GIL saat decode/resize/filter); processes: file utuh per
+# worker proses (tanpa stage decode di parent); hybrid: thread decode + proses compute
+ENGINES = ("auto", "serial", "threads", "processes", "hybrid")
+
+# Start method pool proses (None = bawaan platform). forkserver: satu proses server yang sudah
+# mengimport FORKSERVER_PRELOAD, lalu tiap worker di-fork darinya (tanpa import ulang per worker
+# dan tanpa mewarisi state parent seperti thread/lock/file terbuka)
+START_METHODS = ("fork", "spawn", "forkserver")
+FORKSERVER_PRELOAD = ["PIL.Image", "numpy", "modules.processing"]
+
+# Fault tolerance bawaan engine hybrid (lihat _iter_hybrid)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_SPECULATE_PCT = 95.0
+# Jumlah task selesai minimal sebelum persentil durasi dipakai untuk spekulasi
+_SPECULATE_MIN_SAMPLES = 8
+# Batas respawn pool per run: pool yang terus rusak dihentikan, bukan diulang tanpa akhir
+_MAX_RESPAWNS = 32
+
+def free_threaded_build() -> bool:
+    # CPython yang dikompilasi tanpa GIL (misal 3.13t)
+    return bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+
+def gil_enabled() -> bool:
+    # Build free-threaded tetap bisa menyalakan GIL saat runtime (PYTHON_GIL=1 atau
+    # ekstensi yang belum mendukung free-threading)
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else bool(check())
+
+def runtime_info() -> Dict[str, Any]:
+    # Ringkasan interpreter untuk laporan: versi, build free-threaded, status GIL
+    return {"python": sys.version.split()[0], "implementation": sys.implementation.name, "free_threaded_build": free_threaded_build(), "gil_enabled": gil_enabled()}
+
+def _warm_worker() -> int:
+    # Task kosong untuk memastikan worker sudah hidup dan modul sudah diimport
+    import PIL.Image  # noqa: F401
+    import numpy  # noqa: F401
+    return os.getpid()
+
+# Papan task bersama (per pool): untuk tiap slot worker [task_id, waktu mulai].
+# Diisi _run_task di worker sehingga parent tahu task mana yang benar-benar sedang
+# dieksekusi saat worker crash atau melewati batas waktu.
+_board = None
+_slot = 0
+
+def _init_worker(board, counter, profile_dir: Optional[str] = None, cpus: Optional[List[int]] = None) -> None:
+    # Initializer pool: ambil slot papan unik untuk proses worker ini; profile_dir (mode
+    # --profile) mengaktifkan cProfile di worker, dump ditulis ke folder itu saat worker keluar.
+    # cpus (pool dengan pin=True): CPU per slot dari placement_plan, worker di-pin ke CPU slotnya
+    global _board, _slot
+    if profile_dir is not None:
+        profiler.init_worker(profile_dir)
+    placement.cap_native_threads()
+    with counter.get_lock():
+        _slot = counter.value % (len(board) // 2)
+        counter.value += 1
+    _board = board
+    if cpus:
+        placement.pin_current(cpus[_slot % len(cpus)])
+
+def _run_task(task_id: int, submit_t: float, traced: bool, fn: Callable, *args) -> Tuple[Any, List[Tuple[str, str]], Optional[List[tuple]], int, float, float]:
+    # Wrapper task di worker: tandai papan selama fn berjalan, lalu kembalikan
+    # (hasil, alasan gagal per file, event instrumentasi, pid, waktu mulai, waktu selesai)
+    drain_errors()
+    if profiler.ENABLED:
+        fn, args = profiler.call, (fn,) + args
     start = time.perf_counter()
-    processed = []
-    task_times = []
-    for idx, p in enumerate(file_list, start=1):
-        try:
-            result = process_image_file(p, heavy=heavy)
-            processed.append(result[:4])  # exclude elapsed
-            task_times.append(result[4])  # elapsed per task
-        except Exception as e:
-            if verbose:
-                print(f"[WARN serial] {p}: {e}")
-            processed.append((os.path.basename(p), math.nan, math.nan, math.nan))
-            task_times.append(math.nan)
+    if _board is not None:
+        _board[2 * _slot + 1] = start
+        _board[2 * _slot] = task_id
+    try:
+        if traced:
+            result, events, end = instrument.traced_call(submit_t, fn, *args)
+        else:
+            result, events = fn(*args), None
+            end = time.perf_counter()
+    finally:
+        if _board is not None:
+            _board[2 * _slot] = 0
+    return result, drain_errors(), events, os.getpid(), start, end
+
+def _kill_workers(executor: ProcessPoolExecutor) -> None:
+    # Matikan paksa semua proses worker executor; worker yang hang tidak bisa dihentikan lewat
+    # shutdown(). Python 3.14+ punya kill_workers(). Versi lama tidak punya API publik untuk
+    # ini, jadi satu-satunya akses ke atribut privat _processes (pid -> Process) ada di sini
+    kill = getattr(executor, "kill_workers", None)
+    if kill is not None:
+        kill()
+        return
+    for proc in list((getattr(executor, "_processes", None) or {}).values()):
+        proc.kill()
+
+class WorkerPool:
+    # Pool proses persisten (warm) yang dipakai ulang antar run dan konfigurasi.
+    # Dibuat sekali, diubah ukurannya hanya saat jumlah proses berubah.
+    # respawn() mengganti pool yang rusak (worker crash/hang) dengan ukuran yang sama.
+    # start_method: salah satu START_METHODS atau None (bawaan platform)
+    # pin=True: tiap worker di-pin ke CPU berbeda (bergantian antar node NUMA, lihat
+    # placement.placement_plan); rencananya ada di `placement` (CPU per slot worker)
+    def __init__(self, num_processes: int = 1, start_method: Optional[str] = None, pin: bool = False):
+        if start_method is not None and start_method not in multiprocessing.get_all_start_methods():
+            raise ValueError(f"Start method '{start_method}' tidak tersedia di platform ini ({', '.join(multiprocessing.get_all_start_methods())})")
+        self.start_method = start_method
+        self.pin = pin
+        self.placement: List[int] = []
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+        self.num_processes = 0
+        self.spawn_count = 0
+        self.respawns = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._board = None
+        self.resize(num_processes)
+
+    def _spawn(self, num_processes: int) -> None:
+        self._board = self._ctx.Array("d", 2 * num_processes, lock=False)
+        counter = self._ctx.Value("i", 0)
+        self.placement = placement.placement_plan(num_processes) if self.pin else []
+        self._executor = ProcessPoolExecutor(max_workers=num_processes, mp_context=self._ctx, initializer=_init_worker, initargs=(self._board, counter, profiler.DIR if profiler.ENABLED else None, self.placement or None))
+        self.num_processes = num_processes
+        self.spawn_count += 1
+        # Panaskan semua worker sebelum dipakai untuk pengukuran waktu
+        for fut in [self._executor.submit(_warm_worker) for _ in range(num_processes)]:
+            fut.result()
+
+    def resize(self, num_processes: int) -> "WorkerPool":
+        # Spawn ulang pool hanya jika ukurannya berbeda
+        num_processes = max(1, int(num_processes))
+        if self._executor is not None and num_processes == self.num_processes:
+            return self
+        self.shutdown()
+        self._spawn(num_processes)
+        return self
+
+    def running_tasks(self) -> Dict[int, float]:
+        # task_id -> waktu mulai (perf_counter) untuk task yang sedang dieksekusi worker
+        board = self._board
+        if board is None:
+            return {}
+        out = {}
+        for i in range(0, len(board), 2):
+            task_id = int(board[i])
+            if task_id:
+                out[task_id] = board[i + 1]
+        return out
+
+    def respawn(self) -> "WorkerPool":
+        # Matikan paksa worker lama (mungkin hang) dan buat pool baru dengan ukuran sama.
+        # Future yang belum selesai di pool lama gagal dengan BrokenProcessPool/dibatalkan.
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            _kill_workers(executor)
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.respawns += 1
+        self._spawn(self.num_processes)
+        return self
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            raise RuntimeError("WorkerPool sudah ditutup")
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._board = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+def _cache_lookup(cache: Optional[ResultCache], path: str, variant: str) -> Tuple[Optional[tuple], Optional[str]]:
+    # Cek cache hasil: (tuple hasil lengkap jika hit, key cache). Key dihitung sekali di sini
+    # dan diteruskan ke _cache_store saat miss
+    if cache is None:
+        return None, None
+    t0 = time.perf_counter()
+    key = cache.key(path, variant)
+    rgb = cache.get(key)
+    if rgb is None:
+        return None, key
+    return (os.path.basename(path), rgb[0], rgb[1], rgb[2], time.perf_counter() - t0), key
+
+def _cache_store(cache: Optional[ResultCache], key: Optional[str], result: tuple) -> None:
+    if cache is not None:
+        cache.put(key, result[1:4])
+
+def _cache_counters(cache: Optional[ResultCache], before: Tuple[int, int]) -> Dict[str, int]:
+    if cache is None:
+        return {"enabled": False, "hits": 0, "misses": 0}
+    return {"enabled": True, "hits": cache.hits - before[0], "misses": cache.misses - before[1]}
+
+def fill_cache(cache: ResultCache, file_list: List[str], table: ResultTable, heavy: bool = False, fast: bool = False, ops: Optional[str] = None) -> int:
+    # Isi cache dari tabel run jalur exact (serial) yang sudah selesai, di luar bagian yang
+    # diukur; baris gagal dilewati. Kembalikan jumlah baris yang disimpan
+    variant = cache_variant(heavy, fast, ops=ops)
+    rows = np.flatnonzero(table.status[:len(table)] == STATUS_OK).tolist()
+    for idx in rows:
+        cache.put(cache.key(file_list[idx], variant), table.rgb[idx].tolist())
+    return len(rows)
+
+def _failures(errors: Dict[int, str], file_list: List[str]) -> List[Dict[str, Any]]:
+    # Daftar kegagalan per file, urut indeks input
+    return [{"index": i, "file": os.path.basename(file_list[i]), "error": errors[i]} for i in sorted(errors)]
+
+def run_serial(file_list: List[str], verbose: bool = False, heavy: bool = False, fast: bool = False, cache: Optional[ResultCache] = None, sink: Optional[Callable[[tuple, Optional[str]], None]] = None, ops: Optional[str] = None) -> Dict[str, Any]:
+    # Jalankan baseline serial untuk perbandingan (engine serial dari iter_process)
+    # sink (opsional) dipanggil sink(hasil, alasan_gagal_atau_None) per hasil
+    cache_before = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    start = time.perf_counter()
+    table = ResultTable(len(file_list))
+    stats: Dict[str, Any] = {}
+    for idx, result in iter_process(file_list, heavy=heavy, ops=ops, fast=fast, engine="serial", cache=cache, stats=stats, table=table):
+        error = stats["errors"].get(idx)
+        if sink is not None:
+            sink(result, error)
+        if verbose and error is not None:
+            print(f"[WARN serial] {file_list[idx]}: {error}")
     end = time.perf_counter()
     elapsed = end - start
-    count = len(processed)
+    count = len(table)
     throughput = count / elapsed if elapsed > 0 else float("inf")
-    # Ambil avg colors untuk audit
-    avg_colors = [(r, g, b) for _, r, g, b in processed]
-    return {"elapsed": elapsed, "throughput": throughput, "processed": processed, "count": count, "avg_colors": avg_colors, "task_times": task_times}
+    # Hasil per gambar kolumnar (ResultTable): table.rgb / table.elapsed / table.status
+    return {"elapsed": elapsed, "throughput": throughput, "table": table, "count": count, "aggregate": stats["aggregate"], "cache": _cache_counters(cache, cache_before), "failures": _failures(stats["errors"], file_list)}
 
-def run_experiments(experiment_configs: List[Dict[str, Any]], file_list: List[str], runs_per_config: int = 3, verbose: bool = False, heavy: bool = False) -> Dict[str, Any]:
+def run_experiments(experiment_configs: List[Dict[str, Any]], file_list: List[str], runs_per_config: int = 5, verbose: bool = False, heavy: bool = False, pool: Optional[WorkerPool] = None, transport: str = "pickle", fast: bool = False, cache: Optional[ResultCache] = None, batch_size: Optional[int] = None, warmup: int = 1, max_runs: int = 30, rel_ci: float = 0.05, confidence: float = 0.95, page_cache: str = "warm", ops: Optional[str] = None) -> Dict[str, Any]:
     # Jalankan eksperimen berbagai konfigurasi
+    # Satu WorkerPool dipakai ulang untuk semua konfigurasi paralel
+    # Tiap konfigurasi diukur dengan benchmark.measure: warm-up, lalu diulang (minimal
+    # runs_per_config) sampai interval kepercayaan mean <= rel_ci atau max_runs tercapai.
+    # Baseline serial selalu diukur per jumlah data, tidak bergantung urutan konfigurasi.
+    # config["engine"] (opsional, bawaan "hybrid"; "serial" bila 1 thread/1 proses) memilih
+    # engine iter_process; efisiensi dihitung per worker engine (thread untuk engine threads).
+    if pool is None:
+        with WorkerPool() as own_pool:
+            return run_experiments(experiment_configs, file_list, runs_per_config, verbose, heavy, pool=own_pool, ops=ops, transport=transport, fast=fast, cache=cache, batch_size=batch_size, warmup=warmup, max_runs=max_runs, rel_ci=rel_ci, confidence=confidence, page_cache=page_cache)
+
+    bench_args = {"warmup": warmup, "min_runs": runs_per_config, "max_runs": max(max_runs, runs_per_config), "rel_ci": rel_ci, "confidence": confidence, "page_cache": page_cache, "verbose": verbose}
     results = []
-    serial_baseline = None
+    serial_stats: Dict[int, Dict[str, Any]] = {}
+
+    def serial_for(data_count: int) -> Dict[str, Any]:
+        if data_count not in serial_stats:
+            if verbose:
+                print(f"[EXPERIMENT] Serial baseline: data={data_count}")
+            config_files = file_list[:data_count]
+            serial_stats[data_count] = measure(lambda: run_serial(config_files, verbose=False, heavy=heavy, ops=ops, fast=fast, cache=cache), config_files, **bench_args)
+        return serial_stats[data_count]
 
     for config in experiment_configs:
         label = config["label"]
         threads = config["threads"]
         processes = config["processes"]
         data_count = config["data"]
+        engine = config.get("engine") or ("serial" if threads == 1 and processes == 1 else "hybrid")
         config_files = file_list[:data_count]
 
-        if verbose:
-            print(f"[EXPERIMENT] Running {label}: threads={threads}, processes={processes}, data={data_count}")
-
-        times = []
-        result = None
-        for run in range(runs_per_config):
+        if engine == "serial":
+            stats, result = serial_for(data_count)
+        else:
+            serial_for(data_count)
             if verbose:
-                print(f"  Run {run+1}/{runs_per_config}...")
-            if threads == 1 and processes == 1:
-                result = run_serial(config_files, verbose=False, heavy=heavy)
-            else:
-                result = run_configuration(threads, processes, config_files, verbose=False, heavy=heavy)
-            times.append(result["elapsed"])
-
-        median_time = statistics.median(times)
-        throughput = data_count / median_time if median_time > 0 else float("inf")
+                print(f"[EXPERIMENT] Running {label}: engine={engine}, threads={threads}, processes={processes}, data={data_count}")
+            # Engine batch hanya ada di hybrid
+            config_batch = batch_size if engine == "hybrid" else None
+            stats, result = measure(lambda: run_configuration(threads, processes, config_files, verbose=False, heavy=heavy, ops=ops, pool=pool, transport=transport, fast=fast, cache=cache, batch_size=config_batch, engine=engine), config_files, **bench_args)
+        baseline = serial_stats[data_count][0]["mean_s"]
 
-        if serial_baseline is None and threads == 1 and processes == 1:
-            serial_baseline = median_time
+        mean_time = stats["mean_s"]
+        throughput = data_count / mean_time if mean_time > 0 else float("inf")
+        speedup = baseline / mean_time if mean_time > 0 else 1.0
+        efficiency = (speedup / max(1, threads if engine == "threads" else processes)) * 100.0
 
-        speedup = serial_baseline / median_time if serial_baseline and median_time > 0 else 1.0
-        efficiency = (speedup / max(1, processes)) * 100.0
-
-        # Compute avg_rgb for the configuration
-        if threads == 1 and processes == 1:
-            # For serial, use the last run_serial result
-            avg_colors = result["avg_colors"] if result else []
-        else:
-            # For parallel, run once more to get avg_colors
-            config_result = run_configuration(threads, processes, config_files, verbose=False, heavy=heavy)
-            avg_colors = config_result["avg_colors"]
-
-        if avg_colors:
-            avg_r = sum(r for r, _, _ in avg_colors) / len(avg_colors)
-            avg_g = sum(g for _, g, _ in avg_colors) / len(avg_colors)
-            avg_b = sum(b for _, _, b in avg_colors) / len(avg_colors)
-            avg_rgb = (avg_r, avg_g, avg_b)
-        else:
-            avg_rgb = (0.0, 0.0, 0.0)
+        # avg_rgb konfigurasi dari statistik berjalan run terakhir yang diukur
+        avg_rgb = result["aggregate"].avg_rgb() if result else (0.0, 0.0, 0.0)
 
         result_entry = {
             "label": label,
+            "engine": engine,
             "threads": threads,
             "processes": processes,
             "data_count": data_count,
-            "time_s": median_time,
+            "time_s": mean_time,
             "throughput": throughput,
             "speedup": speedup,
             "efficiency_percent": efficiency,
-            "times": times,
+            "times": stats["times"],
             "avg_rgb": avg_rgb
         }
+        result_entry.update({k: stats[k] for k in ("runs", "warmup", "median_s", "stdev_s", "ci_low_s", "ci_high_s", "ci_rel", "confidence", "converged", "outliers", "page_cache")})
         results.append(result_entry)
 
+    full = max((c["data"] for c in experiment_configs), default=len(file_list))
+    serial_baseline = serial_for(full)[0]["mean_s"] if experiment_configs else None
     return {"results": results, "serial_baseline": serial_baseline}
 
-def run_configuration(num_threads: int, num_processes: int, file_list: List[str], verbose: bool = False, chunksize: Optional[int] = None, heavy: bool = False) -> Dict[str, Any]:
-    # Jalankan pipeline paralel ThreadPool + ProcessPool
-    io_start = time.perf_counter()
-    # Step A: kumpulkan file paths
-    loaded_paths = file_list
-    io_end = time.perf_counter()
-    io_time = io_end - io_start
-
-    # Step B: proses dengan processes
-    cpu_start = time.perf_counter()
-    processed = []
-    task_times = []
-    chunksize = chunksize or max(1, len(loaded_paths) // (num_processes * 8))
-    with ProcessPoolExecutor(max_workers=num_processes) as ppool:
-        # Gunakan map dengan chunksize
-        from functools import partial
-        process_func = partial(process_image_file, heavy=heavy)
-        results = ppool.map(process_func, loaded_paths, chunksize=chunksize)
-        for i, result in enumerate(results, start=1):
-            processed.append(result[:4])
-            task_times.append(result[4])
-            if verbose and (i % 10 == 0 or i == len(loaded_paths)):
-                print(f"[INFO] Processed {i}/{len(loaded_paths)}")
-    cpu_end = time.perf_counter()
-    cpu_time = cpu_end - cpu_start
-
-    total_elapsed = io_time + cpu_time
-    count = len(processed)
-    throughput = count / total_elapsed if total_elapsed > 0 else float("inf")
-    # Ambil avg colors untuk audit
-    avg_colors = [(r, g, b) for _, r, g, b in processed]
-    # Compute aggregated avg_rgb for configuration
-    if avg_colors:
-        avg_r = sum(r for r, _, _ in avg_colors) / len(avg_colors)
-        avg_g = sum(g for _, g, _ in avg_colors) / len(avg_colors)
-        avg_b = sum(b for _, _, b in avg_colors) / len(avg_colors)
-        avg_rgb = (avg_r, avg_g, avg_b)
+_LOADER_DONE = object()
+
+def _put(q: "queue.Queue", msg: Any, stop: threading.Event) -> bool:
+    # put() memblokir saat antrian penuh (backpressure), tetapi tetap menghormati stop
+    while not stop.is_set():
+        try:
+            q.put(msg, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _load_stage(idx: int, path: str, decoded: "queue.Queue", stop: threading.Event, stats: Dict[str, Any], lock: threading.Lock, verbose: bool = False, ring: Optional[SlabRing] = None, fast: bool = False, cache: Optional[ResultCache] = None, variant: str = "", thumbs: bool = False, raw: bool = False) -> None:
+    # Stage A (thread): baca + decode satu file lalu masukkan ke antrian terbatas
+    # Dengan ring (transport shm), piksel ditulis ke slab shared memory
+    # Dengan thumbs=True (engine batch), thread juga resize ke thumbnail 128x128
+    # Dengan raw=True (engine processes), hanya path yang diteruskan; worker yang decode
+    # Cache hit melewati decode dan stage CPU sepenuhnya
+    t0 = time.perf_counter()
+    slab_id = None
+    cached = key = None
+    error = None
+    try:
+        cached, key = _cache_lookup(cache, path, variant)
+        if cached is not None:
+            item = None
+        elif raw:
+            item = path
+        elif thumbs:
+            item = load_image_thumbnail(path, fast=fast)
+        elif ring is None:
+            item = load_image_to_bytes(path, fast=fast)
+        else:
+            loaded = load_image_to_array(path, fast=fast)
+            arr = loaded["array"]
+            if arr.nbytes <= ring.slab_bytes:
+                slab_id = ring.acquire(stop)
+                if slab_id is None:
+                    return
+                item = (loaded["filename"], ring.write(slab_id, arr))
+            else:
+                # Frame lebih besar dari slab: fallback ke pickle
+                item = {"filename": loaded["filename"], "mode": "RGB", "size": loaded["size"], "data": arr.tobytes()}
+    except RuntimeError as e:
+        if verbose:
+            print(f"[WARN io] {e}")
+        item = None
+        error = str(e)
+    t1 = time.perf_counter()
+    with lock:
+        stats["io_busy"] += t1 - t0
+        stats["io_start"] = t0 if stats["io_start"] is None else min(stats["io_start"], t0)
+        stats["io_end"] = t1 if stats["io_end"] is None else max(stats["io_end"], t1)
+    # t1 ikut dikirim sebagai waktu masuk antrian (untuk span queue_wait)
+    if not _put(decoded, (idx, path, item, slab_id, cached, key, t1, error), stop) and slab_id is not None:
+        ring.release(slab_id)
+
+def _load_worker(source: Iterator[Tuple[int, str]], source_lock: threading.Lock, decoded: "queue.Queue", stop: threading.Event, *stage_args) -> None:
+    # Thread loader: tarik path berikutnya dari iterator bersama sampai habis
+    try:
+        while not stop.is_set():
+            with source_lock:
+                try:
+                    idx, path = next(source)
+                except StopIteration:
+                    break
+            _load_stage(idx, path, decoded, stop, *stage_args)
+    finally:
+        _put(decoded, _LOADER_DONE, stop)
+
+def _estimate_frame_bytes(file_list: List[str], sample: int = 8) -> int:
+    # Perkirakan ukuran frame RGB terbesar dari header beberapa file pertama
+    best = 0
+    for path in file_list[:sample]:
+        try:
+            w, h = read_image_header(path)
+        except RuntimeError:
+            continue
+        best = max(best, w * h * 3)
+    return best or 1024 * 1024 * 3
+
+def _new_stats() -> Dict[str, Any]:
+    # errors: indeks input -> alasan gagal (diisi sebelum hasil NaN-nya di-yield)
+    # aggregate: statistik RGB global berjalan (ColorStats) atas seluruh hasil
+    return {"io_busy": 0.0, "io_start": None, "io_end": None, "cpu_start": None, "cpu_end": None, "bytes_pickled": 0, "bytes_shared": 0, "count": 0, "aggregate": ColorStats(),
+            "errors": {}, "fault": {"crashes": 0, "timeouts": 0, "respawns": 0, "retries": 0, "gave_up": 0, "speculative": 0, "speculative_wins": 0}}
+
+def iter_process(paths: Iterable[str], num_threads: int = 1, num_processes: int = 1, heavy: bool = False, fast: bool = False, engine: str = "auto", pool: Optional[WorkerPool] = None, cache: Optional[ResultCache] = None, chunksize: Optional[int] = None, queue_size: Optional[int] = None, max_in_flight: Optional[int] = None, transport: str = "pickle", slab_bytes: Optional[int] = None, batch_size: Optional[int] = None, verbose: bool = False, stats: Optional[Dict[str, Any]] = None, thumb_store: Optional[str] = None, task_timeout: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES, speculate_pct: Optional[float] = DEFAULT_SPECULATE_PCT, schedule: str = "input", aggregate_only: bool = False, table: Optional[ResultTable] = None, ops: Optional[str] = None) -> Iterator[Tuple[int, tuple]]:
+    # API streaming: yield (index, hasil) begitu selesai (urutan penyelesaian, bukan urutan input).
+    # paths boleh berupa iterator (tidak perlu list lengkap di memori).
+    # engine: "serial", "threads", "processes", "hybrid" (ThreadPool decode + ProcessPool compute)
+    # atau "auto" (serial bila 1 thread/1 proses; threads bila GIL nonaktif saat runtime dan
+    # tidak ada pool; selain itu hybrid). Engine threads memakai max(num_threads, 1) thread.
+    # batch_size: thread men-decode + resize, worker memproses tensor (N, 128, 128, 3) sekaligus.
+    # stats (opsional) diisi metrik stage: io/cpu span, byte transport, jumlah hasil.
+    # thumb_store: path dataset .npy (lihat thumbstore.create_store); thumbnail input ke-i
+    # ditulis worker ke baris i. Lookup cache dilewati karena hit cache tidak membawa thumbnail.
+    # Hasil gagal tetap (filename, NaN, NaN, NaN, elapsed); alasannya ada di stats["errors"][index].
+    # task_timeout / max_retries / speculate_pct: fault tolerance engine hybrid (lihat _iter_hybrid).
+    # schedule (engine hybrid): "input" (urutan apa adanya), "lpt" / "lpt-bytes" (terbesar dulu
+    # menurut piksel header / ukuran file, chunk seimbang biaya; paths harus berupa list).
+    # stats["schedule"] berisi keseimbangan beban stage compute (sibuk worker terberat vs ideal)
+    # dan waktu worker menunggu input (starved_s), dilaporkan terpisah.
+    # stats["aggregate"] (ColorStats) diperbarui per hasil. aggregate_only=True: tidak ada yang
+    # di-yield; worker hybrid melipat chunk-nya menjadi state parsial yang digabung di parent.
+    # table (opsional): ResultTable yang diisi baris ke-index untuk setiap hasil; engine hybrid
+    # mengisinya per task langsung dari ResultChunk (set_chunk), bukan per tuple.
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport}")
+    if batch_size and engine in ("threads", "processes"):
+        raise ValueError(f"batch_size needs the hybrid engine (got engine '{engine}')")
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown schedule: {schedule}")
+    if schedule != "input" and not hasattr(paths, "__len__"):
+        raise ValueError(f"Schedule '{schedule}' needs the full list of paths (not a stream)")
+    if stats is None:
+        stats = {}
+    stats.update(_new_stats())
+    if engine == "auto":
+        if num_threads <= 1 and num_processes <= 1 and pool is None:
+            engine = "serial"
+        elif pool is None and not gil_enabled():
+            # Free-threaded tanpa GIL: thread sudah paralel penuh, tanpa spawn/pickle proses
+            engine = "threads"
+            num_threads = max(num_threads, num_processes)
+        else:
+            engine = "hybrid"
+    if engine == "serial":
+        yield from _collect(_iter_serial(paths, heavy, fast, cache, stats, thumb_store, ops), stats, aggregate_only, table)
+        return
+    order = costs = None
+    estimate_s = 0.0
+    if schedule != "input":
+        t0 = time.perf_counter()
+        costs = estimate_costs(paths, by_bytes=schedule == "lpt-bytes", num_threads=num_threads)
+        order = lpt_order(costs)
+        estimate_s = time.perf_counter() - t0
+    if engine == "threads":
+        yield from _collect(_iter_threads(paths, num_threads, heavy, fast, cache, stats, thumb_store, order, ops), stats, aggregate_only, table)
+    elif pool is None:
+        with WorkerPool(num_processes) as own_pool:
+            yield from _collect(_iter_hybrid(paths, num_threads, own_pool, heavy, fast, cache, chunksize, queue_size, max_in_flight, transport, slab_bytes, batch_size, verbose, stats, thumb_store, task_timeout, max_retries, speculate_pct, order, costs, aggregate_only, engine == "processes", table, ops), stats, aggregate_only, table)
     else:
-        avg_rgb = (0.0, 0.0, 0.0)
-    return {"elapsed": total_elapsed, "throughput": throughput, "processed": processed, "count": count, "avg_colors": avg_colors, "avg_rgb": avg_rgb, "io_time": io_time, "cpu_time": cpu_time, "task_times": task_times}
+        pool.resize(num_processes)
+        yield from _collect(_iter_hybrid(paths, num_threads, pool, heavy, fast, cache, chunksize, queue_size, max_in_flight, transport, slab_bytes, batch_size, verbose, stats, thumb_store, task_timeout, max_retries, speculate_pct, order, costs, aggregate_only, engine == "processes", table, ops), stats, aggregate_only, table)
+    stats["schedule"].update({"policy": schedule, "estimate_s": estimate_s})
+
+def _collect(results: Iterator[Tuple[int, tuple]], stats: Dict[str, Any], aggregate_only: bool, table: Optional[ResultTable] = None) -> Iterator[Tuple[int, tuple]]:
+    # Perbarui statistik global (dan tabel, baris yang belum diisi engine) per hasil;
+    # teruskan hasil kecuali mode aggregate_only
+    aggregate, errors = stats["aggregate"], stats["errors"]
+    for idx, result in results:
+        aggregate.add(result[1:4])
+        if table is not None and table.pending(idx):
+            table.set(idx, result, errors.get(idx))
+        if not aggregate_only:
+            yield idx, result
+
+def _iter_serial(paths: Iterable[str], heavy: bool, fast: bool, cache: Optional[ResultCache], stats: Dict[str, Any], thumb_store: Optional[str] = None, ops: Optional[str] = None) -> Iterator[Tuple[int, tuple]]:
+    # Engine serial: satu file per iterasi di thread pemanggil
+    variant = cache_variant(heavy, fast, ops=ops)
+    traced = instrument.ENABLED
+    stats["cpu_start"] = time.perf_counter()
+    for idx, p in enumerate(paths):
+        result, key = _cache_lookup(cache if thumb_store is None else None, p, variant)
+        if result is None:
+            result = process_image_file(p, heavy=heavy, ops=ops, fast=fast, with_thumb=thumb_store is not None)
+            reasons = drain_errors()
+            if reasons:
+                stats["errors"][idx] = reasons[-1][1]
+            if thumb_store is not None:
+                result = write_thumbs(thumb_store, [idx], [result])[0]
+            t0 = time.perf_counter() if traced else 0.0
+            _cache_store(cache, key, result)
+            if traced:
+                instrument.record("result", t0, time.perf_counter(), result[0])
+        stats["count"] += 1
+        stats["cpu_end"] = time.perf_counter()
+        yield idx, result
+
+def _thread_task(path: str, heavy: bool, fast: bool, with_thumb: bool, cache: Optional[ResultCache], variant: str, ops: Optional[str] = None) -> Tuple[tuple, Optional[str], Optional[str], bool, int, float, float]:
+    # Task engine threads: cek cache lalu proses satu file utuh di thread ini.
+    # Alasan gagal dibaca dari buffer thread ini sendiri (lihat processing.drain_errors)
+    start = time.perf_counter()
+    result, key = _cache_lookup(cache, path, variant)
+    hit = result is not None
+    reason = None
+    if not hit:
+        drain_errors()
+        result = process_image_file(path, heavy=heavy, ops=ops, fast=fast, with_thumb=with_thumb)
+        reasons = drain_errors()
+        reason = reasons[-1][1] if reasons else None
+    return result, reason, key, hit, threading.get_native_id(), start, time.perf_counter()
+
+def _iter_threads(paths: Iterable[str], num_threads: int, heavy: bool, fast: bool, cache: Optional[ResultCache], stats: Dict[str, Any], thumb_store: Optional[str] = None, order: Optional[List[int]] = None, ops: Optional[str] = None) -> Iterator[Tuple[int, tuple]]:
+    # Engine threads: satu proses, num_threads thread masing-masing memproses file utuh.
+    # Skalanya bergantung pada bagian kode yang melepas GIL (decode/resize/filter Pillow,
+    # reduksi NumPy); pada build free-threaded tanpa GIL seluruh task berjalan paralel.
+    # Tidak ada spawn proses maupun pickle. Simpan cache dan tulis thumb_store dilakukan di
+    # thread pemanggil, seperti engine serial; jumlah task in-flight dibatasi (backpressure).
+    num_threads = max(1, num_threads)
+    variant = cache_variant(heavy, fast, ops=ops)
+    lookup = cache if thumb_store is None else None
+    traced = instrument.ENABLED
+    source = iter(enumerate(paths)) if order is None else iter([(i, paths[i]) for i in order])
+    max_in_flight = num_threads * 4
+    pending: Dict[Any, Tuple[int, str]] = {}
+    # Waktu sibuk per thread: id thread -> (total sibuk, mulai pertama, selesai terakhir)
+    workers: Dict[int, Tuple[float, float, float]] = {}
+    tpool = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="engine")
+
+    def fill() -> None:
+        for idx, path in itertools.islice(source, max_in_flight - len(pending)):
+            pending[tpool.submit(profiler.call, _thread_task, path, heavy, fast, thumb_store is not None, lookup, variant, ops)] = (idx, path)
+
+    try:
+        stats["cpu_start"] = time.perf_counter()
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx, path = pending.pop(fut)
+                result, reason, key, hit, tid, t_start, t_end = fut.result()
+                busy, first, last = workers.get(tid, (0.0, t_start, t_end))
+                workers[tid] = (busy + t_end - t_start, min(first, t_start), max(last, t_end))
+                if reason is not None:
+                    stats["errors"][idx] = reason
+                if not hit:
+                    if thumb_store is not None:
+                        result = write_thumbs(thumb_store, [idx], [result])[0]
+                    t0 = time.perf_counter() if traced else 0.0
+                    _cache_store(cache, key, result)
+                    if traced:
+                        instrument.record("result", t0, time.perf_counter(), result[0])
+                stats["count"] += 1
+                stats["cpu_end"] = time.perf_counter()
+                yield idx, result
+            fill()
+    finally:
+        tpool.shutdown(wait=True, cancel_futures=True)
+        stats["schedule"] = makespan_report(workers, num_threads)
+
+class _Task:
+    # Satu task worker: indeks input, item, slab shm per item (None jika pickle),
+    # jumlah percobaan gagal, future aktif (asli + duplikat spekulatif) dan apakah task
+    # harus dijalankan sendirian (tersangka crash yang pelakunya belum jelas)
+    def __init__(self, task_id: int, idx: List[int], items: List[Any], slabs: List[Optional[int]]):
+        self.id = task_id
+        self.idx = idx
+        self.items = items
+        self.slabs = slabs
+        self.attempts = 0
+        self.futures: List[Any] = []
+        self.speculated = False
+        self.isolated = False
+        self.call: tuple = ()
+
+class _TaskTracker:
+    # Bookkeeping task engine hybrid yang belum tuntas: pengiriman ke pool, retry/isolasi
+    # setelah crash atau timeout, respawn pool, dan duplikat spekulatif di ekor run.
+    # Isi task tidak diketahui di sini: call dibuat build_call(idx, items) milik pemanggil, dan
+    # input yang menyerah dikembalikan sebagai daftar indeks agar pemanggil menyusun hasil gagalnya
+    def __init__(self, pool: WorkerPool, build_call: Callable[[List[int], List[Any]], tuple], stats: Dict[str, Any], max_retries: int = DEFAULT_MAX_RETRIES, traced: bool = False, ring: Optional[SlabRing] = None):
+        self.pool = pool
+        self.build_call = build_call
+        self.errors = stats["errors"]
+        self.fault = stats["fault"]
+        self.max_retries = max_retries
+        self.traced = traced
+        self.ring = ring
+        # tasks: task yang belum selesai; pending: future -> task
+        self.tasks: Dict[int, _Task] = {}
+        self.pending: Dict[Any, _Task] = {}
+        self._ids = itertools.count(1)
+        # Durasi compute per item dari task yang selesai (dasar persentil spekulasi)
+        self.durations: List[float] = []
+        # Task terisolasi yang menunggu giliran dijalankan tanpa task lain di pool
+        self.isolated: List[_Task] = []
+        # Waktu sibuk per worker: pid -> (total sibuk, mulai pertama, selesai terakhir)
+        self.workers: Dict[int, Tuple[float, float, float]] = {}
+        self.broken = False
+
+    def new(self, idx: List[int], items: List[Any], slabs: List[Optional[int]]) -> _Task:
+        task = _Task(next(self._ids), idx, items, slabs)
+        task.call = self.build_call(idx, items)
+        self.tasks[task.id] = task
+        return task
+
+    def schedule(self, task: _Task) -> None:
+        if task.isolated:
+            self.isolated.append(task)
+        else:
+            self.submit(task)
+
+    def submit(self, task: _Task) -> None:
+        try:
+            fut = self.pool.submit(_run_task, task.id, time.perf_counter(), self.traced, *task.call)
+        except BrokenProcessPool:
+            # Pool sudah rusak: task tetap di `tasks` dan dikirim ulang oleh recover()
+            self.broken = True
+            return
+        task.futures.append(fut)
+        self.pending[fut] = task
+
+    def close(self, task: _Task) -> None:
+        # Task tuntas (berhasil atau menyerah): batalkan duplikat, kembalikan slab ke ring
+        del self.tasks[task.id]
+        for f in task.futures:
+            f.cancel()
+            self.pending.pop(f, None)
+        task.futures = []
+        if self.ring is not None:
+            for slab_id in task.slabs:
+                if slab_id is not None:
+                    self.ring.release(slab_id)
+
+    def finish(self, fut) -> Tuple[_Task, Any, Dict[str, str], float]:
+        # Future task yang selesai tanpa exception: catat waktu worker dan tutup task.
+        # Kembalikan (task, hasil worker, alasan gagal per nama file, waktu hasil diterima)
+        task = self.pending.pop(fut)
+        results, reasons, events, pid, worker_start, worker_end = fut.result()
+        busy, first, last = self.workers.get(pid, (0.0, worker_start, worker_end))
+        self.workers[pid] = (busy + worker_end - worker_start, min(first, worker_start), max(last, worker_end))
+        t0 = time.perf_counter()
+        n = len(task.idx)
+        if self.traced:
+            instrument.merge(events)
+            instrument.record("ipc_return", worker_end, t0, f"task[{n}]")
+        if fut is not task.futures[0]:
+            self.fault["speculative_wins"] += 1
+        self.close(task)
+        self.durations.append((worker_end - worker_start) / max(1, n))
+        return task, results, dict(reasons), t0
+
+    def error(self, fut, exc: BaseException) -> List[int]:
+        # Task gagal dengan exception biasa (bukan pool rusak); dihitung satu percobaan
+        # setelah duplikat spekulatifnya juga habis
+        task = self.pending.pop(fut)
+        task.futures.remove(fut)
+        if task.futures:
+            return []
+        return self.retry(task, f"{type(exc).__name__}: {exc}")
+
+    def retry(self, task: _Task, reason: str, resubmit: bool = True) -> List[int]:
+        # Satu percobaan task gagal: ulangi per item, atau tandai gagal setelah max_retries.
+        # Kembalikan indeks input yang menyerah
+        for f in task.futures:
+            f.cancel()
+            self.pending.pop(f, None)
+        task.futures = []
+        task.attempts += 1
+        if task.attempts > self.max_retries:
+            self.close(task)
+            self.fault["gave_up"] += len(task.idx)
+            for idx in task.idx:
+                self.errors[idx] = f"{reason} (after {task.attempts} attempts)"
+            return list(task.idx)
+        self.fault["retries"] += 1
+        parts = self._split(task) if len(task.idx) > 1 else [task]
+        if resubmit:
+            for part in parts:
+                self.schedule(part)
+        return []
+
+    def _split(self, task: _Task) -> List[_Task]:
+        # Pecah per item agar satu file bermasalah tidak menyeret file lain di chunk yang sama
+        del self.tasks[task.id]
+        parts = [self.new([i], [it], [sl]) for i, it, sl in zip(task.idx, task.items, task.slabs)]
+        for part in parts:
+            part.attempts = task.attempts
+            part.isolated = task.isolated
+        return parts
+
+    def isolate(self, task: _Task) -> None:
+        # Tersangka crash tanpa bukti: pecah per item, jalankan satu per satu tanpa menambah percobaan
+        task.isolated = True
+        if len(task.idx) > 1:
+            self._split(task)
+
+    def recover(self, suspects: Dict[int, str], certain: bool) -> List[int]:
+        # Spawn ulang pool lalu kirim ulang task yang belum selesai (tanpa menambah percobaan).
+        # Tersangka dihitung gagal bila pelakunya pasti (timeout, atau hanya satu task yang sedang
+        # berjalan saat crash); jika beberapa task berjalan bersamaan, semuanya diisolasi dan
+        # dijalankan satu per satu sehingga crash berikutnya menunjuk langsung ke file penyebabnya.
+        if self.fault["respawns"] >= _MAX_RESPAWNS:
+            raise RuntimeError(f"Pool proses rusak {self.fault['respawns']} kali dalam satu run, berhenti")
+        self.pending.clear()
+        self.pool.respawn()
+        self.fault["respawns"] += 1
+        self.broken = False
+        gave_up = []
+        for task in list(self.tasks.values()):
+            task.futures = []
+            if task.id not in suspects:
+                continue
+            if certain or len(suspects) == 1:
+                gave_up += self.retry(task, suspects[task.id], resubmit=False)
+            else:
+                self.isolate(task)
+        self.isolated.clear()
+        for task in list(self.tasks.values()):
+            self.schedule(task)
+        return gave_up
+
+    def check(self, task_timeout: Optional[float]) -> List[int]:
+        # Periksa pool: worker mati di tengah task (pool rusak) atau task melewati batas waktu
+        if self.broken:
+            # Yang tercatat di papan adalah tersangka; jika tidak ada (crash sebelum task
+            # mulai), semua task terkirim ikut dihitung
+            self.fault["crashes"] += 1
+            suspects = [t for t in self.pool.running_tasks() if t in self.tasks] or list({task.id for task in self.pending.values()})
+            return self.recover({t: "worker crashed (BrokenProcessPool)" for t in suspects}, certain=False)
+        if task_timeout and self.tasks:
+            now = time.perf_counter()
+            late = [t for t, started in self.pool.running_tasks().items() if now - started > task_timeout]
+            if late:
+                # Worker yang hang hanya bisa dihentikan dengan mematikan prosesnya
+                self.fault["timeouts"] += len(late)
+                return self.recover({t: f"timeout after {task_timeout:g} s" for t in late if t in self.tasks}, certain=True)
+        return []
+
+    @property
+    def solo(self) -> bool:
+        # Selama ada task terisolasi, pool hanya menjalankan task itu (satu per satu)
+        return bool(self.isolated) or any(task.isolated for task in self.pending.values())
+
+    def run_isolated(self) -> None:
+        if self.isolated and not self.pending:
+            self.submit(self.isolated.pop(0))
+
+    def speculate(self, pct: float, num_processes: int) -> None:
+        # Duplikasi task yang berjalan lebih lama dari persentil pct durasi per item ke worker
+        # yang menganggur; dipanggil di ekor run saat semua input sudah terkirim
+        if len(self.pending) >= num_processes or len(self.durations) < _SPECULATE_MIN_SAMPLES:
+            return
+        limit = float(np.percentile(self.durations, pct))
+        now = time.perf_counter()
+        for task_id, started in self.pool.running_tasks().items():
+            task = self.tasks.get(task_id)
+            if task is not None and not task.speculated and now - started > limit * len(task.idx) and len(self.pending) < num_processes:
+                task.speculated = True
+                self.fault["speculative"] += 1
+                self.submit(task)
+
+    def settle(self) -> None:
+        # Duplikat spekulatif yang kalah masih menahan worker (mungkin hang): spawn ulang
+        # agar pool bersih untuk run berikutnya dan shutdown tidak menunggu
+        if self.pool.running_tasks():
+            self.pool.respawn()
+            self.fault["respawns"] += 1
+
+def _iter_hybrid(paths: Iterable[str], num_threads: int, pool: WorkerPool, heavy: bool, fast: bool, cache: Optional[ResultCache], chunksize: Optional[int], queue_size: Optional[int], max_in_flight: Optional[int], transport: str, slab_bytes: Optional[int], batch_size: Optional[int], verbose: bool, stats: Dict[str, Any], thumb_store: Optional[str] = None, task_timeout: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES, speculate_pct: Optional[float] = DEFAULT_SPECULATE_PCT, order: Optional[List[int]] = None, costs: Optional[List[float]] = None, reduce: bool = False, decode_in_worker: bool = False, table: Optional[ResultTable] = None, ops: Optional[str] = None) -> Iterator[Tuple[int, tuple]]:
+    # Pipeline hybrid dua stage:
+    # Stage A (ThreadPool): baca + decode file -> antrian terbatas
+    # Stage B (ProcessPool): resize + rata-rata RGB atas data yang sudah didecode
+    # Dengan batch_size, resize pindah ke Stage A dan Stage B memakai engine vektor
+    # Fault tolerance: worker crash (BrokenProcessPool) atau task > task_timeout membuat pool
+    # di-spawn ulang dan hanya task yang belum selesai dikirim ulang; task yang sedang berjalan
+    # saat itu dihitung gagal, dipecah per item, dan menyerah setelah max_retries percobaan.
+    # Task yang berjalan lebih lama dari persentil speculate_pct durasi task selesai diduplikasi
+    # ke worker yang menganggur; hasil pertama yang selesai dipakai.
+    # order (opsional): urutan indeks input yang di-dispatch (misal LPT); costs: estimasi biaya
+    # per indeks input. Dengan costs, chunk ditutup saat biayanya mencapai 1/(2 x proses) dari
+    # sisa biaya (guided self-scheduling): file besar jalan sendiri, chunk mengecil di ekor run.
+    # reduce=True: worker melipat hasil chunk menjadi ColorStats parsial (reduce_call) yang
+    # digabung ke stats["aggregate"]; tidak ada hasil per gambar yang di-yield atau di-cache.
+    # decode_in_worker=True (engine processes): thread hanya cek cache dan meneruskan path,
+    # worker membuka + decode file sendiri (tanpa piksel yang di-pickle dari parent).
+    # table (opsional): kolom hasil task worker disalin ke tabel sekaligus (ResultTable.set_chunk).
+    num_threads = max(1, num_threads)
+    num_processes = pool.num_processes
+    if decode_in_worker:
+        transport = "pickle"
+    if batch_size:
+        # Thumbnail 128x128 cukup kecil untuk di-pickle; transport shm tidak dipakai.
+        # Compute batch seragam (semua 128x128), jadi chunk tetap per jumlah item
+        chunksize = batch_size
+        transport = "pickle"
+        costs = None
+    if chunksize is None:
+        if costs is not None:
+            # Batas jumlah item saja; ukuran chunk ditentukan biaya
+            chunksize = max(1, len(costs) // num_processes)
+        else:
+            # Aturan lama (len / (proses * 8)) bila panjang input diketahui
+            chunksize = max(1, len(paths) // (num_processes * 8)) if hasattr(paths, "__len__") else 4
+    queue_size = queue_size or max(2, num_processes * chunksize * 2)
+    max_in_flight = max_in_flight or num_processes * 2
+    variant = cache_variant(heavy, fast, vector=bool(batch_size), ops=ops)
+    aggregate = stats["aggregate"]
+    # Instrumentasi: event worker ikut kembali ke parent lewat _run_task
+    traced = instrument.ENABLED
+    # Dengan batas waktu/spekulasi, loop utama bangun berkala untuk memeriksa papan task
+    tick = 0.05 if task_timeout or speculate_pct else None
+
+    ring = None
+    if transport == "shm":
+        # Jumlah slab = kedalaman antrian + seluruh task yang sedang berjalan
+        if slab_bytes is None:
+            # Iterator hanya bisa dibaca sekali: intip beberapa path pertama untuk estimasi ukuran frame
+            paths = iter(paths)
+            head = list(itertools.islice(paths, 8))
+            slab_bytes = _estimate_frame_bytes(head)
+            paths = itertools.chain(head, paths)
+        ring = SlabRing(queue_size + (max_in_flight + 1) * chunksize, slab_bytes)
+
+    decoded = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    lock = threading.Lock()
+    source = iter(enumerate(paths)) if order is None else iter([(i, paths[i]) for i in order])
+    source_lock = threading.Lock()
+    path_of: Dict[int, str] = {}
+    # Key cache per input yang miss (dihitung loader saat lookup), dipakai saat hasil disimpan
+    key_of: Dict[int, Optional[str]] = {}
+    errors = stats["errors"]
+    # Biaya input yang belum dikirim ke pool (dasar ukuran chunk guided)
+    unsent_cost = sum(costs) if costs is not None else 0.0
+    batch_cost = 0.0
+
+    def build_call(idx: List[int], items: List[Any]) -> tuple:
+        if batch_size:
+            tensor = np.stack([it["thumb"] for it in items])
+            call = (process_thumb_batch, [it["filename"] for it in items], tensor, heavy, thumb_store, idx, ops)
+        else:
+            call = (process_image_batch, items, heavy, ring.prefix if ring is not None else None, thumb_store, idx, fast, ops)
+        if reduce:
+            return (reduce_call,) + call
+        # Worker mengembalikan ResultChunk kolumnar (satu buffer float32), bukan tuple per file
+        return (chunk_call,) + call
+
+    tracker = _TaskTracker(pool, build_call, stats, max_retries=max_retries, traced=traced, ring=ring)
+
+    def finished(fut) -> Iterator[Tuple[int, tuple]]:
+        # Keluarkan hasil satu task yang sudah selesai
+        task, results, reasons, t0 = tracker.finish(fut)
+        n = len(task.idx)
+        if reduce:
+            # State parsial worker; file gagal dicocokkan lewat nama file di task ini
+            aggregate.merge(results)
+            for idx in task.idx:
+                name = os.path.basename(path_of.pop(idx))
+                key_of.pop(idx, None)
+                if name in reasons:
+                    errors[idx] = reasons[name]
+            stats["count"] += n
+        else:
+            # ResultChunk (chunk_call): alasan gagal dicatat dulu, lalu kolom tabel diisi sekaligus
+            for idx, name, failed in zip(task.idx, results.names, np.isnan(results.values[:, 0]).tolist()):
+                if failed:
+                    errors[idx] = reasons.get(name, "unknown error")
+            if table is not None:
+                table.set_chunk(task.idx, results, errors)
+            for idx, result in zip(task.idx, results.rows()):
+                path_of.pop(idx)
+                _cache_store(cache, key_of.pop(idx, None), result)
+                stats["count"] += 1
+                yield idx, result
+        stats["cpu_end"] = time.perf_counter()
+        if traced:
+            instrument.record("result", t0, stats["cpu_end"], f"task[{n}]")
+
+    def gave_up(indices: List[int]) -> Iterator[Tuple[int, tuple]]:
+        # Hasil gagal untuk input yang menyerah (alasannya sudah dicatat tracker di errors)
+        for idx in indices:
+            key_of.pop(idx, None)
+            stats["count"] += 1
+            yield idx, (os.path.basename(path_of.pop(idx)), math.nan, math.nan, math.nan, math.nan)
+
+    try:
+        with ThreadPoolExecutor(max_workers=num_threads) as tpool:
+            loaders = [tpool.submit(profiler.call, _load_worker, source, source_lock, decoded, stop, stats, lock, verbose, ring, fast, cache if thumb_store is None else None, variant, bool(batch_size), decode_in_worker) for _ in range(num_threads)]
+            try:
+                loaders_done = 0
+                batch_idx: List[int] = []
+                batch_items: List[Any] = []
+                batch_slabs: List[Optional[int]] = []
+                received = 0
+                pending = tracker.pending
+                while loaders_done < num_threads or batch_items or tracker.tasks:
+                    for fut in [f for f in pending if f.done()]:
+                        if fut not in pending:
+                            # Duplikat task yang sudah ditutup di iterasi ini
+                            continue
+                        if fut.cancelled():
+                            pending.pop(fut)
+                            continue
+                        exc = fut.exception()
+                        if isinstance(exc, BrokenProcessPool):
+                            tracker.broken = True
+                        elif exc is not None:
+                            yield from gave_up(tracker.error(fut, exc))
+                        else:
+                            yield from finished(fut)
+
+                    yield from gave_up(tracker.check(task_timeout))
+                    solo = tracker.solo
+                    tracker.run_isolated()
+
+                    # Eksekusi spekulatif di ekor run: semua input sudah terkirim dan ada worker menganggur
+                    if speculate_pct and not solo and loaders_done == num_threads and not batch_items:
+                        tracker.speculate(speculate_pct, num_processes)
+
+                    if not solo and loaders_done < num_threads and len(pending) < max_in_flight:
+                        try:
+                            msg = decoded.get(timeout=0.005 if (pending or batch_items) else 0.1)
+                        except queue.Empty:
+                            msg = None
+                        if msg is _LOADER_DONE:
+                            loaders_done += 1
+                        elif msg is not None:
+                            idx, path, item, slab_id, cached, key, put_t, error = msg
+                            if traced:
+                                instrument.record("queue_wait", put_t, time.perf_counter(), os.path.basename(path))
+                            received += 1
+                            if verbose and received % 10 == 0:
+                                print(f"[INFO] Decoded {received}")
+                            if costs is not None:
+                                if item is None:
+                                    unsent_cost -= costs[idx]
+                                else:
+                                    batch_cost += costs[idx]
+                            if cached is not None:
+                                stats["count"] += 1
+                                yield idx, cached
+                            elif item is None:
+                                errors[idx] = error or "unknown error"
+                                stats["count"] += 1
+                                yield idx, (os.path.basename(path), math.nan, math.nan, math.nan, math.nan)
+                            else:
+                                path_of[idx] = path
+                                key_of[idx] = key
+                                batch_idx.append(idx)
+                                batch_items.append(item)
+                                batch_slabs.append(slab_id)
+
+                    # Kirim chunk bila penuh, input habis, atau ada worker menganggur
+                    full = len(batch_items) >= chunksize or (costs is not None and batch_cost >= unsent_cost / (2 * num_processes))
+                    if not solo and batch_items and (full or loaders_done == num_threads or (decoded.empty() and len(pending) < num_processes)):
+                        if stats["cpu_start"] is None:
+                            stats["cpu_start"] = time.perf_counter()
+                        task = tracker.new(batch_idx, batch_items, batch_slabs)
+                        if batch_size:
+                            stats["bytes_pickled"] += sum(it["thumb"].nbytes for it in batch_items)
+                        else:
+                            stats["bytes_pickled"] += sum(len(it["data"]) for it in batch_items if isinstance(it, dict))
+                        tracker.submit(task)
+                        unsent_cost -= batch_cost
+                        batch_idx, batch_items, batch_slabs = [], [], []
+                        batch_cost = 0.0
+
+                    # Batasi jumlah task yang sedang berjalan di process pool
+                    if pending and (solo or len(pending) >= max_in_flight or loaders_done == num_threads):
+                        wait(pending, timeout=tick, return_when=FIRST_COMPLETED)
+                tracker.settle()
+                for fut in loaders:
+                    fut.result()
+            finally:
+                # Hentikan thread loader sebelum ThreadPool menunggu mereka selesai
+                # (juga saat consumer menutup generator lebih awal)
+                stop.set()
+    finally:
+        stats["schedule"] = makespan_report(tracker.workers, num_processes)
+        if ring is not None:
+            stats["bytes_shared"] = ring.bytes_shared
+            ring.close()
+
+def iter_tasks(pool: WorkerPool, items: Iterable[Any], build_call: Callable[[Any], tuple], stats: Optional[Dict[str, Any]] = None, max_in_flight: Optional[int] = None, task_timeout: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES) -> Iterator[Tuple[int, Any, Any, Optional[str]]]:
+    # Satu task worker per item (misal satu shard) lewat jalur fault tolerance engine hybrid
+    # (_run_task + _TaskTracker): crash/timeout membuat pool di-spawn ulang dan task diulang
+    # sampai max_retries. build_call(item) -> (fn, *args). Task in-flight dibatasi (default
+    # 2 x proses). Yield (indeks, item, hasil, alasan) dalam urutan selesai; hasil None dan
+    # alasan terisi bila task menyerah (alasan juga dicatat di stats["errors"][indeks]).
+    # stats (opsional) diisi seperti iter_process: errors, fault, schedule
+    if stats is None:
+        stats = {}
+    stats.update(_new_stats())
+    max_in_flight = max_in_flight or pool.num_processes * 2
+    tick = 0.05 if task_timeout else None
+    tracker = _TaskTracker(pool, lambda idx, task_items: build_call(task_items[0]), stats, max_retries=max_retries)
+    source = iter(enumerate(items))
+    item_of: Dict[int, Any] = {}
+    exhausted = False
+
+    def gave_up(indices: List[int]) -> Iterator[Tuple[int, Any, Any, Optional[str]]]:
+        for idx in indices:
+            yield idx, item_of.pop(idx), None, stats["errors"].get(idx)
+
+    try:
+        pending = tracker.pending
+        while not exhausted or tracker.tasks:
+            for fut in [f for f in pending if f.done()]:
+                if fut not in pending:
+                    continue
+                if fut.cancelled():
+                    pending.pop(fut)
+                    continue
+                exc = fut.exception()
+                if isinstance(exc, BrokenProcessPool):
+                    tracker.broken = True
+                elif exc is not None:
+                    yield from gave_up(tracker.error(fut, exc))
+                else:
+                    task, result, _, _ = tracker.finish(fut)
+                    yield task.idx[0], item_of.pop(task.idx[0]), result, None
+            yield from gave_up(tracker.check(task_timeout))
+            solo = tracker.solo
+            tracker.run_isolated()
+            while not solo and not exhausted and len(pending) < max_in_flight:
+                nxt = next(source, None)
+                if nxt is None:
+                    exhausted = True
+                    break
+                idx, item = nxt
+                item_of[idx] = item
+                tracker.submit(tracker.new([idx], [item], [None]))
+            if pending:
+                wait(pending, timeout=tick, return_when=FIRST_COMPLETED)
+    finally:
+        stats["schedule"] = makespan_report(tracker.workers, pool.num_processes)
+
+def _stage_times(stats: Dict[str, Any]) -> Dict[str, float]:
+    # Span aktif stage I/O dan CPU, serta irisannya (overlap)
+    io_start, io_end = stats["io_start"], stats["io_end"]
+    cpu_start, cpu_end = stats["cpu_start"], stats["cpu_end"]
+    io_time = (io_end - io_start) if io_start is not None else 0.0
+    cpu_time = (cpu_end - cpu_start) if cpu_start is not None and cpu_end is not None else 0.0
+    if io_start is not None and cpu_start is not None and cpu_end is not None:
+        overlap_time = max(0.0, min(io_end, cpu_end) - max(io_start, cpu_start))
+    else:
+        overlap_time = 0.0
+    return {"io_time": io_time, "cpu_time": cpu_time, "overlap_time": overlap_time, "io_busy": stats["io_busy"]}
+
+def run_configuration(num_threads: int, num_processes: int, file_list: List[str], verbose: bool = False, chunksize: Optional[int] = None, heavy: bool = False, queue_size: Optional[int] = None, pool: Optional[WorkerPool] = None, transport: str = "pickle", slab_bytes: Optional[int] = None, fast: bool = False, cache: Optional[ResultCache] = None, sink: Optional[Callable[[tuple, Optional[str]], None]] = None, batch_size: Optional[int] = None, thumb_store: Optional[str] = None, task_timeout: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES, speculate_pct: Optional[float] = DEFAULT_SPECULATE_PCT, schedule: str = "input", engine: str = "hybrid", ops: Optional[str] = None) -> Dict[str, Any]:
+    # Jalankan pipeline hybrid (lihat _iter_hybrid) di atas iter_process
+    # engine: "hybrid" (bawaan), "processes" atau "threads" (tanpa WorkerPool), lihat ENGINES
+    # Jika pool diberikan, worker yang sudah warm dipakai ulang (di-resize bila perlu)
+    # transport="shm" mengirim frame lewat slab shared memory, bukan pickle
+    # fast=True: thread I/O decode langsung ke ukuran kecil (draft/reduce)
+    # sink (opsional) dipanggil sink(hasil, alasan_gagal_atau_None) begitu hasil tersedia
+    # thumb_store (opsional): thumbnail file_list[i] ditulis ke baris i dataset memmap
+    # task_timeout / max_retries / speculate_pct: lihat _iter_hybrid; kegagalan per file
+    # dikembalikan di "failures", counter crash/retry/spekulasi di "fault"
+    # schedule: urutan dispatch (lihat iter_process); imbalance/starvation di "schedule"
+    if engine not in ("hybrid", "processes", "threads"):
+        raise ValueError(f"run_configuration needs a parallel engine (got '{engine}')")
+    if pool is None and engine != "threads":
+        with WorkerPool(num_processes) as own_pool:
+            return run_configuration(num_threads, num_processes, file_list, verbose, chunksize, heavy, queue_size, pool=own_pool, ops=ops, transport=transport, slab_bytes=slab_bytes, fast=fast, cache=cache, sink=sink, batch_size=batch_size, thumb_store=thumb_store, task_timeout=task_timeout, max_retries=max_retries, speculate_pct=speculate_pct, schedule=schedule, engine=engine)
+    if engine != "threads":
+        pool.resize(num_processes)
+    cache_before = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    total = len(file_list)
+    table = ResultTable(total)
+    stats: Dict[str, Any] = {}
+
+    start = time.perf_counter()
+    for i, (idx, result) in enumerate(iter_process(file_list, num_threads, num_processes, heavy=heavy, ops=ops, fast=fast, engine=engine, pool=pool if engine != "threads" else None, cache=cache, chunksize=chunksize, queue_size=queue_size, transport=transport, slab_bytes=slab_bytes, batch_size=batch_size, stats=stats, thumb_store=thumb_store, task_timeout=task_timeout, max_retries=max_retries, speculate_pct=speculate_pct, schedule=schedule, table=table), start=1):
+        error = stats["errors"].get(idx)
+        if sink is not None:
+            sink(result, error)
+        if verbose and (i % 10 == 0 or i == total):
+            print(f"[INFO] Processed {i}/{total}")
+    end = time.perf_counter()
+
+    total_elapsed = end - start
+    count = len(table)
+    throughput = count / total_elapsed if total_elapsed > 0 else float("inf")
+    # avg_rgb konfigurasi dari statistik berjalan (ColorStats), bukan jumlah ulang per gambar
+    aggregate = stats["aggregate"]
+    out = {"engine": engine, "elapsed": total_elapsed, "throughput": throughput, "table": table, "count": count, "avg_rgb": aggregate.avg_rgb(), "aggregate": aggregate}
+    out.update(_stage_times(stats))
+    out.update({"transport": transport, "bytes_pickled": stats["bytes_pickled"], "bytes_shared": stats["bytes_shared"], "cache": _cache_counters(cache, cache_before)})
+    out.update({"failures": _failures(stats["errors"], file_list), "fault": stats["fault"], "schedule": stats["schedule"]})
+    return out
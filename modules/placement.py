@@ -0,0 +1,172 @@
+# modules/placement.py
+# Ukuran dan penempatan worker berdasarkan mesin yang sebenarnya: CPU yang boleh dipakai
+# (sched_getaffinity / cpuset), kuota CPU cgroup (v2 cpu.max, fallback v1 cfs_quota_us) dan
+# topologi NUMA. Di container, os.cpu_count() melaporkan core host walaupun kuota hanya
+# beberapa core, sehingga pool yang diukur dari situ akan oversubscribe.
+# Tidak mengimport NumPy: cap_native_threads() harus bisa dipanggil sebelum NumPy dimuat.
+import glob
+import itertools
+import math
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+_NODE_ROOT = "/sys/devices/system/node"
+_CPU_ROOT = "/sys/devices/system/cpu"
+
+# Variabel jumlah thread pustaka native (BLAS/OpenMP) yang dibatasi di parent dan worker
+NATIVE_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _parse_cpulist(text: str) -> List[int]:
+    # "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    cpus = []
+    for part in filter(None, text.split(",")):
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+def allowed_cpus() -> List[int]:
+    # CPU yang boleh dipakai proses ini (affinity/cpuset), bukan jumlah core host
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _cgroup_paths() -> Dict[str, str]:
+    # /proc/self/cgroup -> controller ("" untuk v2) -> path cgroup proses ini
+    out: Dict[str, str] = {}
+    for line in (_read("/proc/self/cgroup") or "").splitlines():
+        parts = line.split(":", 2)
+        if len(parts) == 3:
+            for controller in parts[1].split(",") if parts[1] else [""]:
+                out[controller] = parts[2]
+    return out
+
+def _walk_up(base: str, rel: str) -> Iterator[str]:
+    # Folder cgroup proses ini lalu semua induknya sampai root mount
+    rel = rel.strip("/")
+    while True:
+        yield os.path.join(base, rel) if rel else base
+        if not rel:
+            return
+        rel = os.path.dirname(rel)
+
+def _quota_v2(folder: str) -> Optional[float]:
+    # cpu.max: "max 100000" (tanpa batas) atau "200000 100000" (2 core)
+    text = _read(os.path.join(folder, "cpu.max"))
+    if not text:
+        return None
+    quota, _, period = text.partition(" ")
+    if quota == "max" or not period:
+        return None
+    return int(quota) / int(period)
+
+def _quota_v1(folder: str) -> Optional[float]:
+    quota = _read(os.path.join(folder, "cpu.cfs_quota_us"))
+    period = _read(os.path.join(folder, "cpu.cfs_period_us"))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+def cgroup_cpu_quota() -> Tuple[Optional[float], Optional[str]]:
+    # Kuota CPU cgroup dalam satuan core (quota/period) dan file asalnya; yang terkecil di
+    # sepanjang hierarki berlaku. (None, None) bila tidak ada batas atau bukan Linux
+    paths = _cgroup_paths()
+    candidates = []
+    if "" in paths:
+        # v2 murni (/sys/fs/cgroup) atau hybrid (/sys/fs/cgroup/unified)
+        for base in (_CGROUP_ROOT, os.path.join(_CGROUP_ROOT, "unified")):
+            candidates += [(folder, _quota_v2, "cpu.max") for folder in _walk_up(base, paths[""])]
+    if "cpu" in paths:
+        for base in (os.path.join(_CGROUP_ROOT, "cpu"), os.path.join(_CGROUP_ROOT, "cpu,cpuacct")):
+            candidates += [(folder, _quota_v1, "cpu.cfs_quota_us") for folder in _walk_up(base, paths["cpu"])]
+    best: Tuple[Optional[float], Optional[str]] = (None, None)
+    for folder, read_quota, name in candidates:
+        quota = read_quota(folder)
+        if quota is not None and (best[0] is None or quota < best[0]):
+            best = (quota, os.path.join(folder, name))
+    return best
+
+def effective_cpus() -> int:
+    # Paralelisme efektif: CPU yang diizinkan, dibatasi kuota cgroup (dibulatkan ke atas,
+    # seperti runtime JVM/Go: kuota 1.5 core -> 2 worker)
+    cpus = len(allowed_cpus())
+    quota, _ = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+def numa_nodes(cpus: Optional[List[int]] = None) -> Dict[int, List[int]]:
+    # Node NUMA -> CPU yang diizinkan di node itu; satu node berisi semua CPU bila sysfs tidak ada
+    cpus = cpus if cpus is not None else allowed_cpus()
+    allowed = set(cpus)
+    nodes: Dict[int, List[int]] = {}
+    for path in glob.glob(os.path.join(_NODE_ROOT, "node[0-9]*")):
+        members = [c for c in _parse_cpulist(_read(os.path.join(path, "cpulist")) or "") if c in allowed]
+        if members:
+            nodes[int(os.path.basename(path)[4:])] = members
+    return nodes or {0: sorted(allowed)}
+
+def _core_of(cpu: int) -> Tuple[int, int]:
+    # (package, core) CPU logis; sibling hyperthread berbagi core yang sama
+    topo = os.path.join(_CPU_ROOT, f"cpu{cpu}", "topology")
+    package = _read(os.path.join(topo, "physical_package_id"))
+    core = _read(os.path.join(topo, "core_id"))
+    if package is None or core is None:
+        return (0, cpu)
+    return (int(package), int(core))
+
+def placement_plan(num_workers: int, cpus: Optional[List[int]] = None) -> List[int]:
+    # CPU untuk tiap slot worker: bergantian antar node NUMA, core fisik berbeda lebih dulu
+    # (sibling hyperthread baru dipakai setelah semua core terisi); berputar bila worker > CPU
+    nodes = numa_nodes(cpus)
+    per_node = []
+    for node in sorted(nodes):
+        ranked = []
+        seen: Dict[Tuple[int, int], int] = {}
+        for cpu in nodes[node]:
+            core = _core_of(cpu)
+            ranked.append((seen.get(core, 0), cpu))
+            seen[core] = seen.get(core, 0) + 1
+        per_node.append([cpu for _, cpu in sorted(ranked)])
+    order = [cpu for group in itertools.zip_longest(*per_node) for cpu in group if cpu is not None]
+    return [order[i % len(order)] for i in range(num_workers)]
+
+def pin_current(cpu: int) -> bool:
+    # Pin proses pemanggil ke satu CPU; False bila platform tidak mendukung atau ditolak
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+        return True
+    except OSError:
+        return False
+
+def cap_native_threads(threads: int = 1) -> Dict[str, str]:
+    # Batasi thread BLAS/OpenMP (nilai yang sudah diset pengguna dipertahankan). Berlaku untuk
+    # pustaka yang dimuat setelah ini; panggil sebelum NumPy diimport agar worker (fork
+    # mewarisi pustaka yang sudah dimuat, spawn/forkserver mewarisi env) ikut terbatas
+    for var in NATIVE_THREAD_VARS:
+        os.environ.setdefault(var, str(threads))
+    return {var: os.environ[var] for var in NATIVE_THREAD_VARS}
+
+def cpu_info() -> Dict[str, Any]:
+    # Ringkasan yang dicetak dan disimpan tiap run
+    cpus = allowed_cpus()
+    quota, source = cgroup_cpu_quota()
+    nodes = numa_nodes(cpus)
+    return {
+        "os_cpu_count": os.cpu_count(),
+        "affinity": len(cpus),
+        "cgroup_quota": quota,
+        "cgroup_source": source,
+        "numa_nodes": {str(node): members for node, members in sorted(nodes.items())},
+        "effective": effective_cpus(),
+        "native_threads": {var: os.environ.get(var) for var in NATIVE_THREAD_VARS}
+    }
@@ -1,35 +1,275 @@
 # modules/processing.py
 # Fungsi pemrosesan gambar CPU-bound
-from typing import Dict, Tuple
-from PIL import Image
+from typing import Dict, Tuple, Any, List, Optional
+from PIL import Image, ImageFilter
 import numpy as np
+import io
 import math
 import time
 import os
+import threading
+from modules.io import decode_rgb, THUMB_SIZE
+from modules.ops import plan_ops, describe, fused
+from modules import instrument
+from modules.thumbstore import write_thumbs, write_batch
 
-def process_image_file(filepath: str, heavy: bool = False) -> Tuple[str, float, float, float, float]:
+# Batas selisih rata-rata RGB per gambar (skala 0-255) antara fast decode dan jalur exact
+FAST_DECODE_EPSILON = 1.0
+
+# Naikkan setiap kali output pemrosesan berubah (membatalkan cache hasil lama)
+PROCESSING_VERSION = 3
+
+# Buffer kerja per thread untuk op stats
+_buffers = threading.local()
+
+# Alasan kegagalan per file per thread: (filename, "Tipe: pesan"); dibaca via drain_errors.
+# Per thread agar engine threads (banyak file sekaligus di satu proses) tidak saling tertukar
+_errors = threading.local()
+
+def _fail(filename: str, start: float, e: Exception) -> Tuple[str, float, float, float, float]:
+    # Hasil NaN untuk file gagal, alasan dicatat agar tidak hilang sebagai NaN tanpa keterangan
+    reasons = getattr(_errors, "reasons", None)
+    if reasons is None:
+        reasons = _errors.reasons = []
+    reasons.append((filename, f"{type(e).__name__}: {e}"))
+    return (filename, math.nan, math.nan, math.nan, time.perf_counter() - start)
+
+def drain_errors() -> List[Tuple[str, str]]:
+    # Ambil dan kosongkan daftar alasan kegagalan thread ini
+    out = getattr(_errors, "reasons", None) or []
+    _errors.reasons = []
+    return out
+
+def _mean_rgb(img: Image.Image) -> np.ndarray:
+    # Rata-rata RGB via buffer float32 yang dipakai ulang per thread (tanpa alokasi per gambar)
+    src = np.asarray(img)
+    buf = getattr(_buffers, "stats", None)
+    if buf is None or buf.shape != src.shape:
+        buf = _buffers.stats = np.empty(src.shape, dtype=np.float32)
+    np.copyto(buf, src)
+    return buf.mean(axis=(0,1))
+
+def _compute_thumb_avg(img: Image.Image, heavy: bool = False, name: Optional[str] = None, ops: Optional[str] = None) -> Tuple[Image.Image, np.ndarray]:
+    # Resize ke 128x128, lalu jalankan rencana op (modules.ops) atas satu gambar
+    # heavy: spec bawaan normal/heavy; ops: string spec (--ops) yang menggantikannya.
+    # Kembalikan thumbnail dan rata-rata RGB
+    plan = plan_ops(heavy, ops)
+    traced = instrument.ENABLED
+    t0 = time.perf_counter() if traced else 0.0
+    thumb = img.resize(THUMB_SIZE, resample=Image.Resampling.LANCZOS)
+    img = thumb
+    if traced:
+        t1 = time.perf_counter()
+        instrument.record("resize", t0, t1, name)
+    mean = None
+    for op, arg in plan[1:]:
+        if op == "blur":
+            img = img.filter(ImageFilter.GaussianBlur(radius=arg))
+        elif op == "stats":
+            mean = _mean_rgb(img)
+        if traced:
+            t0, t1 = t1, time.perf_counter()
+            instrument.record("reduce" if op == "stats" else "filter", t0, t1, name)
+    return thumb, mean
+
+def cache_variant(heavy: bool = False, fast: bool = False, vector: bool = False, ops: Optional[str] = None) -> str:
+    # Identitas varian pemrosesan untuk key cache hasil (rencana op kanonik, bukan spec mentah)
+    # Engine vektor hanya menghasilkan angka berbeda bila ada blur (blur NumPy vs Pillow).
+    # fused: blur yang digabung planner tidak identik dengan blur tunggal berparameter sama
+    plan = plan_ops(heavy, ops)
+    has_blur = any(op == "blur" for op, _ in plan)
+    return f"v{PROCESSING_VERSION}|ops={describe(plan)}|fused={int(fused(heavy, ops))}|fast={int(fast)}|vec={int(vector and has_blur)}"
+
+def _result(filename: str, start: float, img: Image.Image, heavy: bool, with_thumb: bool, ops: Optional[str] = None) -> tuple:
+    # Bentuk tuple hasil (filename, r, g, b, elapsed[, thumb_bytes])
+    thumb, avg = _compute_thumb_avg(img, heavy=heavy, ops=ops, name=filename)
+    elapsed = time.perf_counter() - start
+    if with_thumb:
+        return (filename, float(avg[0]), float(avg[1]), float(avg[2]), elapsed, thumb.tobytes())
+    return (filename, float(avg[0]), float(avg[1]), float(avg[2]), elapsed)
+
+def process_image_file(filepath: str, heavy: bool = False, fast: bool = False, with_thumb: bool = False, ops: Optional[str] = None) -> Tuple[str, float, float, float, float]:
     # Proses gambar: load, resize, hitung rata-rata RGB
-    # Jika heavy=True, tambah kerja CPU ekstra
+    # fast=True memakai decode draft/reduce (lihat decode_rgb)
+    # with_thumb=True menambahkan bytes thumbnail 128x128 sebagai elemen ke-6
     start = time.perf_counter()
     try:
         with Image.open(filepath) as img:
-            img = img.convert("RGB")
-            img = img.resize((128, 128), resample=Image.Resampling.LANCZOS)
-            if heavy:
-                # Tambah kerja CPU: GaussianBlur + histogram
-                from PIL import ImageFilter
-                img = img.filter(ImageFilter.GaussianBlur(radius=2))
-                img = img.filter(ImageFilter.GaussianBlur(radius=1))
-                hist = img.histogram()
-                _ = sum(hist) / len(hist)
-            arr = np.array(img, dtype=np.float32)
-            avg = arr.mean(axis=(0,1))
-        end = time.perf_counter()
-        elapsed = end - start
-        filename = os.path.basename(filepath)
-        return (filename, float(avg[0]), float(avg[1]), float(avg[2]), elapsed)
+            name = os.path.basename(filepath)
+            img = decode_rgb(img, fast=fast, name=name)
+            return _result(name, start, img, heavy, with_thumb, ops)
+    except Exception as e:
+        return _fail(os.path.basename(filepath) if filepath else "<unknown>", start, e)
+
+def process_image_bytes(name: str, data: bytes, heavy: bool = False, fast: bool = False, with_thumb: bool = False, ops: Optional[str] = None) -> Tuple[str, float, float, float, float]:
+    # Proses gambar terenkode yang sudah ada di memori (misal member arsip tar/zip)
+    start = time.perf_counter()
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = decode_rgb(img, fast=fast, name=name)
+            return _result(name, start, img, heavy, with_thumb, ops)
+    except Exception as e:
+        return _fail(name, start, e)
+
+def process_image_data(item: Dict[str, Any], heavy: bool = False, with_thumb: bool = False, ops: Optional[str] = None) -> Tuple[str, float, float, float, float]:
+    # Proses gambar yang sudah didecode stage I/O (output load_image_to_bytes)
+    start = time.perf_counter()
+    filename = item.get("filename", "<unknown>")
+    try:
+        img = Image.frombytes(item["mode"], item["size"], item["data"])
+        return _result(filename, start, img, heavy, with_thumb, ops)
+    except Exception as e:
+        return _fail(filename, start, e)
+
+def process_image_shared(filename: str, prefix: str, desc: Tuple[int, int, Tuple[int, int, int]], heavy: bool = False, with_thumb: bool = False, ops: Optional[str] = None) -> Tuple[str, float, float, float, float]:
+    # Proses frame yang berada di slab shared memory (hanya deskriptor yang di-pickle)
+    from modules.transport import view_frame
+    start = time.perf_counter()
+    try:
+        view = view_frame(prefix, desc)
+        img = Image.fromarray(view, mode="RGB")
+        del view
+        return _result(filename, start, img, heavy, with_thumb, ops)
     except Exception as e:
-        end = time.perf_counter()
-        elapsed = end - start
-        filename = os.path.basename(filepath) if filepath else "<unknown>"
-        return (filename, math.nan, math.nan, math.nan, elapsed)
+        return _fail(filename, start, e)
+
+def process_image_batch(items: List[Any], heavy: bool = False, prefix: Optional[str] = None, store: Optional[str] = None, rows: Optional[List[int]] = None, fast: bool = False, ops: Optional[str] = None) -> List[Tuple[str, float, float, float, float]]:
+    # Proses satu chunk gambar terdecode dalam satu task (mengurangi overhead IPC)
+    # Item berupa dict (transport pickle), (filename, desc) untuk transport shm, atau path
+    # file (engine processes; fast berlaku untuk decode-nya)
+    # Dengan store, thumbnail ditulis langsung ke baris `rows` di dataset memmap
+    out = []
+    for item in items:
+        if isinstance(item, str):
+            # Path mentah (engine processes): decode juga dilakukan di worker
+            out.append(process_image_file(item, heavy=heavy, ops=ops, fast=fast, with_thumb=store is not None))
+        elif isinstance(item, dict):
+            out.append(process_image_data(item, heavy=heavy, ops=ops, with_thumb=store is not None))
+        else:
+            filename, desc = item
+            out.append(process_image_shared(filename, prefix, desc, heavy=heavy, ops=ops, with_thumb=store is not None))
+    if store is not None:
+        out = write_thumbs(store, rows, out)
+    return out
+
+def _gaussian_kernel(radius: float) -> np.ndarray:
+    # Kernel Gaussian 1D ter-normalisasi (sigma = radius, dipotong di 3 sigma)
+    half = max(1, int(math.ceil(3 * radius)))
+    x = np.arange(-half, half + 1, dtype=np.float32)
+    k = np.exp(-(x * x) / (2.0 * radius * radius))
+    return k / k.sum()
+
+# Blur diproses per blok kecil gambar agar working set tetap di cache CPU
+_BLUR_BLOCK = 2
+
+def _blur_block(block: np.ndarray, k: np.ndarray) -> np.ndarray:
+    # Konvolusi separable (sumbu H lalu W) dengan tepi di-clamp seperti Pillow
+    half = len(k) // 2
+    for axis in (1, 2):
+        pad = [(0, 0)] * block.ndim
+        pad[axis] = (half, half)
+        padded = np.pad(block, pad, mode="edge")
+        n = block.shape[axis]
+        sl = [slice(None)] * block.ndim
+        sl[axis] = slice(0, n)
+        out = padded[tuple(sl)] * k[0]
+        tmp = np.empty_like(out)
+        for i in range(1, len(k)):
+            sl[axis] = slice(i, i + n)
+            np.multiply(padded[tuple(sl)], k[i], out=tmp)
+            out += tmp
+        block = out
+    return block
+
+def _blur_batch(batch: np.ndarray, radius: float) -> np.ndarray:
+    # Blur Gaussian separable atas tensor (N, H, W, C) float32
+    k = _gaussian_kernel(radius)
+    out = np.empty_like(batch)
+    for i in range(0, len(batch), _BLUR_BLOCK):
+        out[i:i + _BLUR_BLOCK] = _blur_block(batch[i:i + _BLUR_BLOCK], k)
+    return out
+
+def compute_batch_means(batch: np.ndarray, heavy: bool = False, ops: Optional[str] = None) -> np.ndarray:
+    # Engine vektor: rata-rata RGB per gambar untuk tensor thumbnail (N, 128, 128, 3) uint8.
+    # Rencana op yang sama dengan jalur per gambar, dijalankan atas seluruh batch sekaligus.
+    traced = instrument.ENABLED
+    t0 = time.perf_counter() if traced else 0.0
+    means = None
+    for op, arg in plan_ops(heavy, ops)[1:]:
+        if op == "blur":
+            blurred = _blur_batch(batch.astype(np.float32), arg)
+            batch = np.clip(np.rint(blurred), 0, 255).astype(np.uint8)
+        elif op == "stats":
+            # Jumlah dua tahap dalam uint32 (baris dulu, lalu kolom) tanpa salinan float32 per gambar;
+            # reduksi di sumbu H berjalan atas memori kontigu sehingga jauh lebih cepat dari sum(axis=(1, 2))
+            n, h, w, c = batch.shape
+            col_sums = batch.reshape(n, h, w * c).sum(axis=1, dtype=np.uint32)
+            means = col_sums.reshape(n, w, c).sum(axis=1) / float(h * w)
+        if traced:
+            t1 = time.perf_counter()
+            instrument.record("reduce" if op == "stats" else "filter", t0, t1, f"batch[{len(batch)}]")
+            t0 = t1
+    return means
+
+def process_thumb_batch(filenames: List[str], batch: np.ndarray, heavy: bool = False, store: Optional[str] = None, rows: Optional[List[int]] = None, ops: Optional[str] = None) -> List[Tuple[str, float, float, float, float]]:
+    # Proses satu batch thumbnail (N, 128, 128, 3) uint8 dengan engine vektor.
+    # elapsed per gambar = waktu batch dibagi rata.
+    # Dengan store, seluruh batch ditulis ke baris `rows` di dataset memmap
+    start = time.perf_counter()
+    means = compute_batch_means(batch, heavy=heavy, ops=ops)
+    per_image = (time.perf_counter() - start) / max(1, len(filenames))
+    out = []
+    for i, filename in enumerate(filenames):
+        r, g, b = means[i]
+        out.append((filename, float(r), float(g), float(b), per_image))
+    if store is not None:
+        write_batch(store, rows, batch)
+    return out
+
+def benchmark_batch_compute(thumbs: np.ndarray, batch_sizes: List[int], heavy: bool = False, repeat: int = 3, ops: Optional[str] = None) -> List[Dict[str, Any]]:
+    # Bandingkan stage compute per gambar (Pillow + salinan float32) dengan engine vektor
+    # untuk beberapa ukuran batch. Input: thumbnail terdecode (N, 128, 128, 3) uint8.
+    rows = []
+    n = len(thumbs)
+    images = [Image.fromarray(t, mode="RGB") for t in thumbs]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for img in images:
+            _compute_thumb_avg(img, heavy=heavy, ops=ops)
+        best = min(best, time.perf_counter() - t0)
+    base = n / best if best > 0 else float("inf")
+    rows.append({"engine": "per_image", "batch_size": 1, "images_per_s": base, "speedup": 1.0})
+    for bs in batch_sizes:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for i in range(0, n, bs):
+                compute_batch_means(thumbs[i:i + bs], heavy=heavy, ops=ops)
+            best = min(best, time.perf_counter() - t0)
+        ips = n / best if best > 0 else float("inf")
+        rows.append({"engine": "batch", "batch_size": bs, "images_per_s": ips, "speedup": ips / base if base else 0.0})
+    return rows
+
+def verify_fast_decode(file_list: List[str], heavy: bool = False, epsilon: float = FAST_DECODE_EPSILON, ops: Optional[str] = None) -> Dict[str, Any]:
+    # Bandingkan rata-rata RGB jalur fast decode dengan jalur exact per gambar
+    diffs = []
+    worst_file = None
+    for p in file_list:
+        exact = process_image_file(p, heavy=heavy, ops=ops)
+        fast = process_image_file(p, heavy=heavy, ops=ops, fast=True)
+        diff = max(abs(exact[i] - fast[i]) for i in range(1, 4))
+        if math.isnan(diff):
+            continue
+        if not diffs or diff > max(diffs):
+            worst_file = exact[0]
+        diffs.append(diff)
+    max_diff = max(diffs) if diffs else 0.0
+    return {
+        "checked": len(diffs),
+        "epsilon": epsilon,
+        "max_abs_diff": max_diff,
+        "mean_abs_diff": (sum(diffs) / len(diffs)) if diffs else 0.0,
+        "worst_file": worst_file,
+        "within_tolerance": max_diff <= epsilon
+    }
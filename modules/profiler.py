@@ -0,0 +1,154 @@
+# modules/profiler.py
+# Mode profiling (opt-in): cProfile per thread di parent (thread utama, loader, engine threads)
+# dan per worker pool. Worker merekam hanya selama task berjalan (bukan saat menunggu antrian)
+# lalu menulis stats-nya ke folder sementara saat proses worker selesai (Finalize). Parent
+# menggabungkan semuanya menjadi satu file pstats + ringkasan fungsi terpanas per asal
+# (Pillow, NumPy, kode repo, stdlib, menunggu).
+# Worker yang dimatikan paksa (respawn setelah crash/timeout) tidak sempat menulis stats-nya.
+import cProfile
+import glob
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Dict, List, Optional
+
+ENABLED = False
+# Folder dump worker; diteruskan ke initializer pool (lihat pipeline.WorkerPool)
+DIR: Optional[str] = None
+DEFAULT_TOP = 25
+
+# Root repo (induk folder modules) untuk mengenali fungsi milik repo
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_profiles: List[cProfile.Profile] = []
+_lock = threading.Lock()
+_local = threading.local()
+
+def _thread_profile() -> cProfile.Profile:
+    # Satu Profile per thread (cProfile hanya merekam thread tempat enable() dipanggil)
+    prof = getattr(_local, "profile", None)
+    if prof is None:
+        prof = _local.profile = cProfile.Profile()
+        with _lock:
+            _profiles.append(prof)
+    return prof
+
+def call(fn: Callable, *args) -> Any:
+    # Jalankan fn di bawah profiler thread ini (langsung bila profiling mati atau sudah aktif)
+    if not ENABLED or getattr(_local, "active", False):
+        return fn(*args)
+    prof = _thread_profile()
+    _local.active = True
+    prof.enable()
+    try:
+        return fn(*args)
+    finally:
+        prof.disable()
+        _local.active = False
+
+def start() -> str:
+    # Parent: aktifkan profiling dan rekam thread pemanggil sampai finish()
+    global ENABLED, DIR
+    DIR = tempfile.mkdtemp(prefix="pip-profile-")
+    ENABLED = True
+    _local.active = True
+    _thread_profile().enable()
+    return DIR
+
+def init_worker(out_dir: str) -> None:
+    # Initializer worker: buang state warisan fork (profiler parent yang masih aktif di thread ini)
+    global ENABLED, DIR, _profiles, _lock, _local
+    sys.setprofile(None)
+    _profiles, _lock, _local = [], threading.Lock(), threading.local()
+    ENABLED, DIR = True, out_dir
+    Finalize(None, _dump_worker, exitpriority=10)
+
+def _dump_worker() -> None:
+    with _lock:
+        profiles = list(_profiles)
+    stats = _merge_profiles(profiles)
+    if stats is not None and DIR is not None and os.path.isdir(DIR):
+        stats.dump_stats(os.path.join(DIR, f"worker-{os.getpid()}-{time.time_ns()}.prof"))
+
+def _merge_profiles(profiles: List[cProfile.Profile]) -> Optional[pstats.Stats]:
+    # Gabungkan Profile yang sudah merekam sesuatu; None bila kosong
+    stats = None
+    for prof in profiles:
+        prof.create_stats()
+        if not prof.stats:
+            continue
+        if stats is None:
+            stats = pstats.Stats(prof)
+        else:
+            stats.add(prof)
+    return stats
+
+def _origin(filename: str, func: str) -> str:
+    # Kelompok asal fungsi; fungsi C (filename "~") dikenali dari namanya
+    if filename == "~":
+        if "_thread." in func or "select" in func or "poll" in func or "sleep" in func:
+            return "wait"
+        if "Imaging" in func or "PIL." in func:
+            return "pillow"
+        if "numpy" in func:
+            return "numpy"
+        return "builtin"
+    path = filename.replace("\\", "/")
+    if "/PIL/" in path:
+        return "pillow"
+    if "/numpy/" in path:
+        return "numpy"
+    if os.path.abspath(filename).startswith(_ROOT + os.sep) and "site-packages" not in path:
+        return "repo"
+    return "stdlib"
+
+def summarize(stats: pstats.Stats, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    # Top-N fungsi menurut tottime (waktu di fungsi itu sendiri) + total tottime per asal
+    rows = []
+    by_origin: Dict[str, float] = {}
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        origin = _origin(filename, func)
+        by_origin[origin] = by_origin.get(origin, 0.0) + tottime
+        rows.append((tottime, cumtime, calls, origin, func if filename == "~" else f"{func} ({os.path.basename(filename)}:{line})"))
+    rows.sort(reverse=True)
+    return {
+        "total_tottime_s": sum(by_origin.values()),
+        "by_origin_s": dict(sorted(by_origin.items(), key=lambda kv: -kv[1])),
+        "top": [{"function": name, "origin": origin, "calls": calls, "tottime_s": tt, "cumtime_s": ct} for tt, ct, calls, origin, name in rows[:top]]
+    }
+
+def finish(out_path: str, top: int = DEFAULT_TOP) -> Optional[Dict[str, Any]]:
+    # Parent: hentikan profiling, gabungkan profile parent + dump worker ke satu file pstats.
+    # Panggil setelah pool di-shutdown (worker menulis dump saat keluar)
+    global ENABLED, DIR
+    if not ENABLED:
+        return None
+    with _lock:
+        profiles = list(_profiles)
+    for prof in profiles:
+        prof.disable()
+    _local.active = False
+    ENABLED = False
+    stats = _merge_profiles(profiles)
+    dumps = sorted(glob.glob(os.path.join(DIR, "worker-*.prof"))) if DIR else []
+    for path in dumps:
+        if stats is None:
+            stats = pstats.Stats(path)
+        else:
+            stats.add(path)
+    if DIR:
+        shutil.rmtree(DIR, ignore_errors=True)
+    DIR = None
+    _profiles.clear()
+    _local.profile = None
+    if stats is None:
+        return None
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    stats.dump_stats(out_path)
+    summary = summarize(stats, top)
+    summary.update({"file": out_path, "parent_threads": len(profiles), "worker_dumps": len(dumps)})
+    return summary
@@ -0,0 +1,171 @@
+# modules/results.py
+# Hasil per gambar dalam bentuk kolumnar: tabel nama file yang di-intern + kolom NumPy float32
+# (RGB, elapsed) dan status uint8, pengganti list tuple (filename, r, g, b) + list task_times.
+# Worker mengembalikan hasil per task sebagai ResultChunk (daftar nama + satu array float32),
+# bukan tuple per file. Tabel disimpan/dibuka sebagai .npz kolumnar tanpa pickle.
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+# Status per baris
+STATUS_PENDING = 0
+STATUS_OK = 1
+STATUS_FAILED = 2
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Daftar string -> (blob utf-8 uint8, offset int64 sepanjang n+1)
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+class ResultChunk:
+    # Hasil satu task worker: nama file + array float32 (n, 4) berisi r, g, b, elapsed.
+    # Di-pickle sebagai satu buffer, bukan n tuple berisi 5 objek Python
+    __slots__ = ("names", "values")
+
+    def __init__(self, names: List[str], values: np.ndarray):
+        self.names = names
+        self.values = values
+
+    @classmethod
+    def from_results(cls, results: List[tuple]) -> "ResultChunk":
+        values = np.array([r[1:5] for r in results], dtype=np.float32).reshape(-1, 4)
+        return cls([r[0] for r in results], values)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rows(self) -> Iterator[tuple]:
+        # Tuple (filename, r, g, b, elapsed) seperti hasil process_image_*
+        for name, (r, g, b, elapsed) in zip(self.names, self.values.tolist()):
+            yield (name, r, g, b, elapsed)
+
+def chunk_call(fn: Callable, *args) -> ResultChunk:
+    # Wrapper task di worker (seperti aggregate.reduce_call): hasil per gambar dikemas kolumnar
+    return ResultChunk.from_results(fn(*args))
+
+class ResultTable:
+    # Tabel hasil: baris i = input ke-i. Nama file disimpan sekali di tabel intern (name_id
+    # menunjuk ke sana), RGB/elapsed float32 (NaN bila gagal/belum ada), alasan gagal sparse.
+    # Kapasitas awal = jumlah input yang diketahui; set() menumbuhkan kolom bila perlu
+    def __init__(self, capacity: int = 0):
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._n = 0
+        self.name_id = np.full(capacity, -1, dtype=np.int32)
+        self.rgb = np.full((capacity, 3), np.nan, dtype=np.float32)
+        self.elapsed = np.full(capacity, np.nan, dtype=np.float32)
+        self.status = np.zeros(capacity, dtype=np.uint8)
+        self.errors: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def names(self) -> List[str]:
+        # Tabel nama unik (indeks = name_id)
+        return self._names
+
+    def _intern(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def _reserve(self, n: int) -> None:
+        cap = len(self.status)
+        if n <= cap:
+            return
+        cap = max(n, cap * 2, 1024)
+        extra = cap - len(self.status)
+        self.name_id = np.concatenate([self.name_id, np.full(extra, -1, dtype=np.int32)])
+        self.rgb = np.concatenate([self.rgb, np.full((extra, 3), np.nan, dtype=np.float32)])
+        self.elapsed = np.concatenate([self.elapsed, np.full(extra, np.nan, dtype=np.float32)])
+        self.status = np.concatenate([self.status, np.zeros(extra, dtype=np.uint8)])
+
+    def set(self, idx: int, result: tuple, error: Optional[str] = None) -> None:
+        # result = (filename, r, g, b, elapsed[, ...]); baris gagal = RGB NaN atau ada error
+        self._reserve(idx + 1)
+        self._n = max(self._n, idx + 1)
+        self.name_id[idx] = self._intern(result[0])
+        self.rgb[idx] = result[1:4]
+        self.elapsed[idx] = result[4]
+        failed = error is not None or result[1] != result[1]
+        self.status[idx] = STATUS_FAILED if failed else STATUS_OK
+        if failed:
+            self.errors[idx] = error or "unknown error"
+        else:
+            self.errors.pop(idx, None)
+
+    def set_chunk(self, idx: List[int], chunk: ResultChunk, errors: Optional[Dict[int, str]] = None) -> None:
+        # Isi banyak baris sekaligus dari ResultChunk (kolom disalin tanpa tuple per baris)
+        rows = np.asarray(idx, dtype=np.int64)
+        if not len(rows):
+            return
+        self._reserve(int(rows.max()) + 1)
+        self._n = max(self._n, int(rows.max()) + 1)
+        self.name_id[rows] = [self._intern(name) for name in chunk.names]
+        self.rgb[rows] = chunk.values[:, :3]
+        self.elapsed[rows] = chunk.values[:, 3]
+        failed = np.isnan(chunk.values[:, 0])
+        self.status[rows] = np.where(failed, STATUS_FAILED, STATUS_OK)
+        for i in rows[failed].tolist():
+            self.errors[i] = (errors or {}).get(i, "unknown error")
+
+    def pending(self, idx: int) -> bool:
+        # Baris belum diisi (set/set_chunk)
+        return idx >= len(self.status) or self.status[idx] == STATUS_PENDING
+
+    def filename(self, idx: int) -> str:
+        name_id = int(self.name_id[idx])
+        return self._names[name_id] if name_id >= 0 else ""
+
+    def row(self, idx: int) -> tuple:
+        r, g, b = self.rgb[idx].tolist()
+        return (self.filename(idx), r, g, b, float(self.elapsed[idx]))
+
+    def failed_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.status[:self._n] == STATUS_FAILED)
+
+    def nbytes(self) -> int:
+        # Memori kolom (tanpa tabel nama)
+        return sum(a[:self._n].nbytes for a in (self.name_id, self.rgb, self.elapsed, self.status))
+
+    def save(self, path: str) -> str:
+        # Simpan ke .npz kolumnar tanpa kompresi (dibuka lagi dengan ResultTable.load)
+        if not path.endswith(".npz"):
+            path += ".npz"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        names_blob, names_offsets = _pack_strings(self._names)
+        error_rows = np.array(sorted(self.errors), dtype=np.int64)
+        errors_blob, errors_offsets = _pack_strings([self.errors[i] for i in error_rows.tolist()])
+        n = self._n
+        np.savez(path, name_id=self.name_id[:n], rgb=self.rgb[:n], elapsed=self.elapsed[:n], status=self.status[:n],
+                 names_blob=names_blob, names_offsets=names_offsets, error_rows=error_rows, errors_blob=errors_blob, errors_offsets=errors_offsets)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ResultTable":
+        with np.load(path, allow_pickle=False) as data:
+            table = cls()
+            table.name_id = data["name_id"]
+            table.rgb = data["rgb"]
+            table.elapsed = data["elapsed"]
+            table.status = data["status"]
+            table._names = _unpack_strings(data["names_blob"], data["names_offsets"])
+            errors = _unpack_strings(data["errors_blob"], data["errors_offsets"])
+            table.errors = dict(zip(data["error_rows"].tolist(), errors))
+        table._name_ids = {name: i for i, name in enumerate(table._names)}
+        table._n = len(table.status)
+        return table
+
+    def summary(self) -> Dict[str, Any]:
+        return {"rows": self._n, "names": len(self._names), "ok": int((self.status[:self._n] == STATUS_OK).sum()),
+                "failed": len(self.failed_rows()), "bytes": self.nbytes()}
@@ -0,0 +1,63 @@
+# modules/schedule.py
+# Penjadwalan sadar ukuran: estimasi biaya per file dari header (lebar x tinggi, tanpa decode)
+# atau ukuran file, urutan longest-processing-time-first (LPT), dan laporan keseimbangan
+# beban (waktu sibuk per worker) terpisah dari waktu menunggu input.
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from modules.io import read_image_header
+
+# "input": urutan apa adanya; "lpt": terbesar dulu menurut piksel header;
+# "lpt-bytes": terbesar dulu menurut ukuran file (hanya stat, tanpa membuka file)
+SCHEDULES = ("input", "lpt", "lpt-bytes")
+
+# Perkiraan kasar piksel per byte file terkompresi (JPEG umum ~ 8-12) untuk header yang gagal dibaca
+_PIXELS_PER_BYTE = 8.0
+
+def estimate_cost(path: str, by_bytes: bool = False) -> float:
+    # Biaya relatif satu file dalam satuan piksel; 0 jika file tidak bisa dibaca sama sekali
+    if not by_bytes:
+        try:
+            w, h = read_image_header(path)
+            return float(w * h)
+        except RuntimeError:
+            pass
+    try:
+        return os.path.getsize(path) * _PIXELS_PER_BYTE
+    except OSError:
+        return 0.0
+
+def estimate_costs(paths: List[str], by_bytes: bool = False, num_threads: int = 4) -> List[float]:
+    # Estimasi biaya seluruh file; header dibaca paralel oleh thread (I/O-bound)
+    if by_bytes or num_threads <= 1 or len(paths) < 64:
+        return [estimate_cost(p, by_bytes) for p in paths]
+    with ThreadPoolExecutor(max_workers=num_threads) as tpool:
+        return list(tpool.map(lambda p: estimate_cost(p, by_bytes), paths, chunksize=64))
+
+def lpt_order(costs: List[float]) -> List[int]:
+    # Indeks input urut biaya menurun (stabil: biaya sama tetap urutan input)
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+def makespan_report(workers: Dict[int, Tuple[float, float, float]], num_processes: int) -> Dict[str, Any]:
+    # workers: pid -> (total waktu sibuk, mulai task pertama, selesai task terakhir).
+    # imbalance = sibuk worker terberat / rata-rata sibuk per proses (1.0 = beban terbagi
+    # sempurna), hanya dari waktu sibuk sehingga menunjukkan efek urutan LPT. Waktu menganggur
+    # menunggu input dilaporkan terpisah: starved_s = jeda antar task di dalam rentang tiap
+    # worker, tail_idle_s = waktu worker menganggur menunggu worker terakhir selesai.
+    # makespan = task pertama mulai -> task terakhir selesai; ideal = total sibuk / jumlah proses
+    if not workers:
+        return {"makespan_s": 0.0, "ideal_s": 0.0, "max_busy_s": 0.0, "imbalance": 1.0, "starved_s": 0.0, "tail_idle_s": 0.0, "workers": 0}
+    busy = sum(w[0] for w in workers.values())
+    max_busy = max(w[0] for w in workers.values())
+    start = min(w[1] for w in workers.values())
+    end = max(w[2] for w in workers.values())
+    ideal = busy / max(1, num_processes)
+    return {
+        "makespan_s": end - start,
+        "ideal_s": ideal,
+        "max_busy_s": max_busy,
+        "imbalance": max_busy / ideal if ideal > 0 else 1.0,
+        "starved_s": sum(max(0.0, w[2] - w[1] - w[0]) for w in workers.values()),
+        "tail_idle_s": sum(end - w[2] for w in workers.values()),
+        "workers": len(workers)
+    }
@@ -0,0 +1,251 @@
+# modules/service.py
+# Mode daemon: front end asyncio di Unix domain socket. Request (path atau bytes gambar)
+# dikumpulkan menjadi micro-batch dalam batas latensi lalu dikirim ke WorkerPool yang warm,
+# sehingga biaya startup interpreter/pool tidak dibayar per panggilan.
+# Protokol: satu objek JSON per baris, request boleh di-pipeline (jawaban membawa "id"):
+#   {"id": 1, "path": "data/a.jpg"}
+#   {"id": 2, "name": "b.jpg", "data": "<base64>"}
+#   {"op": "stats"} / {"op": "ping"}
+# Antrian request dibatasi max_queue: request saat antrian penuh langsung dijawab error
+# "overloaded" (klien mengulang belakangan) sehingga memori tidak tumbuh tanpa batas.
+import asyncio
+import base64
+import collections
+import json
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import numpy as np
+from modules.pipeline import WorkerPool
+from modules.processing import process_image_file, process_image_bytes, drain_errors
+from modules.utils import color_names_from_rgb
+
+DEFAULT_SOCKET = "/tmp/parallel-image-processor.sock"
+DEFAULT_MAX_BATCH = 16
+# Request pertama sebuah batch menunggu paling lama selama ini sebelum batch dikirim
+DEFAULT_BATCH_WAIT_MS = 5.0
+# Jumlah request maksimum yang menunggu di antrian sebelum request baru ditolak
+DEFAULT_MAX_QUEUE = 1024
+# Batas satu baris request (gambar base64 ikut di dalamnya)
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Jumlah sampel latensi terakhir untuk persentil p50/p99
+LATENCY_WINDOW = 10000
+
+def process_requests(items: List[tuple], heavy: bool = False, fast: bool = False, ops: Optional[str] = None) -> List[Tuple[tuple, Optional[str]]]:
+    # Task worker untuk satu micro-batch: item ("path", path) atau ("bytes", name, data).
+    # Kembalikan (hasil, alasan_gagal_atau_None) per item, urutan sama dengan input
+    out = []
+    for item in items:
+        if item[0] == "path":
+            result = process_image_file(item[1], heavy=heavy, ops=ops, fast=fast)
+        else:
+            result = process_image_bytes(item[1], item[2], heavy=heavy, ops=ops, fast=fast)
+        reasons = drain_errors()
+        out.append((result, reasons[-1][1] if reasons else None))
+    return out
+
+def _parse_item(req: Dict[str, Any]) -> tuple:
+    # Request JSON -> item worker; ValueError untuk request yang tidak valid
+    if "path" in req:
+        return ("path", str(req["path"]))
+    if "data" in req:
+        return ("bytes", str(req.get("name") or "<bytes>"), base64.b64decode(req["data"]))
+    raise ValueError("request needs 'path' or 'data'")
+
+class ColorService:
+    # Antrian request -> batcher -> pool. Batch ditutup saat berisi max_batch item atau saat
+    # request pertamanya sudah menunggu batch_wait_ms; jumlah batch in-flight dibatasi
+    # (default 2 x proses) sehingga antrian yang menahan beban (backpressure), bukan pool.
+    def __init__(self, pool: WorkerPool, heavy: bool = False, fast: bool = False, max_batch: int = DEFAULT_MAX_BATCH, batch_wait_ms: float = DEFAULT_BATCH_WAIT_MS, max_in_flight: Optional[int] = None, ops: Optional[str] = None, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.pool = pool
+        self.heavy = heavy
+        self.ops = ops
+        self.fast = fast
+        self.max_batch = max(1, max_batch)
+        self.batch_wait = max(0.0, batch_wait_ms) / 1000.0
+        self.max_in_flight = max_in_flight or pool.num_processes * 2
+        self.max_queue = max(1, max_queue)
+        self.counters = {"requests": 0, "completed": 0, "failed": 0, "rejected": 0, "overloaded": 0, "batches": 0, "batched_items": 0, "queue_depth_max": 0, "respawns": 0}
+        self._latencies: Deque[float] = collections.deque(maxlen=LATENCY_WINDOW)
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        # Referensi task _dispatch yang berjalan (event loop hanya menyimpan weakref ke task)
+        self._dispatches: Set[asyncio.Task] = set()
+        self._started = time.perf_counter()
+
+    async def submit(self, item: tuple) -> Dict[str, Any]:
+        # Masukkan satu item ke antrian dan tunggu jawabannya; OverflowError bila antrian penuh
+        fut = asyncio.get_running_loop().create_future()
+        self.counters["requests"] += 1
+        try:
+            self._queue.put_nowait((item, fut, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise OverflowError(f"server overloaded: {self.max_queue} requests queued, retry later") from None
+        self.counters["queue_depth_max"] = max(self.counters["queue_depth_max"], self._queue.qsize())
+        return await fut
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = loop.time() + self.batch_wait - (time.perf_counter() - first[2])
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                try:
+                    batch.append(self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(self._queue.get(), remaining))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        self._in_flight += 1
+        self.counters["batches"] += 1
+        self.counters["batched_items"] += len(batch)
+        spawn_count = self.pool.spawn_count
+        try:
+            fut = self.pool.submit(process_requests, [item for item, _, _ in batch], self.heavy, self.fast, self.ops)
+            results = await asyncio.wrap_future(fut)
+        except BrokenProcessPool as e:
+            # Worker mati: batch ini gagal, pool diganti sekali (batch lain yang ikut gagal tidak respawn lagi)
+            results = [(None, f"{type(e).__name__}: {e}")] * len(batch)
+            if self.pool.spawn_count == spawn_count:
+                self.counters["respawns"] += 1
+                await asyncio.get_running_loop().run_in_executor(None, self.pool.respawn)
+        except Exception as e:
+            results = [(None, f"{type(e).__name__}: {e}")] * len(batch)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+        names = color_names_from_rgb([r[1:4] if r is not None else (np.nan,) * 3 for r, _ in results])
+        now = time.perf_counter()
+        for (item, fut, t0), (result, error), name in zip(batch, results, names):
+            latency_ms = (now - t0) * 1000.0
+            self._latencies.append(latency_ms)
+            if result is None or error is not None:
+                self.counters["failed"] += 1
+            else:
+                self.counters["completed"] += 1
+            resp = {"filename": result[0] if result is not None else os.path.basename(item[1]), "error": error, "latency_ms": latency_ms, "batch_size": len(batch)}
+            if result is not None and error is None:
+                resp.update({"r": result[1], "g": result[2], "b": result[3], "elapsed_s": result[4], "color_name": name})
+            if not fut.done():
+                fut.set_result(resp)
+
+    def stats(self) -> Dict[str, Any]:
+        # Counter + persentil latensi (ms, antrian + compute, jendela LATENCY_WINDOW terakhir)
+        lat = np.asarray(self._latencies)
+        out = dict(self.counters)
+        out.update({
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight_batches": self._in_flight,
+            "avg_batch": self.counters["batched_items"] / self.counters["batches"] if self.counters["batches"] else 0.0,
+            "p50_ms": float(np.percentile(lat, 50)) if lat.size else None,
+            "p99_ms": float(np.percentile(lat, 99)) if lat.size else None,
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "batch_wait_ms": self.batch_wait * 1000.0,
+            "processes": self.pool.num_processes,
+            "uptime_s": time.perf_counter() - self._started
+        })
+        return out
+
+    async def _answer(self, req: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        try:
+            resp = await self.submit(_parse_item(req))
+        except (ValueError, TypeError) as e:
+            self.counters["rejected"] += 1
+            resp = {"error": f"{type(e).__name__}: {e}"}
+        except OverflowError as e:
+            self.counters["overloaded"] += 1
+            resp = {"error": str(e), "overloaded": True}
+        resp["id"] = req.get("id")
+        await self._send(writer, resp)
+
+    async def _send(self, writer: asyncio.StreamWriter, obj: Dict[str, Any]) -> None:
+        if writer.is_closing():
+            return
+        writer.write((json.dumps(obj) + "\n").encode())
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Satu koneksi: baca request per baris; request gambar dijawab begitu selesai (pipelined)
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Baris melebihi MAX_REQUEST_BYTES: stream tidak bisa disinkronkan lagi
+                    self.counters["rejected"] += 1
+                    await self._send(writer, {"error": f"request larger than {MAX_REQUEST_BYTES} bytes"})
+                    break
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    self.counters["rejected"] += 1
+                    await self._send(writer, {"error": f"bad request: {e}"})
+                    continue
+                op = req.get("op", "process")
+                if op == "stats":
+                    await self._send(writer, {"id": req.get("id"), "stats": self.stats()})
+                elif op == "ping":
+                    await self._send(writer, {"id": req.get("id"), "pong": True})
+                else:
+                    task = asyncio.create_task(self._answer(req, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, socket_path: str, ready: Optional[asyncio.Event] = None) -> None:
+        # Jalankan server sampai SIGINT/SIGTERM
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        batcher = asyncio.create_task(self._batcher())
+        server = await asyncio.start_unix_server(self.handle, path=socket_path, limit=MAX_REQUEST_BYTES)
+        try:
+            if ready is not None:
+                ready.set()
+            await stop.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            batcher.cancel()
+            # Batch yang sudah dikirim ke pool tetap diselesaikan sebelum pool ditutup
+            if self._dispatches:
+                await asyncio.gather(*self._dispatches, return_exceptions=True)
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+def serve(socket_path: str = DEFAULT_SOCKET, num_processes: int = 2, heavy: bool = False, fast: bool = False, max_batch: int = DEFAULT_MAX_BATCH, batch_wait_ms: float = DEFAULT_BATCH_WAIT_MS, start_method: Optional[str] = None, pin: bool = False, ops: Optional[str] = None, max_queue: int = DEFAULT_MAX_QUEUE) -> Dict[str, Any]:
+    # Entry point daemon: pool warm dibuat sekali, lalu melayani sampai dihentikan.
+    # Kembalikan counter akhir
+    with WorkerPool(num_processes, start_method=start_method, pin=pin) as pool:
+        service = ColorService(pool, heavy=heavy, fast=fast, max_batch=max_batch, batch_wait_ms=batch_wait_ms, ops=ops, max_queue=max_queue)
+        print(f"[SERVE] Listening on {socket_path} (processes={pool.num_processes}, max batch {service.max_batch}, wait {batch_wait_ms:g} ms, queue {service.max_queue})", flush=True)
+        asyncio.run(service.run(socket_path))
+        return service.stats()
@@ -0,0 +1,100 @@
+# modules/shards.py
+# Input dari arsip tar/zip (dan set shard) tanpa ekstraksi ke disk.
+# Satu task worker = satu shard: arsip dibuka sekali dan member dibaca berurutan,
+# sehingga tiap shard hanya dimiliki satu proses dan tidak pernah dibuka dua kali.
+import glob
+import math
+import os
+import tarfile
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from modules.io import IMAGE_EXTS
+from modules.pipeline import DEFAULT_MAX_RETRIES, WorkerPool, iter_tasks
+from modules.processing import drain_errors, process_image_bytes
+
+ARCHIVE_EXTS = (".tar", ".tar.gz", ".tgz", ".zip")
+
+# Pemisah shard dan nama member pada nama hasil, contoh: "cars-0001.tar::img_001.jpg"
+MEMBER_SEP = "::"
+# Nama member untuk baris gagal satu shard yang tidak bisa dibaca/diproses
+UNREADABLE = "<unreadable>"
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTS)
+
+def list_shards(spec: str) -> List[str]:
+    # Daftar shard dari satu arsip, folder berisi arsip, atau pola glob ("shards/cars-*.tar")
+    if os.path.isdir(spec):
+        paths = [os.path.join(spec, f) for f in os.listdir(spec)]
+    elif any(ch in spec for ch in "*?["):
+        paths = glob.glob(spec)
+    else:
+        paths = [spec] if os.path.isfile(spec) else []
+    return sorted(p for p in paths if is_archive(p) and os.path.isfile(p))
+
+def _is_image(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTS
+
+def iter_members(shard: str) -> Iterator[Tuple[str, bytes]]:
+    # Yield (nama member, bytes) untuk setiap gambar dalam urutan fisik arsip (baca sekuensial)
+    if shard.lower().endswith(".zip"):
+        with zipfile.ZipFile(shard) as zf:
+            infos = sorted((i for i in zf.infolist() if not i.is_dir() and _is_image(i.filename)), key=lambda i: i.header_offset)
+            for info in infos:
+                yield info.filename, zf.read(info)
+    else:
+        # Mode stream "r|*": satu lintasan maju, tanpa seek (juga untuk .tar.gz)
+        with tarfile.open(shard, "r|*") as tf:
+            for member in tf:
+                if not member.isfile() or not _is_image(member.name):
+                    continue
+                f = tf.extractfile(member)
+                if f is not None:
+                    yield member.name, f.read()
+
+def process_shard(shard: str, heavy: bool = False, fast: bool = False, with_thumb: bool = False, ops: Optional[str] = None) -> List[Tuple[tuple, Optional[str]]]:
+    # Task worker: proses seluruh gambar dalam satu shard.
+    # Nama hasil = "<shard>::<member>"; member gagal didecode menghasilkan NaN seperti process_image_file.
+    # Kembalikan (hasil, alasan_gagal_atau_None) per member; alasan diambil per member dari
+    # buffer processing.drain_errors sehingga tidak menumpuk di worker
+    out = []
+    base = os.path.basename(shard)
+    try:
+        for name, data in iter_members(shard):
+            result = process_image_bytes(f"{base}{MEMBER_SEP}{name}", data, heavy=heavy, ops=ops, fast=fast, with_thumb=with_thumb)
+            reasons = drain_errors()
+            out.append((result, reasons[-1][1] if reasons else None))
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        # Shard rusak/terpotong: tandai sisa shard sebagai gagal
+        out.append(((f"{base}{MEMBER_SEP}{UNREADABLE}", math.nan, math.nan, math.nan, math.nan), f"{type(e).__name__}: {e}"))
+    return out
+
+def iter_shards(shards: Iterable[str], pool: WorkerPool, heavy: bool = False, fast: bool = False, ops: Optional[str] = None, max_in_flight: Optional[int] = None, task_timeout: Optional[float] = None, max_retries: int = DEFAULT_MAX_RETRIES, stats: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, List[Tuple[tuple, Optional[str]]]]]:
+    # Satu task per shard lewat pipeline.iter_tasks (timeout/retry/respawn seperti engine
+    # hybrid, shard in-flight dibatasi); yield (shard, [(hasil, alasan), ...]) dalam urutan
+    # selesai. Shard yang menyerah (worker crash/timeout berulang) menjadi satu baris gagal
+    def build_call(shard: str) -> tuple:
+        return (process_shard, shard, heavy, fast, False, ops)
+
+    for _, shard, results, error in iter_tasks(pool, shards, build_call, stats=stats, max_in_flight=max_in_flight, task_timeout=task_timeout, max_retries=max_retries):
+        if results is None:
+            results = [((f"{os.path.basename(shard)}{MEMBER_SEP}{UNREADABLE}", math.nan, math.nan, math.nan, math.nan), error)]
+        yield shard, results
+
+def write_shards(files: List[str], out_dir: str, per_shard: int = 1000, fmt: str = "tar", prefix: str = "shard") -> List[str]:
+    # Kemas file gambar ke shard tar/zip berukuran per_shard (untuk menyiapkan dataset/testing)
+    os.makedirs(out_dir, exist_ok=True)
+    out = []
+    for i in range(0, len(files), per_shard):
+        path = os.path.join(out_dir, f"{prefix}-{i // per_shard:05d}.{fmt}")
+        if fmt == "zip":
+            # Gambar sudah terkompresi; STORED menghindari kompresi ulang yang sia-sia
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+                for f in files[i:i + per_shard]:
+                    zf.write(f, os.path.basename(f))
+        else:
+            with tarfile.open(path, "w") as tf:
+                for f in files[i:i + per_shard]:
+                    tf.add(f, arcname=os.path.basename(f))
+        out.append(path)
+    return out
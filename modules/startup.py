@@ -0,0 +1,69 @@
+# modules/startup.py
+# Benchmark startup: waktu sampai hasil pertama (time-to-first-result) per start method pool
+# (dan engine threads tanpa proses), diukur di interpreter baru agar import, spawn worker dan
+# task pertama ikut terhitung seperti pemanggilan CLI singkat.
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Root repo (induk folder modules) sebagai cwd interpreter anak
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def probe(method: str, num_processes: int, path: str) -> Dict[str, Any]:
+    # Dijalankan di interpreter anak: ukur fase import -> pool siap -> hasil pertama.
+    # method: salah satu START_METHODS atau "threads" (engine threads, tanpa pool)
+    t0 = time.perf_counter()
+    import modules.utils  # noqa: F401  (modul pelaporan yang diimport main.py)
+    from modules.pipeline import WorkerPool, iter_process
+    t1 = time.perf_counter()
+    pool = None if method == "threads" else WorkerPool(num_processes, start_method=method)
+    t2 = time.perf_counter()
+    try:
+        results = iter_process([path], num_processes, num_processes, engine="threads" if pool is None else "hybrid", pool=pool)
+        _, result = next(results)
+        results.close()
+        t3 = time.perf_counter()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {"import_s": t1 - t0, "pool_s": t2 - t1, "first_task_s": t3 - t2, "ok": result[1] == result[1],
+            "matplotlib_loaded": "matplotlib" in sys.modules}
+
+def _run_child(method: str, num_processes: int, path: str) -> Dict[str, Any]:
+    # Jalankan probe di interpreter baru; wall diukur dari launch sampai baris hasil terbaca
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "modules.startup", method, str(num_processes), path],
+                            cwd=_ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    wall = time.perf_counter() - t0
+    proc.wait()
+    if proc.returncode != 0 or not line:
+        raise RuntimeError(f"Startup probe '{method}' gagal (exit {proc.returncode})")
+    out = json.loads(line)
+    out["first_result_s"] = wall
+    return out
+
+def run_startup_benchmark(path: str, num_processes: int = 2, methods: Optional[List[str]] = None, repeat: int = 3) -> List[Dict[str, Any]]:
+    # Median per fase dari `repeat` interpreter baru untuk tiap method.
+    # first_result_s = launch interpreter -> hasil pertama (termasuk startup Python sendiri)
+    if methods is None:
+        import multiprocessing
+        methods = ["threads"] + [m for m in ("fork", "spawn", "forkserver") if m in multiprocessing.get_all_start_methods()]
+    rows = []
+    for method in methods:
+        runs = [_run_child(method, num_processes, path) for _ in range(repeat)]
+        row = {"method": method, "processes": 0 if method == "threads" else num_processes, "runs": repeat}
+        for key in ("first_result_s", "import_s", "pool_s", "first_task_s"):
+            row[key] = statistics.median(r[key] for r in runs)
+        row["ok"] = all(r["ok"] for r in runs)
+        row["matplotlib_loaded"] = any(r["matplotlib_loaded"] for r in runs)
+        rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    # python -m modules.startup METHOD NUM_PROCESSES PATH  (dipakai _run_child)
+    print(json.dumps(probe(sys.argv[1], int(sys.argv[2]), sys.argv[3])), flush=True)
@@ -0,0 +1,66 @@
+# modules/thumbstore.py
+# Output dataset thumbnail: satu array uint8 (N, 128, 128, 3) ter-memory-map (format .npy)
+# plus index sidecar nama file -> baris. Worker menulis barisnya langsung ke mapping,
+# sehingga piksel tidak pernah dikirim balik lewat IPC.
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from modules.io import THUMB_SIZE
+
+THUMB_SHAPE = (THUMB_SIZE[1], THUMB_SIZE[0], 3)
+
+# Mapping yang sudah dibuka di proses ini: path -> ((inode, size), memmap)
+_open_stores: Dict[str, Tuple[Tuple[int, int], np.memmap]] = {}
+
+def index_path(store: str) -> str:
+    return os.path.splitext(store)[0] + "_index.json"
+
+def create_store(store: str, n: int) -> np.memmap:
+    # Alokasikan file .npy (N, 128, 128, 3) uint8 berisi nol
+    os.makedirs(os.path.dirname(store) or ".", exist_ok=True)
+    arr = np.lib.format.open_memmap(store, mode="w+", dtype=np.uint8, shape=(n,) + THUMB_SHAPE)
+    arr.flush()
+    return arr
+
+def _writable(store: str) -> np.memmap:
+    # Buka (sekali per proses) mapping read-write; dibuka ulang jika file diganti
+    st = os.stat(store)
+    ident = (st.st_ino, st.st_size)
+    cached = _open_stores.get(store)
+    if cached is None or cached[0] != ident:
+        _open_stores[store] = (ident, np.load(store, mmap_mode="r+"))
+    return _open_stores[store][1]
+
+def write_thumbs(store: str, rows: List[int], results: List[tuple]) -> List[tuple]:
+    # Tulis thumbnail (elemen ke-6 hasil) ke baris masing-masing; kembalikan hasil tanpa
+    # bytes thumbnail
+    arr = _writable(store)
+    out = []
+    for row, result in zip(rows, results):
+        if len(result) > 5:
+            arr[row] = np.frombuffer(result[5], dtype=np.uint8).reshape(THUMB_SHAPE)
+            result = result[:5]
+        out.append(result)
+    return out
+
+def write_batch(store: str, rows: List[int], batch: np.ndarray) -> None:
+    # Tulis tensor thumbnail (N, 128, 128, 3) ke baris-baris store
+    _writable(store)[rows] = batch
+
+def save_index(store: str, filenames: List[str], failed: Optional[List[int]] = None) -> str:
+    # Index sidecar: baris -> nama file, nama file -> baris, dan baris yang gagal (tetap nol)
+    path = index_path(store)
+    n = len(filenames)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"store": os.path.basename(store), "shape": [n] + list(THUMB_SHAPE), "dtype": "uint8",
+                   "files": filenames, "rows": {name: i for i, name in enumerate(filenames)},
+                   "failed": sorted(failed or [])}, f)
+    return path
+
+def load_store(store: str) -> Tuple[np.memmap, Dict[str, Any]]:
+    # Buka dataset read-only; arr[row] dan irisan arr[a:b] adalah view tanpa salinan
+    # (baris untuk nama file: index["rows"][name])
+    with open(index_path(store), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return np.load(store, mmap_mode="r"), index
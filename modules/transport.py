@@ -0,0 +1,110 @@
+# modules/transport.py
+# Transport buffer piksel antar stage lewat multiprocessing.shared_memory (zero-copy)
+import os
+import queue
+import sys
+import threading
+import uuid
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# Deskriptor frame yang dikirim ke worker: (slab_id, offset, shape)
+FrameDesc = Tuple[int, int, Tuple[int, int, int]]
+
+class SlabRing:
+    # Ring slab shared memory yang didaur ulang.
+    # Stage I/O menulis frame terdecode ke slab kosong, worker hanya menerima
+    # deskriptor (slab_id, offset, shape) dan membaca piksel tanpa copy.
+    def __init__(self, num_slabs: int, slab_bytes: int):
+        self.prefix = f"pip_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.slab_bytes = int(slab_bytes)
+        self._slabs = []
+        self._free: "queue.Queue[int]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.bytes_shared = 0
+        try:
+            for i in range(num_slabs):
+                shm = shared_memory.SharedMemory(name=slab_name(self.prefix, i), create=True, size=self.slab_bytes)
+                self._slabs.append(shm)
+                self._free.put(i)
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._slabs)
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> Optional[int]:
+        # Ambil slab kosong; memblokir sampai ada slab yang dilepas worker
+        while stop is None or not stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def release(self, slab_id: int) -> None:
+        self._free.put(slab_id)
+
+    def write(self, slab_id: int, arr: np.ndarray) -> FrameDesc:
+        # Salin frame uint8 ke slab dan kembalikan deskriptornya
+        view = np.ndarray(arr.shape, dtype=np.uint8, buffer=self._slabs[slab_id].buf, offset=0)
+        view[...] = arr
+        del view
+        with self._lock:
+            self.bytes_shared += arr.nbytes
+        return (slab_id, 0, tuple(arr.shape))
+
+    def close(self) -> None:
+        for shm in self._slabs:
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._slabs = []
+
+    def __enter__(self) -> "SlabRing":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+def slab_name(prefix: str, slab_id: int) -> str:
+    return f"{prefix}_{slab_id}"
+
+# Cache attach shared memory di sisi worker (satu per slab, per ring aktif)
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+_attached_prefix: Optional[str] = None
+
+def _attach(prefix: str, slab_id: int) -> shared_memory.SharedMemory:
+    global _attached_prefix
+    if prefix != _attached_prefix:
+        # Ring baru: lepas mapping dari ring sebelumnya (sudah di-unlink parent)
+        for shm in _attached.values():
+            shm.close()
+        _attached.clear()
+        _attached_prefix = prefix
+    name = slab_name(prefix, slab_id)
+    shm = _attached.get(name)
+    if shm is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Hanya parent pemilik slab yang boleh unlink: attach tanpa mendaftar ke resource tracker
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        _attached[name] = shm
+    return shm
+
+def view_frame(prefix: str, desc: FrameDesc) -> np.ndarray:
+    # View NumPy (tanpa copy) atas frame di slab shared memory
+    slab_id, offset, shape = desc
+    shm = _attach(prefix, slab_id)
+    return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
@@ -3,11 +3,18 @@
 import statistics
 import json
 import csv
-from typing import List, Dict, Any, Tuple
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from typing import List, Dict, Any, Tuple, Optional, Union
 import os
+import functools
+import numpy as np
+from modules.aggregate import ColorStats
+
+def _pyplot():
+    # matplotlib baru diimport saat plot benar-benar dibuat (~0.4 s startup; --no-plot tidak membayar)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
 
 def parse_nim(nim_str: str):
     # Parse NIM untuk dapatkan parameter paralel
@@ -36,23 +43,84 @@ def save_json(summary: Dict[str,Any], out_json: str) -> None:
     with open(out_json, "w", encoding='utf-8') as f:
         json.dump(summary, f, indent=2)
 
-def compute_global_avg(per_image_avgs: List[Tuple[float, float, float]]) -> Tuple[Tuple[float, float, float], Tuple[float, float, float]]:
-    # Hitung rata-rata global dan stddev per channel
-    if not per_image_avgs:
-        return ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
-    import numpy as np
-    avgs = np.array(per_image_avgs)
-    means = avgs.mean(axis=0)
-    stds = avgs.std(axis=0)
-    return ((means[0], means[1], means[2]), (stds[0], stds[1], stds[2]))
-
-def audit_color_variation(per_image_avgs: List[Tuple[float, float, float]], threshold: float = 1.0) -> bool:
+class ImageResultWriter:
+    # Writer per gambar yang inkremental: tiap hasil langsung ditulis ke CSV
+    # (dan opsional array JSON yang di-stream), tanpa menampung semua hasil di memori
+    # Kolom error berisi alasan kegagalan file (kosong jika berhasil); color_name adalah
+    # warna palet terdekat, dihitung per blok flush_every baris dengan satu panggilan batch
+    header = ["filename", "r", "g", "b", "elapsed_s", "color_name", "error"]
+
+    def __init__(self, out_csv: str, out_json: Optional[str] = None, flush_every: int = 100):
+        os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+        self._csv_f = open(out_csv, "w", newline='', encoding='utf-8')
+        self._csv = csv.writer(self._csv_f)
+        self._csv.writerow(self.header)
+        self._json_f = None
+        if out_json:
+            os.makedirs(os.path.dirname(out_json) or ".", exist_ok=True)
+            self._json_f = open(out_json, "w", encoding='utf-8')
+            self._json_f.write("[")
+        self.flush_every = flush_every
+        self.count = 0
+        self._written = 0
+        self._pending: List[Tuple[tuple, Optional[str]]] = []
+
+    def write(self, result: tuple, error: Optional[str] = None) -> None:
+        # result = (filename, r, g, b, elapsed[, ...]); error = alasan gagal (None jika berhasil)
+        self._pending.append((result[:5], error))
+        self.count += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        names = color_names_from_rgb([result[1:4] for result, _ in self._pending])
+        for (result, error), color_name in zip(self._pending, names):
+            filename, r, g, b, elapsed = result
+            self._csv.writerow([filename, f"{r:.4f}", f"{g:.4f}", f"{b:.4f}", f"{elapsed:.6f}", color_name, error or ""])
+            if self._json_f is not None:
+                row = {"filename": filename, "r": r, "g": g, "b": b, "elapsed_s": elapsed, "color_name": color_name or None, "error": error}
+                # NaN bukan JSON valid: tulis sebagai null
+                row = {k: (None if isinstance(v, float) and v != v else v) for k, v in row.items()}
+                self._json_f.write(("," if self._written else "") + "\n  " + json.dumps(row))
+            self._written += 1
+        self._pending = []
+
+    def flush(self) -> None:
+        self._write_pending()
+        self._csv_f.flush()
+        if self._json_f is not None:
+            self._json_f.flush()
+
+    def close(self) -> None:
+        self._write_pending()
+        self._csv_f.close()
+        if self._json_f is not None:
+            self._json_f.write("\n]\n")
+            self._json_f.close()
+            self._json_f = None
+
+    def __enter__(self) -> "ImageResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+def compute_global_avg(per_image_avgs: Union[ColorStats, List[Tuple[float, float, float]]]) -> Tuple[Tuple[float, float, float], Tuple[float, float, float]]:
+    # Hitung rata-rata global dan stddev per channel (populasi); gambar gagal (NaN) dilewati.
+    # Terima statistik berjalan (ColorStats, memori O(1)) atau daftar rata-rata per gambar
+    agg = per_image_avgs if isinstance(per_image_avgs, ColorStats) else ColorStats.from_values(per_image_avgs)
+    return agg.avg_rgb(), agg.std_rgb()
+
+def audit_color_variation(per_image_avgs: Union[ColorStats, List[Tuple[float, float, float]]], threshold: float = 1.0) -> bool:
     # Audit variasi warna dataset
     _, stds = compute_global_avg(per_image_avgs)
     return all(s > threshold for s in stds)
 
 def plot_results(csv_rows: List[Dict[str,Any]], out_png: str) -> None:
     # Buat plot hasil eksekusi
+    plt = _pyplot()
     modes = [r["mode"] for r in csv_rows]
     times = [float(r["time_s"]) for r in csv_rows]
     speedups = [float(r["speedup"]) for r in csv_rows]
@@ -81,7 +149,7 @@ def plot_results(csv_rows: List[Dict[str,Any]], out_png: str) -> None:
 
 def plot_experiments(results: List[Dict[str, Any]], out_dir: str) -> None:
     # Buat plot untuk eksperimen
-    import os
+    plt = _pyplot()
     os.makedirs(out_dir, exist_ok=True)
 
     # Plot 1: Time vs Threads
@@ -140,14 +208,14 @@ def plot_experiments(results: List[Dict[str, Any]], out_dir: str) -> None:
 
 def save_experiments_csv(results: List[Dict[str, Any]], out_csv: str) -> None:
     # Simpan hasil eksperimen ke CSV
-    header = ["No", "Jumlah Thread", "Jumlah Process", "Data/Task", "Waktu (s)", "Speedup", "Efisiensi (%)", "Avg RGB", "Warna"]
+    header = ["No", "Engine", "Jumlah Thread", "Jumlah Process", "Data/Task", "Waktu (s)", "Speedup", "Efisiensi (%)", "Avg RGB", "Warna"]
     os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
     with open(out_csv, "w", newline='', encoding='utf-8') as f:
         w = csv.writer(f)
         w.writerow(header)
         for i, r in enumerate(results, 1):
             avg_rgb_str = f"rgb({r['avg_rgb'][0]:.1f},{r['avg_rgb'][1]:.1f},{r['avg_rgb'][2]:.1f})"
-            w.writerow([i, r["threads"], r["processes"], r["data_count"], f"{r['time_s']:.6f}", f"{r['speedup']:.6f}", f"{r['efficiency_percent']:.2f}", avg_rgb_str, r["color_name"]])
+            w.writerow([i, r["engine"], r["threads"], r["processes"], r["data_count"], f"{r['time_s']:.6f}", f"{r['speedup']:.6f}", f"{r['efficiency_percent']:.2f}", avg_rgb_str, r["color_name"]])
 
 def save_experiments_json(results: List[Dict[str, Any]], out_json: str) -> None:
     # Simpan hasil eksperimen ke JSON
@@ -173,6 +241,13 @@ COLOR_PALETTE = {
     "Krem": (240, 234, 214)
 }
 
+# Palet dalam bentuk array: urutan sama dengan dict (menentukan tie-breaking: indeks pertama menang)
+PALETTE_NAMES = tuple(COLOR_PALETTE)
+_PALETTE_RGB = np.array(list(COLOR_PALETTE.values()), dtype=np.int32)
+# Batch sebesar ini atau lebih memakai lookup table 256^3 (dibangun sekali, ~16 MB, <1 s);
+# batch kecil cukup dihitung jaraknya langsung (N x jumlah warna palet)
+LUT_MIN_ROWS = 1 << 18
+
 def color_name_from_rgb(rgb: Tuple[float, float, float]) -> Tuple[str, Tuple[int, int, int]]:
     # Compute nearest color by Euclidean distance
     r_i, g_i, b_i = int(round(rgb[0])), int(round(rgb[1])), int(round(rgb[2]))
@@ -185,12 +260,44 @@ def color_name_from_rgb(rgb: Tuple[float, float, float]) -> Tuple[str, Tuple[int
             best_name = name
     return best_name, (r_i, g_i, b_i)
 
+@functools.lru_cache(maxsize=1)
+def palette_lut() -> np.ndarray:
+    # Indeks palet terdekat untuk setiap rgb integer (256, 256, 256) uint8.
+    # Jarak kanal G/B dihitung sekali, lalu ditambah suku R per irisan r
+    levels = np.arange(256, dtype=np.int32)
+    d_g = (levels[:, None] - _PALETTE_RGB[None, :, 1]) ** 2
+    d_b = (levels[:, None] - _PALETTE_RGB[None, :, 2]) ** 2
+    d_gb = d_g[:, None, :] + d_b[None, :, :]
+    lut = np.empty((256, 256, 256), dtype=np.uint8)
+    for r in range(256):
+        lut[r] = (d_gb + (r - _PALETTE_RGB[:, 0]) ** 2).argmin(axis=2)
+    return lut
+
+def color_indices_from_rgb(rgb: np.ndarray) -> np.ndarray:
+    # Versi batch color_name_from_rgb: (N, 3) rata-rata -> (N,) indeks PALETTE_NAMES.
+    # Dibulatkan ke integer dulu (round-half-even, sama dengan round()) lalu argmin yang
+    # mengambil indeks pertama saat jarak sama, sehingga hasilnya identik dengan versi skalar.
+    # Baris NaN (gambar gagal) mendapat indeks -1
+    rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+    ok = ~np.isnan(rgb).any(axis=1)
+    q = np.rint(np.where(ok[:, None], rgb, 0.0)).astype(np.intp)
+    if len(q) >= LUT_MIN_ROWS and q.min() >= 0 and q.max() <= 255:
+        idx = palette_lut()[q[:, 0], q[:, 1], q[:, 2]].astype(np.intp)
+    else:
+        idx = ((q[:, None, :] - _PALETTE_RGB[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+    idx[~ok] = -1
+    return idx
+
+def color_names_from_rgb(rgb: np.ndarray) -> List[str]:
+    # Nama warna per baris; string kosong untuk baris NaN
+    return [PALETTE_NAMES[i] if i >= 0 else "" for i in color_indices_from_rgb(rgb).tolist()]
+
 def print_experiments_table(results: List[Dict[str, Any]]) -> str:
     # Cetak tabel ASCII untuk eksperimen
     table = []
-    table.append("No | Jumlah Thread | Jumlah Process | Data/Task | Waktu (s) | Speedup | Efisiensi (%) | Avg RGB              | Warna")
-    table.append("-" * 120)
+    table.append("No | Engine    | Jumlah Thread | Jumlah Process | Data/Task | Waktu (s) | Speedup | Efisiensi (%) | Avg RGB              | Warna")
+    table.append("-" * 132)
     for i, r in enumerate(results, 1):
         avg_rgb_str = f"rgb({r['avg_rgb'][0]:.1f},{r['avg_rgb'][1]:.1f},{r['avg_rgb'][2]:.1f})"
-        table.append(f"{i:2} | {r['threads']:13} | {r['processes']:14} | {r['data_count']:9} | {r['time_s']:9.6f} | {r['speedup']:6.6f} | {r['efficiency_percent']:11.2f} | {avg_rgb_str:20} | {r['color_name']}")
+        table.append(f"{i:2} | {r['engine']:<9} | {r['threads']:13} | {r['processes']:14} | {r['data_count']:9} | {r['time_s']:9.6f} | {r['speedup']:6.6f} | {r['efficiency_percent']:11.2f} | {avg_rgb_str:20} | {r['color_name']}")
     return "\n".join(table)